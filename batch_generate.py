@@ -0,0 +1,449 @@
+#!/usr/bin/env python3
+"""
+批量旅程记录生成器
+在一个进程中读取任务清单 (CSV/JSON)，通过进程池并行生成多个地址/季度的旅程记录，
+所有任务共用同一个持久化距离缓存
+"""
+
+import argparse
+import csv
+import io
+import json
+import logging
+import multiprocessing
+import os
+import re
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import redirect_stdout
+from typing import Dict, List
+
+from distance_cache import DistanceCache, DEFAULT_CACHE_PATH, DEFAULT_CACHE_TTL_DAYS, DEFAULT_NEGATIVE_TTL_DAYS
+from run_logging import LOG_FORMATS, RecordBuffer, configure_logging, log, log_event, replay_records, summary_log
+from distance_providers import DistanceProvider, build_provider
+from geocoding import geocoded
+from request_scheduler import DEFAULT_MAX_ELEMENTS_PER_SECOND, DEFAULT_MAX_QPS, ApiBudget, RequestScheduler
+from trip_calendar import DEFAULT_MAX_TRIPS_PER_DAY, dutch_holidays, parse_date_ranges
+from trip_exporters import EXPORTERS, export_reports, file_extension
+from trip_generator import DEFAULT_MAX_WORKERS, TripGenerator, load_env_file
+
+# 清单中必须包含的字段
+MANIFEST_FIELDS = ("year", "quarter", "target_km", "address")
+
+# Excel 工作表名称的长度上限和不允许的字符
+_SHEET_NAME_MAX_LENGTH = 31
+_INVALID_SHEET_CHARS = re.compile(r"[\[\]:*?/\\]")
+
+# 每个工作进程中复用的缓存、距离提供者和请求调度
+_worker = {}
+
+
+def load_manifest(path: str, format_name: str = "xlsx") -> List[Dict]:
+    """读取任务清单：CSV（带表头）或 JSON（任务列表，或 {"jobs": [...]}）
+
+    每个任务的 output 都补全为最终的输出文件名，见 resolve_outputs。
+    """
+    with open(path, "r", encoding="utf-8-sig") as f:
+        if path.lower().endswith(".json"):
+            data = json.load(f)
+            rows = data.get("jobs", []) if isinstance(data, dict) else data
+        else:
+            rows = list(csv.DictReader(f))
+
+    jobs = []
+    for number, row in enumerate(rows, 1):
+        missing = [field for field in MANIFEST_FIELDS if row.get(field) in (None, "")]
+        if missing:
+            raise ValueError(f"taak {number}: ontbrekende velden {', '.join(missing)}")
+        try:
+            job = {
+                "index": number - 1,
+                "year": int(row["year"]),
+                "quarter": int(row["quarter"]),
+                "target_km": int(row["target_km"]),
+                "address": str(row["address"]).strip(),
+                "output": (row.get("output") or "").strip() or None,
+                "seed": int(row["seed"]) if row.get("seed") not in (None, "") else None,
+            }
+        except (TypeError, ValueError):
+            raise ValueError(f"taak {number}: year, quarter, target_km en seed moeten gehele getallen zijn")
+        if job["quarter"] not in (1, 2, 3, 4):
+            raise ValueError(f"taak {number}: kwartaal moet 1, 2, 3 of 4 zijn")
+        if job["target_km"] <= 0:
+            raise ValueError(f"taak {number}: target_km moet groter dan 0 zijn")
+        jobs.append(job)
+    resolve_outputs(jobs, format_name)
+    return jobs
+
+
+def default_output(job: Dict, format_name: str = "xlsx", number: int = None) -> str:
+    """任务未指定输出文件时的默认文件名；number 为清单行号，用于区分默认文件名相同的任务"""
+    slug = re.sub(r"[^0-9A-Za-z]+", "_", job["address"]).strip("_") or "adres"
+    suffix = f"_taak{number}" if number is not None else ""
+    return f"reisverslag_{job['year']}_Q{job['quarter']}_{slug}{suffix}{file_extension(format_name)}"
+
+
+def resolve_outputs(jobs: List[Dict], format_name: str = "xlsx"):
+    """补全任务的输出文件名，保证没有两个任务写入同一个文件
+
+    默认文件名相同的任务（同一地址和季度）在文件名中加上清单行号；
+    显式指定的输出文件相互重复时拒绝整个清单。
+    """
+    def key(output: str) -> str:
+        return os.path.normcase(os.path.normpath(output))
+
+    defaults = Counter(key(default_output(job, format_name)) for job in jobs if not job["output"])
+    explicit = {key(job["output"]) for job in jobs if job["output"]}
+    for job in jobs:
+        if not job["output"]:
+            output = default_output(job, format_name)
+            if defaults[key(output)] > 1 or key(output) in explicit:
+                output = default_output(job, format_name, job["index"] + 1)
+            job["output"] = output
+
+    used = {}
+    for job in jobs:
+        number = used.setdefault(key(job["output"]), job["index"] + 1)
+        if number != job["index"] + 1:
+            raise ValueError(f"taak {job['index'] + 1}: uitvoerbestand {job['output']} "
+                             f"wordt al gebruikt door taak {number}")
+
+
+def sheet_names(jobs: List[Dict]) -> List[str]:
+    """为合并工作簿中的每个任务生成唯一、合法的工作表名称"""
+    names = []
+    used = set()
+    for job in jobs:
+        base = _INVALID_SHEET_CHARS.sub(" ", f"{job['year']} Q{job['quarter']} {job['address']}").strip()
+        name = base[:_SHEET_NAME_MAX_LENGTH]
+        counter = 2
+        while name.lower() in used:
+            suffix = f" ({counter})"
+            name = base[:_SHEET_NAME_MAX_LENGTH - len(suffix)] + suffix
+            counter += 1
+        used.add(name.lower())
+        names.append(name)
+    return names
+
+
+def _open_cache(options: Dict) -> DistanceCache:
+    if options["no_cache"]:
+        return None
+    return DistanceCache(options["cache_path"], ttl_days=options["cache_ttl_days"],
+                         negative_ttl_days=options["negative_ttl_days"])
+
+
+def _open_matrix(options: Dict):
+    if not options.get("matrix"):
+        return None
+    from distance_matrix import DistanceMatrix
+    return DistanceMatrix(options["matrix"])
+
+
+def _create_scheduler(options: Dict, counter, processes: int = 1) -> RequestScheduler:
+    """所有进程共享同一份元素预算 (counter)，速率上限在同时运行的 processes 个进程之间平分"""
+    return RequestScheduler(options["max_qps"] / processes, options["max_elements_per_second"] / processes,
+                            ApiBudget(options["api_budget"], counter))
+
+
+def _build_provider(options: Dict, cache: DistanceCache, scheduler: RequestScheduler) -> DistanceProvider:
+    """创建距离提供者；地理编码在同一进程的所有任务之间共享，同一地址只解析一次"""
+    provider = build_provider(options)
+    return geocoded(provider, cache, scheduler) if options["geocode"] else provider
+
+
+def _create_generator(job: Dict, options: Dict, cache: DistanceCache, provider: DistanceProvider,
+                      prefetch: bool = None, matrix=None, scheduler: RequestScheduler = None) -> TripGenerator:
+    blackout_dates = list(options["blackout_dates"])
+    if options["skip_holidays"]:
+        blackout_dates.extend(dutch_holidays(job["year"]))
+    return TripGenerator(job["year"], job["quarter"], job["target_km"], job["address"],
+                         options["google_api_key"], cache=cache,
+                         prefetch=options["prefetch"] if prefetch is None else prefetch,
+                         max_workers=options["workers"], distance_provider=options["distance_provider"],
+                         detour_factor=options["detour_factor"], provider=provider,
+                         max_trips_per_day=options["max_trips_per_day"],
+                         weekdays_only=options["weekdays_only"], blackout_dates=blackout_dates,
+                         planner=options["planner"], matrix=matrix, seed=job.get("seed"), scheduler=scheduler,
+                         geocode=options["geocode"])
+
+
+def prewarm_distances(jobs: List[Dict], options: Dict, counter=None) -> Dict[str, Dict[str, int]]:
+    """在主进程中为每个不同的起始地址预取一次距离，返回 {地址: 距离表}
+
+    同一地址的多个季度共享结果，工作进程不再重复请求相同的距离。
+    距离矩阵 (--matrix) 已包含的地址不需要预取，工作进程直接读取共享的矩阵。
+    """
+    addresses = list(dict.fromkeys(job["address"] for job in jobs))
+    cache = _open_cache(options)
+    matrix = _open_matrix(options)
+    scheduler = _create_scheduler(options, counter)
+    provider = _build_provider(options, cache, scheduler)
+    memos = {}
+    try:
+        for address in addresses:
+            job = next(job for job in jobs if job["address"] == address)
+            with redirect_stdout(io.StringIO()):
+                generator = _create_generator(job, options, cache, provider, prefetch=True, matrix=matrix,
+                                              scheduler=scheduler)
+                if generator.matrix is not None:
+                    continue
+                generator.prefetch_distances()
+            memos[address] = dict(generator.distance_memo)
+            resolved = sum(1 for km in generator.distance_memo.values() if km is not None)
+            log_event(log, logging.INFO, "prewarmed",
+                      f"🔥 {address}: {resolved} afstanden voorbereid ({generator.api_calls} API-verzoeken)",
+                      address=address, resolved=resolved, api_calls=generator.api_calls)
+    finally:
+        if provider is not None:
+            provider.close()
+        if cache is not None:
+            cache.close()
+    return memos
+
+
+def _init_worker(options: Dict, counter=None, processes: int = 1):
+    """工作进程初始化：每个进程只打开一次缓存、只创建一次距离提供者和请求调度"""
+    _worker["options"] = options
+    # 工作进程不直接写控制台：日志记录随结果交回主进程，--verbose 时由主进程输出
+    _worker["records"] = RecordBuffer()
+    configure_logging(options["log_format"], quiet=options["quiet"], handler=_worker["records"])
+    _worker["cache"] = _open_cache(options)
+    _worker["matrix"] = _open_matrix(options)
+    _worker["scheduler"] = _create_scheduler(options, counter, processes)
+    _worker["provider"] = _build_provider(options, _worker["cache"], _worker["scheduler"])
+
+
+def run_job(job: Dict, memo: Dict[str, int] = None, write_output: bool = True) -> Dict:
+    """在工作进程中生成一个任务的旅程记录，返回行程和捕获的日志记录"""
+    options = _worker["options"]
+    started = time.perf_counter()
+    result = {"index": job["index"], "trips": [], "output": None, "error": None, "api_calls": 0}
+    try:
+        generator = _create_generator(job, options, _worker["cache"], _worker["provider"],
+                                      matrix=_worker["matrix"], scheduler=_worker["scheduler"])
+        if memo:
+            generator.distance_memo.update(memo)
+        trips = generator.generate_trips()
+        if write_output:
+            result["output"] = generator.export(options["format"],
+                                                os.path.join(options["output_dir"], job["output"]))
+        result["trips"] = trips
+        result["api_calls"] = generator.api_calls
+        result["metrics"] = generator.metrics.to_dict()
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+    result["records"] = _worker["records"].drain()
+    result["seconds"] = time.perf_counter() - started
+    return result
+
+
+def run_batch(jobs: List[Dict], options: Dict, processes: int = None, combined: str = None,
+              verbose: bool = False, counter=None) -> List[Dict]:
+    """用进程池执行所有任务，按清单顺序返回结果
+
+    counter (multiprocessing.Value) 记录主进程和所有工作进程已使用的 API 元素数，--api-budget 对整个批次生效。
+    """
+    if counter is None:
+        counter = multiprocessing.Value("q", 0)
+    memos = prewarm_distances(jobs, options, counter) if options["prefetch"] else {}
+
+    results = [None] * len(jobs)
+    with ProcessPoolExecutor(max_workers=processes, initializer=_init_worker,
+                             initargs=(options, counter, processes or 1)) as executor:
+        futures = {executor.submit(run_job, job, memos.get(job["address"]), combined is None): job
+                   for job in jobs}
+        for future in as_completed(futures):
+            job = futures[future]
+            result = future.result()
+            results[job["index"]] = result
+            label = f"{job['year']} Q{job['quarter']} - {job['address']}"
+            if verbose:
+                replay_records(result["records"])
+            if result["error"]:
+                log_event(log, logging.ERROR, "job_failed", f"❌ {label}: {result['error']}",
+                          job=job["index"], error=result["error"])
+                continue
+            total_km = result["trips"].total_distance()
+            log_event(summary_log, logging.INFO, "job_finished",
+                      f"✅ {label}: {len(result['trips'])} ritten, {total_km}km "
+                      f"(doel: {job['target_km']}km, {result['seconds']:.1f}s)",
+                      job=job["index"], year=job["year"], quarter=job["quarter"], address=job["address"],
+                      trips=len(result["trips"]), total_km=total_km, target_km=job["target_km"],
+                      seconds=round(result["seconds"], 3), output=result["output"])
+
+    if combined:
+        succeeded = [job for job in jobs if not results[job["index"]]["error"]]
+        reports = [{
+            "sheet_name": name,
+            "trips": results[job["index"]]["trips"],
+            "year": job["year"],
+            "quarter": job["quarter"],
+        } for job, name in zip(succeeded, sheet_names(succeeded))]
+        if reports:
+            export_reports(options["format"], combined, reports)
+            log_event(summary_log, logging.INFO, "exported",
+                      f"📚 Gecombineerd bestand: {combined} ({len(reports)} reisverslagen)",
+                      filename=combined, reports=len(reports))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Reisverslag Batch Generator - Meerdere reisverslagen genereren vanuit een takenlijst",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Takenlijst (CSV met kopregel, of JSON-lijst) met de velden:
+  year, quarter, target_km, address[, output][, seed]
+
+Gebruiksvoorbeelden:
+  python batch_generate.py taken.csv
+  python batch_generate.py taken.json --processes 4 --output-dir rapporten
+  python batch_generate.py taken.csv --combined alle_reisverslagen.xlsx
+        """
+    )
+
+    parser.add_argument('manifest', type=str, help='Takenlijst (CSV of JSON)')
+    parser.add_argument('--processes', type=int, default=os.cpu_count(),
+                        help='Aantal parallelle processen (standaard: aantal CPU-kernen)')
+    parser.add_argument('--output-dir', type=str, default='.', help='Map voor de uitvoerbestanden')
+    parser.add_argument('--format', choices=sorted(EXPORTERS), default='xlsx',
+                        help='Exportformaat: xlsx, csv, jsonl, parquet of json (standaard: xlsx)')
+    parser.add_argument('--combined', type=str, metavar='BESTAND',
+                        help='Alle reisverslagen in één bestand (bij xlsx één werkblad per taak)')
+    parser.add_argument('--verbose', '-v', action='store_true', help='Volledige uitvoer van elke taak tonen')
+    parser.add_argument('--log-format', choices=LOG_FORMATS, default='text',
+                        help='Uitvoerformaat: text (leesbaar) of json (één JSON-regel per gebeurtenis)')
+    parser.add_argument('--quiet', '-q', action='store_true',
+                        help='Alleen waarschuwingen en de samenvatting per taak tonen')
+    parser.add_argument('--google-api-key', type=str, help='Google Maps API sleutel voor echte afstanden')
+    parser.add_argument('--cache-path', type=str, default=DEFAULT_CACHE_PATH,
+                        help=f'Pad naar de gedeelde afstandscache (standaard: {DEFAULT_CACHE_PATH})')
+    parser.add_argument('--cache-ttl-days', type=float, default=DEFAULT_CACHE_TTL_DAYS,
+                        help=f'Geldigheid van cache-items in dagen (standaard: {DEFAULT_CACHE_TTL_DAYS})')
+    parser.add_argument('--negative-ttl-days', type=float, default=DEFAULT_NEGATIVE_TTL_DAYS,
+                        help='Dagen dat onvindbare plaatsnamen niet opnieuw worden opgevraagd, 0 = uit '
+                             f'(standaard: {DEFAULT_NEGATIVE_TTL_DAYS})')
+    parser.add_argument('--no-cache', action='store_true', help='Afstandscache uitschakelen')
+    parser.add_argument('--no-prefetch', action='store_true',
+                        help='Afstanden niet vooraf per startadres ophalen')
+    parser.add_argument('--matrix', type=str, metavar='MAP',
+                        help='Vooraf berekende afstandsmatrix delen tussen alle processen '
+                             '(gemaakt met precompute_matrix.py)')
+    parser.add_argument('--distance-provider', choices=['google', 'offline', 'replay'], default='google',
+                        help='Bron van afstanden (standaard: google)')
+    parser.add_argument('--detour-factor', type=float,
+                        help='Omrijfactor voor offline schattingen (standaard: 1.3)')
+    parser.add_argument('--replay-fixture', type=str, metavar='FIXTURE',
+                        help='Opgenomen antwoorden afspelen (met --distance-provider replay)')
+    parser.add_argument('--replay-latency', type=float, default=0.0,
+                        help='Gesimuleerde vertraging per verzoek in seconden bij afspelen (standaard: 0)')
+    parser.add_argument('--max-trips-per-day', type=int, default=DEFAULT_MAX_TRIPS_PER_DAY,
+                        help=f'Maximaal aantal ritten per dag (standaard: {DEFAULT_MAX_TRIPS_PER_DAY})')
+    parser.add_argument('--weekdays-only', action='store_true', help='Alleen ritten op werkdagen (ma-vr)')
+    parser.add_argument('--skip-holidays', action='store_true', help='Geen ritten op Nederlandse feestdagen')
+    parser.add_argument('--blackout', action='append', metavar='DD-MM-YYYY[:DD-MM-YYYY]',
+                        help='Datum of periode zonder ritten (meerdere keren te gebruiken)')
+    parser.add_argument('--planner', choices=['greedy', 'optimal'], default='greedy',
+                        help='Manier van ritten kiezen (standaard: greedy)')
+    parser.add_argument('--workers', type=int, default=DEFAULT_MAX_WORKERS,
+                        help=f'Maximaal aantal gelijktijdige API-verzoeken per proces (standaard: {DEFAULT_MAX_WORKERS})')
+    parser.add_argument('--api-budget', type=int, metavar='ELEMENTEN',
+                        help='Maximaal aantal API-elementen voor de hele batch; daarna alleen gecachte '
+                             'afstanden gebruiken (standaard: onbeperkt)')
+    parser.add_argument('--max-qps', type=float, default=DEFAULT_MAX_QPS,
+                        help=f'Maximaal aantal API-verzoeken per seconde, verdeeld over de processen '
+                             f'(standaard: {DEFAULT_MAX_QPS})')
+    parser.add_argument('--max-elements-per-second', type=float, default=DEFAULT_MAX_ELEMENTS_PER_SECOND,
+                        help=f'Maximaal aantal API-elementen per seconde, verdeeld over de processen '
+                             f'(standaard: {DEFAULT_MAX_ELEMENTS_PER_SECOND})')
+    parser.add_argument('--no-geocode', action='store_true',
+                        help='Adressen niet geocoderen (afstanden opvragen met de adrestekst)')
+
+    args = parser.parse_args()
+
+    configure_logging(args.log_format, quiet=args.quiet)
+    load_env_file()
+
+    if args.distance_provider == 'replay' and not args.replay_fixture:
+        parser.error('--distance-provider replay vereist --replay-fixture')
+    if args.max_trips_per_day < 1:
+        parser.error('--max-trips-per-day moet minimaal 1 zijn')
+    if args.processes is not None and args.processes < 1:
+        parser.error('--processes moet minimaal 1 zijn')
+    if args.api_budget is not None and args.api_budget < 0:
+        parser.error('--api-budget mag niet negatief zijn')
+    if args.max_qps <= 0 or args.max_elements_per_second <= 0:
+        parser.error('--max-qps en --max-elements-per-second moeten groter dan 0 zijn')
+    try:
+        blackout_dates = parse_date_ranges(args.blackout)
+    except ValueError as e:
+        parser.error(f'--blackout: {e}')
+    try:
+        jobs = load_manifest(args.manifest, args.format)
+    except (OSError, ValueError) as e:
+        parser.error(f'takenlijst: {e}')
+    if not jobs:
+        parser.error('takenlijst bevat geen taken')
+    if args.matrix:
+        try:
+            _open_matrix({"matrix": args.matrix})
+        except (OSError, ValueError) as e:
+            parser.error(f'--matrix: {e}')
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    options = {
+        "google_api_key": args.google_api_key,
+        "cache_path": args.cache_path,
+        "cache_ttl_days": args.cache_ttl_days,
+        "negative_ttl_days": args.negative_ttl_days,
+        "no_cache": args.no_cache,
+        "prefetch": not args.no_prefetch,
+        "distance_provider": args.distance_provider,
+        "detour_factor": args.detour_factor,
+        "replay_fixture": args.replay_fixture,
+        "replay_latency": args.replay_latency,
+        "max_trips_per_day": args.max_trips_per_day,
+        "weekdays_only": args.weekdays_only,
+        "skip_holidays": args.skip_holidays,
+        "blackout_dates": blackout_dates,
+        "planner": args.planner,
+        "workers": args.workers,
+        "output_dir": args.output_dir,
+        "format": args.format,
+        "log_format": args.log_format,
+        "quiet": args.quiet,
+        "matrix": args.matrix,
+        "api_budget": args.api_budget,
+        "max_qps": args.max_qps,
+        "max_elements_per_second": args.max_elements_per_second,
+        "geocode": not args.no_geocode,
+    }
+
+    processes = min(args.processes or 1, len(jobs))
+    log_event(log, logging.INFO, "batch_started",
+              f"📦 {len(jobs)} taken uit {args.manifest}, {processes} processen\n" + "-" * 50,
+              manifest=args.manifest, jobs=len(jobs), processes=processes)
+
+    started = time.perf_counter()
+    combined = os.path.join(args.output_dir, args.combined) if args.combined else None
+    counter = multiprocessing.Value("q", 0)
+    results = run_batch(jobs, options, processes=processes, combined=combined, verbose=args.verbose,
+                        counter=counter)
+
+    failed = [result for result in results if result["error"]]
+    api_calls = sum(result['api_calls'] for result in results)
+    budget = f"/{args.api_budget}" if args.api_budget is not None else ""
+    log_event(summary_log, logging.INFO, "batch_finished",
+              "-" * 50 + f"\n🏁 {len(results) - len(failed)}/{len(results)} taken voltooid in "
+              f"{time.perf_counter() - started:.1f}s, {api_calls} API-verzoeken in de processen, "
+              f"{counter.value}{budget} API-elementen",
+              jobs=len(results), failed=len(failed), seconds=round(time.perf_counter() - started, 3),
+              api_calls=api_calls, api_elements=counter.value, api_budget=args.api_budget)
+    if failed:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+启动时间基准测试
+在全新的 Python 进程中测量导入模块和运行 --help 的耗时，可设置上限用于持续检查冷启动
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+# 项目根目录（本文件位于 benchmarks/ 下）
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 测量目标：名称 -> 命令参数
+TARGETS = {
+    "import trip_generator": ["-c", "import trip_generator"],
+    "trip_generator.py --help": ["trip_generator.py", "--help"],
+    "batch_generate.py --help": ["batch_generate.py", "--help"],
+}
+
+
+def measure(arguments, repeat: int):
+    """运行 repeat 次，返回每次的耗时（毫秒）"""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        subprocess.run([sys.executable] + arguments, cwd=REPO_ROOT, check=True,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+
+def import_breakdown(module: str, top: int):
+    """用 -X importtime 列出累计耗时最多的模块 [(毫秒, 模块名), ...]"""
+    completed = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                               cwd=REPO_ROOT, check=True, capture_output=True, text=True)
+    entries = []
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        entries.append((int(cumulative) / 1000, name.strip()))
+    return sorted(entries, reverse=True)[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Opstarttijd meten in nieuwe Python-processen")
+    parser.add_argument('--repeat', type=int, default=10, help='Aantal metingen per doel (standaard: 10)')
+    parser.add_argument('--max-ms', type=float,
+                        help='Mislukt als de mediaan van een doel boven deze grens (ms) ligt')
+    parser.add_argument('--breakdown', type=int, default=0, metavar='N',
+                        help='De N traagste imports van trip_generator tonen')
+    args = parser.parse_args()
+
+    # 空进程的启动耗时作为参考
+    baseline = statistics.median(measure(["-c", "pass"], args.repeat))
+    print(f"🐍 Lege interpreter: {baseline:.1f}ms")
+
+    failed = []
+    for name, arguments in TARGETS.items():
+        # 预热一次，使 .pyc 和文件系统缓存就绪
+        measure(arguments, 1)
+        timings = measure(arguments, args.repeat)
+        median = statistics.median(timings)
+        print(f"⏱️  {name}: mediaan {median:.1f}ms, min {min(timings):.1f}ms "
+              f"(+{median - baseline:.1f}ms boven lege interpreter)")
+        if args.max_ms is not None and median > args.max_ms:
+            failed.append(name)
+
+    if args.breakdown:
+        print(f"\n📦 Traagste imports:")
+        for cumulative, module in import_breakdown("trip_generator", args.breakdown):
+            print(f"   {cumulative:7.1f}ms  {module}")
+
+    if failed:
+        print(f"\n❌ Boven {args.max_ms}ms: {', '.join(failed)}")
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
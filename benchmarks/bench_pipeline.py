@@ -0,0 +1,394 @@
+#!/usr/bin/env python3
+"""
+生成流程基准测试
+使用进程内的假距离提供者驱动 TripGenerator，扫描目标公里数、日历饱和度和城市表规模，
+报告吞吐量和内存峰值，并与保存的基线比较，性能退化时以非零状态退出。
+每个测量都与同一进程中交替运行的固定校准负载比较，基线可以在其他机器上和负载不同时使用
+"""
+
+import argparse
+import gc
+import hashlib
+import json
+import math
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from contextlib import redirect_stdout
+from datetime import date
+
+# 项目根目录（本文件位于 benchmarks/ 下）
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from city_registry import CityRegistry, CityUsage  # noqa: E402
+from distance_providers import DistanceProvider  # noqa: E402
+from run_logging import configure_logging  # noqa: E402
+from trip_calendar import TripCalendar  # noqa: E402
+from trip_generator import TripGenerator  # noqa: E402
+from trip_store import TripStore  # noqa: E402
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+# 扫描参数
+TARGETS_KM = (1_000, 10_000, 50_000, 100_000, 500_000)
+SATURATIONS = (0.5, 0.9, 1.0)
+GAZETTEER_SIZES = (500, 5_000, 50_000)
+EXPORT_ROWS = (1_000, 10_000, 50_000)
+
+# 快速模式（--quick）使用的较小扫描
+QUICK_TARGETS_KM = (1_000, 50_000, 500_000)
+QUICK_SATURATIONS = (0.9,)
+QUICK_GAZETTEER_SIZES = (500, 5_000)
+QUICK_EXPORT_ROWS = (1_000, 10_000)
+
+# 目标扫描和日历扫描使用的城市表规模
+DEFAULT_GAZETTEER_SIZE = 5_000
+
+# 假距离：单程 5-450 公里均匀分布，即来回 10-900 公里
+MIN_ONE_WAY_M = 5_000
+MAX_ONE_WAY_M = 450_000
+
+# 按 40%/40%/20% 公里数配额，每公里目标预期需要的行程数（短途/中途/长途平均来回 80/225/600 公里）
+TRIPS_PER_KM = 0.4 / 80 + 0.4 / 225 + 0.2 / 600
+
+# 一个季度的天数（用于按饱和度计算每日上限）
+QUARTER_DAYS = 90
+
+# 校准负载的规模（每次计时前运行一次，约几十毫秒）
+CALIBRATION_SIZE = 50_000
+
+# 内存峰值的噪声下限：低于此差值的内存增加不算退化
+MIN_PEAK_KIB = 256
+
+
+class FakeDistanceProvider(DistanceProvider):
+    """确定性的进程内距离提供者：距离由起点和目的地名称的哈希决定，不限制请求大小"""
+
+    name = "fake"
+    max_origins_per_request = None
+    max_destinations_per_request = None
+    max_elements_per_request = None
+
+    def distance_matrix(self, origins, destinations, mode="driving", units="metric", avoid=None):
+        rows = []
+        for origin in origins:
+            elements = []
+            for destination in destinations:
+                digest = hashlib.blake2b(f"{origin}|{destination}".encode(), digest_size=8).digest()
+                meters = MIN_ONE_WAY_M + int.from_bytes(digest, "big") % (MAX_ONE_WAY_M - MIN_ONE_WAY_M)
+                elements.append({
+                    "status": "OK",
+                    "distance": {"value": meters, "text": f"{meters / 1000:.1f} km"},
+                    "duration": {"value": meters // 22, "text": f"{meters // 1320} mins"},
+                })
+            rows.append({"elements": elements})
+        return {"status": "OK", "origin_addresses": list(origins),
+                "destination_addresses": list(destinations), "rows": rows}
+
+
+class BenchTripGenerator(TripGenerator):
+    """只使用合成城市表的生成器（不加入内置首选城市）"""
+
+    def _preferred_cities(self, distance_type):
+        return []
+
+    def _address_variants(self, destination):
+        return [destination]
+
+
+class _NullWriter:
+    """丢弃生成器的控制台输出，避免终端输出影响计时"""
+
+    def write(self, text):
+        return len(text)
+
+    def flush(self):
+        pass
+
+
+def synthetic_registry(size: int) -> CityRegistry:
+    return CityRegistry({"Benchmark": [f"Plaats {i:06d}" for i in range(size)]})
+
+
+def max_trips_per_day(target_km: int, saturation: float) -> int:
+    """按预期行程数和日历饱和度（预期行程数 / 日历容量）计算每日上限"""
+    expected_trips = target_km * TRIPS_PER_KM
+    return max(1, math.ceil(expected_trips / (QUARTER_DAYS * saturation)))
+
+
+def make_generator(target_km: int, registry: CityRegistry, per_day: int, planner: str = "greedy",
+                   seed: int = 1) -> TripGenerator:
+    with redirect_stdout(_NullWriter()):
+        return BenchTripGenerator(2025, 1, target_km, "Benchmark", provider=FakeDistanceProvider(),
+                                  max_trips_per_day=per_day, planner=planner, registry=registry, seed=seed)
+
+
+def _calibration_workload():
+    """与生成流程类似的纯 Python 负载：随机数、字典计数、排序和字符串格式化"""
+    rng = random.Random(0)
+    counts = {}
+    values = []
+    for i in range(CALIBRATION_SIZE):
+        value = rng.randint(10, 900)
+        key = f"Plaats {value % 5000:06d}"
+        counts[key] = counts.get(key, 0) + 1
+        values.append((value, i))
+    values.sort()
+    return len(counts)
+
+
+def measure(function, repeat: int = 1):
+    """先多次计时取最小值（中位数与最小值之差作为噪声，不受第一次预热等个别离群值影响），
+    每次计时前运行一次校准负载（同样取最小值），再在 tracemalloc 下运行一次测量内存峰值
+
+    返回 (耗时, 噪声, 校准耗时, 内存峰值 KiB, 结果)；机器速度在运行期间变化时，耗时和校准耗时一起变化。
+    """
+    timings = []
+    calibrations = []
+    result = None
+    for _ in range(repeat):
+        gc.collect()
+        started = time.perf_counter()
+        _calibration_workload()
+        calibrations.append(time.perf_counter() - started)
+        gc.collect()
+        started = time.perf_counter()
+        result = function()
+        timings.append(time.perf_counter() - started)
+
+    gc.collect()
+    tracemalloc.start()
+    function()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return min(timings), statistics.median(timings) - min(timings), min(calibrations), peak / 1024, result
+
+
+def bench_generate(target_km: int, saturation: float, gazetteer_size: int, planner: str, repeat: int) -> dict:
+    registry = synthetic_registry(gazetteer_size)
+    per_day = max_trips_per_day(target_km, saturation)
+
+    def run():
+        generator = make_generator(target_km, registry, per_day, planner)
+        with redirect_stdout(_NullWriter()):
+            return generator.generate_trips()
+
+    seconds, noise, calibration, peak_kib, trips = measure(run, repeat)
+    total_km = sum(trip["total_distance"] for trip in trips)
+    return {
+        "name": f"generate[{planner}] target={target_km} saturation={saturation} gazetteer={gazetteer_size}",
+        "seconds": seconds,
+        "noise_seconds": noise,
+        "calibration_seconds": calibration,
+        "peak_kib": peak_kib,
+        "trips": len(trips),
+        "total_km": total_km,
+        "trips_per_second": len(trips) / seconds if seconds else None,
+    }
+
+
+def bench_selection(gazetteer_size: int, calls: int, repeat: int) -> dict:
+    registry = synthetic_registry(gazetteer_size)
+    generator = make_generator(10_000, registry, 2)
+    with redirect_stdout(_NullWriter()):
+        generator.prefetch_distances()
+        generator.build_distance_index()
+    usage = CityUsage(registry)
+    types = ("short", "medium", "long")
+
+    def run():
+        for i in range(calls):
+            generator._select_destination_by_distance_type(types[i % 3], usage)
+
+    seconds, noise, calibration, peak_kib, _ = measure(run, repeat)
+    return {
+        "name": f"select_destination gazetteer={gazetteer_size}",
+        "seconds": seconds,
+        "noise_seconds": noise,
+        "calibration_seconds": calibration,
+        "peak_kib": peak_kib,
+        "calls_per_second": calls / seconds if seconds else None,
+    }
+
+
+def bench_date_sampling(saturation: float, calls: int, repeat: int) -> dict:
+    """在已按饱和度占用的日历上抽样日期"""
+    generator = make_generator(10_000, synthetic_registry(10), 2)
+    calendar = TripCalendar(date(2025, 1, 1), date(2025, 3, 31), max_trips_per_day=2, rng=random.Random(1))
+    for _ in range(int(calendar.remaining_capacity() * min(saturation, 0.99))):
+        calendar.book(calendar.sample())
+
+    def run():
+        for _ in range(calls):
+            generator._generate_valid_date(calendar)
+
+    seconds, noise, calibration, peak_kib, _ = measure(run, repeat)
+    return {
+        "name": f"generate_valid_date saturation={saturation}",
+        "seconds": seconds,
+        "noise_seconds": noise,
+        "calibration_seconds": calibration,
+        "peak_kib": peak_kib,
+        "calls_per_second": calls / seconds if seconds else None,
+    }
+
+
+def bench_export(rows: int, directory: str, repeat: int) -> dict:
+    generator = make_generator(10_000, synthetic_registry(10), 2)
+    rng = random.Random(rows)
+    generator.trips = TripStore()
+    for _ in range(rows):
+        day = rng.randint(1, 28)
+        generator.trips.add(date(2025, rng.randint(1, 3), day), f"Plaats {rng.randrange(50_000):06d}",
+                            rng.randint(10, 900))
+    filename = os.path.join(directory, f"bench_{rows}.xlsx")
+
+    def run():
+        with redirect_stdout(_NullWriter()):
+            generator.export_to_excel(filename)
+
+    seconds, noise, calibration, peak_kib, _ = measure(run, repeat)
+    return {
+        "name": f"export_to_excel rows={rows}",
+        "seconds": seconds,
+        "noise_seconds": noise,
+        "calibration_seconds": calibration,
+        "peak_kib": peak_kib,
+        "rows_per_second": rows / seconds if seconds else None,
+    }
+
+
+def run_suite(quick: bool, repeat: int, planners) -> list:
+    targets = QUICK_TARGETS_KM if quick else TARGETS_KM
+    saturations = QUICK_SATURATIONS if quick else SATURATIONS
+    gazetteer_sizes = QUICK_GAZETTEER_SIZES if quick else GAZETTEER_SIZES
+    export_rows = QUICK_EXPORT_ROWS if quick else EXPORT_ROWS
+
+    results = []
+
+    def record(result):
+        results.append(result)
+        throughput = next((f"{result[key]:,.0f} {key.replace('_per_second', '')}/s"
+                           for key in ("trips_per_second", "calls_per_second", "rows_per_second")
+                           if result.get(key)), "")
+        print(f"⏱️  {result['name']}: {result['seconds'] * 1000:.1f}ms, "
+              f"piek {result['peak_kib']:,.0f} KiB {throughput}")
+
+    for planner in planners:
+        for target_km in targets:
+            for saturation in saturations:
+                record(bench_generate(target_km, saturation, DEFAULT_GAZETTEER_SIZE, planner, repeat))
+        for size in gazetteer_sizes:
+            record(bench_generate(50_000, 0.9, size, planner, repeat))
+
+    for size in gazetteer_sizes:
+        record(bench_selection(size, 20_000, repeat))
+    for saturation in saturations:
+        record(bench_date_sampling(saturation, 20_000, repeat))
+    with tempfile.TemporaryDirectory() as directory:
+        for rows in export_rows:
+            record(bench_export(rows, directory, repeat))
+    return results
+
+
+def machine_scale(result: dict, before: dict) -> float:
+    """本次与基线测量时的机器速度之比（各自校准负载耗时之比）；任一方没有校准值时为 1"""
+    if result.get("calibration_seconds") and before.get("calibration_seconds"):
+        return result["calibration_seconds"] / before["calibration_seconds"]
+    return 1.0
+
+
+def compare(results: list, baseline: dict, tolerance: float, min_seconds: float) -> list:
+    """返回比基线慢或内存峰值更高（超过容差）的结果，每项为 (结果, 基线, 机器速度之比)
+
+    基线耗时先乘以该测量的机器速度之比；超出部分还必须大于噪声下限
+    （min_seconds 同样按速度之比换算，以及本次和基线各次计时之间的差距），才算退化。
+    """
+    previous = {result["name"]: result for result in baseline.get("results", [])}
+    regressions = []
+    for result in results:
+        before = previous.get(result["name"])
+        if before is None:
+            continue
+        scale = machine_scale(result, before)
+        expected = before["seconds"] * scale
+        noise = max(min_seconds * scale, result.get("noise_seconds", 0.0),
+                    before.get("noise_seconds", 0.0) * scale)
+        slower = result["seconds"] > expected * (1 + tolerance) and result["seconds"] - expected > noise
+        heavier = (result["peak_kib"] > before["peak_kib"] * (1 + tolerance)
+                   and result["peak_kib"] - before["peak_kib"] > MIN_PEAK_KIB)
+        if slower or heavier:
+            regressions.append((result, before, scale))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark van het genereren van reisverslagen")
+    parser.add_argument('--quick', action='store_true', help='Kleinere reeks metingen')
+    parser.add_argument('--repeat', type=int, default=5, help='Aantal tijdmetingen per geval, de snelste telt (standaard: 5)')
+    parser.add_argument('--planner', choices=['greedy', 'optimal', 'both'], default='both',
+                        help='Welke planner(s) meten (standaard: both)')
+    parser.add_argument('--baseline', type=str, default=DEFAULT_BASELINE,
+                        help='Bestand met basiswaarden (standaard: benchmarks/baseline.json)')
+    parser.add_argument('--save-baseline', action='store_true',
+                        help='Resultaten opslaan als nieuwe basiswaarden in plaats van vergelijken')
+    parser.add_argument('--tolerance', type=float, default=0.5,
+                        help='Toegestane verslechtering t.o.v. de basis (standaard: 0.5 = 50%%)')
+    parser.add_argument('--min-seconds', type=float, default=0.05,
+                        help='Tijdsverschillen kleiner dan dit (op de basismachine) tellen niet als verslechtering '
+                             '(standaard: 0.05)')
+    parser.add_argument('--output', type=str, help='Resultaten ook als JSON opslaan')
+    args = parser.parse_args()
+
+    # 按生产运行的 --quiet 输出计时，只测量生成流程本身
+    configure_logging("text", quiet=True)
+
+    planners = ('greedy', 'optimal') if args.planner == 'both' else (args.planner,)
+    results = run_suite(args.quick, max(1, args.repeat), planners)
+    report = {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "quick": args.quick,
+        "results": results,
+    }
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\n💾 Basiswaarden opgeslagen: {args.baseline}")
+        return
+
+    if not os.path.exists(args.baseline):
+        print(f"\n⚠️  Geen basiswaarden gevonden ({args.baseline}); gebruik --save-baseline")
+        return
+
+    with open(args.baseline, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    regressions = compare(results, baseline, args.tolerance, args.min_seconds)
+    previous = {result["name"]: result for result in baseline.get("results", [])}
+    scales = [machine_scale(result, previous[result["name"]]) for result in results if result["name"] in previous]
+    speed = f" (deze machine: {statistics.median(scales):.2f}x de tijd van de basismachine)" if scales else ""
+    if not regressions:
+        print(f"\n✅ Geen verslechtering t.o.v. {args.baseline}{speed}")
+        return
+
+    print(f"\n❌ {len(regressions)} verslechtering(en) t.o.v. {args.baseline}{speed}:")
+    for result, before, scale in regressions:
+        print(f"   {result['name']}: {before['seconds'] * scale * 1000:.1f}ms (herschaald) -> "
+              f"{result['seconds'] * 1000:.1f}ms, "
+              f"piek {before['peak_kib']:,.0f} -> {result['peak_kib']:,.0f} KiB")
+    raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
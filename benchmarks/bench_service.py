@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+生成服务基准测试
+在进程内启动 trip_service，距离来自带固定延迟的本地替身提供者，
+分别测量冷起点、重复起点和并发重复起点请求的延迟分布，可设置重复起点 p50 的上限
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import statistics
+import sys
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+# 项目根目录（本文件位于 benchmarks/ 下）
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from bench_pipeline import FakeDistanceProvider  # noqa: E402
+from run_logging import configure_logging, summary_log  # noqa: E402
+from trip_service import TripService  # noqa: E402
+
+# 冷起点请求使用的起点（每个只请求一次）
+COLD_ORIGINS = ("Duiven", "Utrecht", "Zwolle", "Breda", "Assen")
+
+
+class SlowDistanceProvider(FakeDistanceProvider):
+    """替身距离后端：与 FakeDistanceProvider 相同的确定性距离，每个请求额外等待 latency 秒"""
+
+    name = "stand-in"
+
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.requests = 0
+
+    def distance_matrix(self, origins, destinations, mode="driving", units="metric", avoid=None):
+        self.requests += 1
+        time.sleep(self.latency)
+        return super().distance_matrix(origins, destinations, mode, units, avoid)
+
+
+def start_service(service: TripService):
+    """在后台线程的事件循环中启动服务，返回 (事件循环, 端口)"""
+    loop = asyncio.new_event_loop()
+    started = threading.Event()
+    state = {}
+
+    async def run():
+        server = await service.start("127.0.0.1", 0)
+        state["port"] = server.sockets[0].getsockname()[1]
+        started.set()
+        async with server:
+            await server.serve_forever()
+
+    threading.Thread(target=loop.run_until_complete, args=(run(),), daemon=True).start()
+    started.wait()
+    return loop, state["port"]
+
+
+def request_report(port: int, payload: dict) -> float:
+    """请求一份报告并读完响应，返回耗时（毫秒）"""
+    body = json.dumps(payload).encode("utf-8")
+    request = urllib.request.Request(f"http://127.0.0.1:{port}/generate", data=body,
+                                     headers={"Content-Type": "application/json"})
+    started = time.perf_counter()
+    with urllib.request.urlopen(request) as response:
+        response.read()
+    return (time.perf_counter() - started) * 1000
+
+
+def percentiles(timings) -> str:
+    ordered = sorted(timings)
+    p95 = ordered[min(len(ordered) - 1, int(round(0.95 * (len(ordered) - 1))))]
+    return f"p50 {statistics.median(ordered):.1f}ms, p95 {p95:.1f}ms, max {ordered[-1]:.1f}ms"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Latentie van de reisverslag-service meten")
+    parser.add_argument('--requests', type=int, default=30,
+                        help='Aantal verzoeken voor dezelfde startlocatie (standaard: 30)')
+    parser.add_argument('--concurrency', type=int, default=4,
+                        help='Gelijktijdige verzoeken in de parallelle meting (standaard: 4)')
+    parser.add_argument('--latency', type=float, default=0.05,
+                        help='Gesimuleerde vertraging per afstandsverzoek in seconden (standaard: 0.05)')
+    parser.add_argument('--target-km', type=int, default=5000, help='Doelafstand per rapport (standaard: 5000)')
+    parser.add_argument('--format', choices=['xlsx', 'csv', 'json'], default='xlsx',
+                        help='Exportformaat van de rapporten (standaard: xlsx)')
+    parser.add_argument('--max-warm-p50-ms', type=float,
+                        help='Mislukt als de mediaan voor een herhaalde startlocatie boven deze grens (ms) ligt')
+    args = parser.parse_args()
+
+    # 与服务默认一致：只保留警告，生成输出不影响计时
+    configure_logging("text", quiet=True, progress=False)
+    summary_log.setLevel(logging.WARNING)
+
+    provider = SlowDistanceProvider(args.latency)
+    service = TripService(provider, cache=None, threads=max(1, args.concurrency))
+    _, port = start_service(service)
+
+    def payload(address):
+        return {"year": 2025, "quarter": 1, "target_km": args.target_km, "address": address, "format": args.format}
+
+    cold = [request_report(port, payload(origin)) for origin in COLD_ORIGINS]
+    print(f"🧊 Nieuwe startlocatie ({len(cold)}x, {provider.requests} afstandsverzoeken): {percentiles(cold)}")
+
+    before = provider.requests
+    warm = [request_report(port, payload(COLD_ORIGINS[0])) for _ in range(args.requests)]
+    print(f"🔥 Herhaalde startlocatie ({len(warm)}x, {provider.requests - before} afstandsverzoeken): "
+          f"{percentiles(warm)}")
+
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        started = time.perf_counter()
+        parallel = list(pool.map(lambda _: request_report(port, payload(COLD_ORIGINS[0])), range(args.requests)))
+        elapsed = time.perf_counter() - started
+    print(f"🔀 Parallel ({args.concurrency} tegelijk, {len(parallel)}x): {percentiles(parallel)}, "
+          f"{len(parallel) / elapsed:.1f} rapporten/s")
+
+    if args.max_warm_p50_ms is not None and statistics.median(warm) > args.max_warm_p50_ms:
+        print(f"\n❌ Mediaan voor herhaalde startlocatie boven {args.max_warm_p50_ms}ms")
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
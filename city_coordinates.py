@@ -0,0 +1,191 @@
+"""
+城市坐标表
+DUTCH_CITIES 中每个城市/村庄的大致经纬度（WGS84），用于离线估算距离
+"""
+
+# 城市名 -> (纬度, 经度)；比利时城市与 DUTCH_CITIES 一致带 " BE" 标识
+CITY_COORDINATES = {
+    # 荷兰主要城市
+    "Amsterdam": (52.3676, 4.9041), "Rotterdam": (51.9244, 4.4777), "Den Haag": (52.0705, 4.3007),
+    "Utrecht": (52.0907, 5.1214), "Eindhoven": (51.4416, 5.4697), "Tilburg": (51.5555, 5.0913),
+    "Groningen": (53.2194, 6.5665), "Almere": (52.3508, 5.2647), "Breda": (51.5719, 4.7683),
+    "Nijmegen": (51.8126, 5.8372), "Enschede": (52.2215, 6.8937), "Haarlem": (52.3874, 4.6462),
+    "Arnhem": (51.9851, 5.8987), "Zaanstad": (52.4531, 4.8136), "Amersfoort": (52.1561, 5.3878),
+    "Apeldoorn": (52.2112, 5.9699), "Den Bosch": (51.6978, 5.3037), "Hoofddorp": (52.3061, 4.6907),
+    "Maastricht": (50.8514, 5.6910), "Leiden": (52.1601, 4.4970), "Dordrecht": (51.8133, 4.6901),
+    "Zoetermeer": (52.0607, 4.4940), "Zwolle": (52.5168, 6.0830), "Deventer": (52.2550, 6.1639),
+    "Delft": (52.0116, 4.3571), "Alkmaar": (52.6324, 4.7534), "Leeuwarden": (53.2012, 5.7999),
+    "Venlo": (51.3704, 6.1724), "Hilversum": (52.2292, 5.1669), "Heerlen": (50.8882, 5.9795),
+    "Purmerend": (52.5050, 4.9597), "Roosendaal": (51.5308, 4.4653), "Schiedam": (51.9192, 4.3886),
+    "Spijkenisse": (51.8450, 4.3297), "Alphen aan den Rijn": (52.1290, 4.6557), "Gouda": (52.0115, 4.7105),
+    "Vlaardingen": (51.9125, 4.3419), "Zeist": (52.0893, 5.2333), "Katwijk": (52.2004, 4.4166),
+    "Nieuwegein": (52.0292, 5.0805), "Lelystad": (52.5185, 5.4714), "Oosterhout": (51.6451, 4.8597),
+    "Emmen": (52.7858, 6.8976), "Veenendaal": (52.0286, 5.5589), "Helmond": (51.4793, 5.6570),
+    "De Bilt": (52.1099, 5.1812), "Capelle aan den IJssel": (51.9292, 4.5778),
+    "Bergen op Zoom": (51.4946, 4.2872), "Roermond": (51.1942, 5.9870), "Oss": (51.7650, 5.5180),
+    "Leidschendam": (52.0833, 4.3917), "Voorschoten": (52.1275, 4.4486), "Hoorn": (52.6424, 5.0602),
+    "Vlissingen": (51.4426, 3.5736), "Ridderkerk": (51.8725, 4.6028), "Barendrecht": (51.8567, 4.5344),
+    "Hendrik-Ido-Ambacht": (51.8442, 4.6403), "Papendrecht": (51.8317, 4.6875),
+    "Sliedrecht": (51.8217, 4.7736), "Gorinchem": (51.8306, 4.9742), "Vianen": (51.9925, 5.0917),
+    "Nieuwkoop": (52.1500, 4.7764), "Bodegraven": (52.0825, 4.7500), "Woerden": (52.0853, 4.8833),
+    "Montfoort": (52.0458, 4.9525), "IJsselstein": (52.0200, 5.0428), "Kamerik": (52.1117, 4.8900),
+    "Harmelen": (52.0900, 4.9625), "Ter Aar": (52.1742, 4.7125), "Boskoop": (52.0750, 4.6556),
+    "Waddinxveen": (52.0450, 4.6517), "Zoeterwoude": (52.1186, 4.4958), "Leiderdorp": (52.1583, 4.5292),
+    "Oegstgeest": (52.1800, 4.4694), "Voorhout": (52.2217, 4.4850), "Sassenheim": (52.2250, 4.5222),
+    "Hillegom": (52.2908, 4.5833), "Lisse": (52.2575, 4.5569), "Teylingen": (52.2167, 4.5167),
+    "Noordwijk": (52.2403, 4.4464), "Noordwijkerhout": (52.2617, 4.4933), "De Zilk": (52.2983, 4.5433),
+    "Bennebroek": (52.3208, 4.5986), "Heemstede": (52.3500, 4.6222), "Zandvoort": (52.3713, 4.5331),
+    "Bloemendaal": (52.4033, 4.6225), "Beverwijk": (52.4833, 4.6569), "Heemskerk": (52.5108, 4.6717),
+    "Castricum": (52.5483, 4.6694), "Uitgeest": (52.5292, 4.7097), "Akersloot": (52.5633, 4.7367),
+    "Limmen": (52.5700, 4.6958), "Heiloo": (52.6000, 4.7000), "Bergen": (52.6692, 4.7042),
+    "Schagen": (52.7875, 4.7986), "Heerhugowaard": (52.6700, 4.8333), "Langedijk": (52.6933, 4.7942),
+    "Graft-De Rijp": (52.5567, 4.8400), "Schermer": (52.6000, 4.9000), "Koggenland": (52.6417, 4.9500),
+    "Drechterland": (52.6667, 5.1667), "Stede Broec": (52.7000, 5.2333), "Enkhuizen": (52.7033, 5.2917),
+    "Medemblik": (52.7714, 5.1056), "Opmeer": (52.7058, 4.9458), "Hollands Kroon": (52.8833, 4.9833),
+    "Rijswijk": (52.0363, 4.3250), "Wassenaar": (52.1425, 4.4017),
+
+    # Duiven及其周边地区 (Gelderland东部)
+    "Duiven": (51.9467, 6.0153), "Westervoort": (51.9558, 5.9714), "Zevenaar": (51.9300, 6.0708),
+    "Didam": (51.9408, 6.1317), "Wehl": (51.9617, 6.2100), "Doesburg": (52.0125, 6.1389),
+    "Doetinchem": (51.9650, 6.2889), "Angerlo": (51.9867, 6.1358), "Babberich": (51.9067, 6.1142),
+    "Giesbeek": (51.9933, 6.0667), "Lathum": (51.9883, 6.0233), "Loo": (51.9367, 6.0414),
+    "Groessen": (51.9317, 6.0375), "Pannerden": (51.8933, 6.0383), "Angeren": (51.9125, 5.9425),
+    "Huissen": (51.9367, 5.9397), "Bemmel": (51.8917, 5.8972), "Elst": (51.9192, 5.8478),
+    "Slijk-Ewijk": (51.8875, 5.7933), "Driel": (51.9625, 5.8147), "Heteren": (51.9567, 5.7558),
+    "Valburg": (51.9133, 5.7900), "Zetten": (51.9283, 5.7139), "Hemmen": (51.9183, 5.6933),
+    "Dodewaard": (51.9142, 5.6506), "Opheusden": (51.9317, 5.6339), "Kesteren": (51.9342, 5.5694),
+    "Rhenen": (51.9592, 5.5681), "Wageningen": (51.9692, 5.6654), "Bennekom": (52.0008, 5.6758),
+    "Ede": (52.0333, 5.6583), "Renswoude": (52.0733, 5.5394), "Woudenberg": (52.0808, 5.4169),
+    "Scherpenzeel": (52.0800, 5.4889), "Barneveld": (52.1400, 5.5847), "Voorthuizen": (52.1858, 5.6058),
+    "Kootwijkerbroek": (52.1517, 5.6694), "Garderen": (52.2317, 5.7125), "Kootwijk": (52.1833, 5.7667),
+    "Radio Kootwijk": (52.1758, 5.8183), "Uddel": (52.2617, 5.7808), "Elspeet": (52.2867, 5.7875),
+    "Nunspeet": (52.3786, 5.7856), "Harderwijk": (52.3417, 5.6208), "Hierden": (52.3600, 5.6517),
+    "Putten": (52.2592, 5.6069), "Ermelo": (52.2992, 5.6200),
+    # Horst: 按所在分区取 Ermelo 附近的村庄
+    "Horst": (52.3081, 5.5944),
+    "Zutphen": (52.1383, 6.2014),
+
+    # Achterhoek地区 (Duiven东南部)
+    "Montferland": (51.9183, 6.1650), "Bergh": (51.8917, 6.2417), "Gaanderen": (51.9317, 6.3469),
+    "Terborg": (51.9200, 6.3542), "Silvolde": (51.9083, 6.3881), "Ulft": (51.8950, 6.3817),
+    "Gendringen": (51.8717, 6.3758), "Dinxperlo": (51.8608, 6.4856), "Aalten": (51.9250, 6.5806),
+    "Bredevoort": (51.9417, 6.6200), "Winterswijk": (51.9725, 6.7194), "Woold": (51.9333, 6.7500),
+    "Meddo": (52.0100, 6.6825), "Ratum": (51.9917, 6.7417), "Groenlo": (52.0417, 6.6161),
+    "Lichtenvoorde": (51.9867, 6.5658), "Harreveld": (52.0000, 6.5233), "Eibergen": (52.1000, 6.6500),
+    "Neede": (52.1342, 6.6136), "Borculo": (52.1158, 6.5206), "Ruurlo": (52.0883, 6.4500),
+    "Vorden": (52.1050, 6.3125), "Warnsveld": (52.1350, 6.2375), "Lochem": (52.1592, 6.4139),
+    "Gorssel": (52.2000, 6.2000), "Epse": (52.2250, 6.2000), "Bathmen": (52.2500, 6.2900),
+    "Holten": (52.2833, 6.4208), "Rijssen": (52.3067, 6.5194), "Wierden": (52.3592, 6.5931),
+    "Enter": (52.2933, 6.5792), "Delden": (52.2600, 6.7117), "Hengelo": (52.2658, 6.7931),
+    "Oldenzaal": (52.3133, 6.9292), "Losser": (52.2608, 7.0047), "Denekamp": (52.3792, 7.0056),
+
+    # Betuwe地区 (Duiven西南部)
+    "Lingewaard": (51.9000, 5.9167), "Gendt": (51.8767, 5.9694), "Doornenburg": (51.8900, 6.0000),
+    "Haalderen": (51.8917, 5.9333), "Leuth": (51.8283, 5.9758), "Ressen": (51.8983, 5.8683),
+    "Randwijk": (51.9383, 5.7083), "Herveld": (51.9050, 5.7417), "IJzendoorn": (51.9000, 5.5167),
+    "Ochten": (51.9100, 5.5700), "Echteld": (51.9058, 5.5083), "Lienden": (51.9483, 5.5450),
+    "Maurik": (51.9625, 5.4258), "Buren": (51.9117, 5.3342), "Kerk-Avezaath": (51.8967, 5.3783),
+    "Zoelen": (51.9150, 5.4050), "Ravenswaaij": (51.9700, 5.3800), "Tiel": (51.8861, 5.4292),
+    "Kapel-Avezaath": (51.8867, 5.3600), "Wadenoijen": (51.8667, 5.3683), "Rumpt": (51.8717, 5.1700),
+    "Geldermalsen": (51.8808, 5.2883), "Beesd": (51.8875, 5.1917), "Rhenoy": (51.8750, 5.1500),
+    "Deil": (51.8767, 5.2550), "Enspijk": (51.8750, 5.2217), "Haaften": (51.8167, 5.2133),
+    "Tuil": (51.8133, 5.1950), "Brakel": (51.8175, 5.0900), "Poederoijen": (51.8108, 5.0600),
+    "Zaltbommel": (51.8100, 5.2483),
+    # Alphen: 按所在分区取 Maasdriel 附近的 Alphen (Gelderland)
+    "Alphen": (51.8167, 5.4583),
+    "Kerkwijk": (51.7833, 5.2000), "Maasdriel": (51.7750, 5.3125), "Hedel": (51.7433, 5.2692),
+    "Ammerzoden": (51.7475, 5.2194), "Rossum": (51.8017, 5.3333), "Hurwenen": (51.8133, 5.3167),
+    "Alem": (51.7917, 5.3917), "Maren-Kessel": (51.7375, 5.3850), "Lith": (51.8050, 5.4375),
+    "Oijen": (51.8083, 5.4917), "Teeffelen": (51.8000, 5.4750),
+
+    # Veluwe地区 (Duiven北部)
+    "Rheden": (52.0125, 6.0306), "Rozendaal": (52.0067, 5.9611), "Velp": (51.9967, 5.9736),
+    "Dieren": (52.0525, 6.1000), "Laag-Soeren": (52.0717, 6.0783), "De Steeg": (52.0267, 6.0500),
+    "Ellecom": (52.0317, 6.0833), "Spankeren": (52.0450, 6.1300), "Lieren": (52.1617, 6.0117),
+    "Brummen": (52.0900, 6.1556), "Hall": (52.1058, 6.0967), "Eerbeek": (52.1058, 6.0583),
+    "Loenen": (52.1167, 6.0167), "Beekbergen": (52.1583, 5.9633), "Vorchten": (52.4250, 6.0333),
+    "Twello": (52.2367, 6.1028), "Wilp": (52.2183, 6.1483), "Teuge": (52.2433, 6.0458),
+    "Ugchelen": (52.1817, 5.9417), "Hoenderloo": (52.1175, 5.8783), "Otterlo": (52.1000, 5.7750),
+    "Renkum": (51.9767, 5.7333), "Heelsum": (51.9850, 5.7600), "Doorwerth": (51.9792, 5.7917),
+    "Oosterbeek": (51.9867, 5.8467), "Wolfheze": (52.0000, 5.7917), "Heveadorp": (51.9783, 5.8083),
+    "Herveld-Onder": (51.9017, 5.7333), "Andelst": (51.9083, 5.7306),
+
+    # 荷兰村庄 (dorpen)
+    "Volendam": (52.4950, 5.0708), "Marken": (52.4583, 5.1033), "Edam": (52.5125, 5.0486),
+    "Monnickendam": (52.4583, 5.0375), "Broek in Waterland": (52.4350, 4.9917), "Oostzaan": (52.4383, 4.8767),
+    "Wormer": (52.5000, 4.8083), "Jisp": (52.5033, 4.8483), "Neck": (52.5150, 4.9117),
+    "Westzaan": (52.4650, 4.7750), "Krommenie": (52.4997, 4.7617), "Wormerveer": (52.4917, 4.7875),
+    "Zaandijk": (52.4717, 4.8067), "Koog aan de Zaan": (52.4617, 4.8058), "Assendelft": (52.4700, 4.7467),
+    "Oostknollendam": (52.5167, 4.7867), "Watergang": (52.4233, 4.9500), "Zuiderwoude": (52.4483, 5.0000),
+    "Ransdorp": (52.3917, 4.9917), "Holysloot": (52.4017, 5.0083), "Zunderdorp": (52.4050, 4.9683),
+    "Schellingwoude": (52.3833, 4.9583), "Durgerdam": (52.3783, 4.9867), "Muiden": (52.3300, 5.0700),
+    "Muiderberg": (52.3283, 5.1217), "Weesp": (52.3075, 5.0417), "Diemen": (52.3400, 4.9625),
+    "Ouder-Amstel": (52.2917, 4.9167), "Amstelveen": (52.3080, 4.8720), "Aalsmeer": (52.2617, 4.7617),
+    "Kudelstaart": (52.2350, 4.7500), "Uithoorn": (52.2375, 4.8258), "De Kwakel": (52.2333, 4.7917),
+    "Mijdrecht": (52.2067, 4.8625), "Wilnis": (52.1967, 4.8975), "Vinkeveen": (52.2150, 4.9325),
+    "Waverveen": (52.2067, 4.9333), "Abcoude": (52.2717, 4.9700), "Baambrugge": (52.2450, 4.9883),
+    "Loenen aan de Vecht": (52.2100, 5.0233), "Breukelen": (52.1717, 5.0017), "Kockengen": (52.1483, 4.9567),
+    "Tienhoven": (52.1650, 5.0917), "Oud-Zuilen": (52.1225, 5.0717), "Zuilen": (52.1067, 5.0950),
+    "Maarssen": (52.1350, 5.0417), "Maarssenbroek": (52.1183, 5.0317), "Nieuwersluis": (52.1967, 5.0125),
+    "Loenersloot": (52.2267, 4.9900), "Portengen": (52.1767, 4.9617), "Westbroek": (52.1683, 5.1233),
+    "Hollandsche Rading": (52.1917, 5.1767), "Lage Vuursche": (52.1783, 5.2200), "Den Dolder": (52.1400, 5.2367),
+    "Huis ter Heide": (52.1167, 5.2333), "Driebergen-Rijsenburg": (52.0533, 5.2817), "Doorn": (52.0333, 5.3417),
+    "Leersum": (52.0117, 5.4300), "Maarn": (52.0633, 5.3700), "Maarsbergen": (52.0583, 5.4000),
+    "Wijk bij Duurstede": (51.9750, 5.3417), "Langbroek": (52.0000, 5.3333), "Cothen": (51.9967, 5.3100),
+    "Werkhoven": (52.0217, 5.2450), "Odijk": (52.0517, 5.2333), "Bunnik": (52.0667, 5.1983),
+    "Houten": (52.0283, 5.1681), "Lexmond": (51.9633, 5.0317), "Hagestein": (51.9800, 5.1200),
+    "Everdingen": (51.9650, 5.1367), "Zijderveld": (51.9567, 5.1050), "Schoonhoven": (51.9475, 4.8489),
+    "Haastrecht": (52.0000, 4.7767), "Vlist": (51.9917, 4.8167), "Stolwijk": (51.9717, 4.7733),
+    "Bergambacht": (51.9333, 4.7833), "Ammerstol": (51.9267, 4.8083), "Streefkerk": (51.9000, 4.7417),
+    "Liesveld": (51.9167, 4.8333), "Nieuwpoort": (51.9350, 4.8667), "Langerak": (51.9317, 4.9000),
+    "Ameide": (51.9533, 4.9633), "Acquoy": (51.8833, 5.0833), "Asperen": (51.8817, 5.1083),
+    "Heukelum": (51.8717, 5.0850), "Spijk": (51.8567, 5.0483), "Neerijnen": (51.8317, 5.2800),
+    "Ophemert": (51.8450, 5.3867), "Varik": (51.8250, 5.3750), "Heesselt": (51.8150, 5.3483),
+    "Heesch": (51.7317, 5.5267), "Nistelrode": (51.7050, 5.5633), "Dinther": (51.6467, 5.4917),
+    "Loosbroek": (51.6617, 5.5117), "Vorstenbosch": (51.6583, 5.5617),
+
+    # 荷兰南部 (Limburg)
+    "Sittard": (50.9983, 5.8689), "Geleen": (50.9742, 5.8278), "Kerkrade": (50.8658, 6.0625),
+    "Brunssum": (50.9461, 5.9706),
+
+    # 比利时弗拉芒区域 (Vlaanderen)
+    "Antwerpen BE": (51.2194, 4.4025), "Gent BE": (51.0543, 3.7174), "Brugge BE": (51.2093, 3.2247),
+    "Leuven BE": (50.8798, 4.7005), "Mechelen BE": (51.0259, 4.4776), "Aalst BE": (50.9378, 4.0403),
+    "Kortrijk BE": (50.8279, 3.2649), "Hasselt BE": (50.9307, 5.3378), "Sint-Niklaas BE": (51.1650, 4.1439),
+    "Oostende BE": (51.2154, 2.9287), "Genk BE": (50.9650, 5.5008), "Roeselare BE": (50.9465, 3.1228),
+    "Mouscron BE": (50.7436, 3.2139), "Verviers BE": (50.5891, 5.8620), "Turnhout BE": (51.3226, 4.9447),
+    "Lokeren BE": (51.1036, 3.9933), "Beringen BE": (51.0500, 5.2261), "Sint-Truiden BE": (50.8167, 5.1867),
+    "Brasschaat BE": (51.2917, 4.4917), "Schoten BE": (51.2525, 4.5025), "Deurne BE": (51.2150, 4.4667),
+    "Wilrijk BE": (51.1683, 4.3950), "Edegem BE": (51.1550, 4.4450), "Kontich BE": (51.1333, 4.4500),
+    "Aartselaar BE": (51.1333, 4.3833), "Hove BE": (51.1500, 4.4667), "Boechout BE": (51.1597, 4.4922),
+    "Lint BE": (51.1267, 4.4967), "Niel BE": (51.1117, 4.3333), "Rumst BE": (51.0800, 4.4217),
+    "Boom BE": (51.0917, 4.3667), "Schelle BE": (51.1267, 4.3417), "Hemiksem BE": (51.1450, 4.3383),
+    "Hoboken BE": (51.1750, 4.3500), "Zwijndrecht BE": (51.2167, 4.3333), "Burcht BE": (51.2033, 4.3433),
+    "Kruibeke BE": (51.1700, 4.3100), "Temse BE": (51.1250, 4.2117), "Bornem BE": (51.0967, 4.2433),
+    "Puurs BE": (51.0750, 4.2833), "Sint-Amands BE": (51.0550, 4.2067), "Berlare BE": (51.0333, 4.0000),
+    "Buggenhout BE": (51.0150, 4.2017), "Lebbeke BE": (50.9983, 4.1333), "Dendermonde BE": (51.0283, 4.1011),
+    "Hamme BE": (51.1000, 4.1333), "Waasmunster BE": (51.1083, 4.0833), "Sint-Gillis-Waas BE": (51.2200, 4.1233),
+    "Stekene BE": (51.2100, 4.0367), "Beveren BE": (51.2117, 4.2567), "Zele BE": (51.0667, 4.0333),
+    "Moerbeke BE": (51.1750, 3.9333), "Wachtebeke BE": (51.1700, 3.8667), "Zelzate BE": (51.2000, 3.8167),
+    "Assenede BE": (51.2267, 3.7500), "Eeklo BE": (51.1858, 3.5639), "Kaprijke BE": (51.2167, 3.6167),
+    "Sint-Laureins BE": (51.2417, 3.5250), "Waarschoot BE": (51.1550, 3.6050), "Knesselare BE": (51.1400, 3.4133),
+    "Maldegem BE": (51.2083, 3.4450), "Aalter BE": (51.0900, 3.4483), "Beernem BE": (51.1394, 3.3394),
+    "Oostkamp BE": (51.1550, 3.2333), "Bruges BE": (51.2093, 3.2247), "Damme BE": (51.2500, 3.2833),
+    "Knokke-Heist BE": (51.3500, 3.2667), "Blankenberge BE": (51.3131, 3.1319), "De Haan BE": (51.2717, 3.0333),
+    "Zuienkerke BE": (51.2667, 3.1500), "Jabbeke BE": (51.1833, 3.0833), "Oudenburg BE": (51.1833, 3.0000),
+    "Gistel BE": (51.1567, 2.9667), "Ichtegem BE": (51.0933, 3.0167), "Torhout BE": (51.0650, 3.1017),
+    "Koekelare BE": (51.0900, 2.9783), "Kortemark BE": (51.0300, 3.0433), "Hooglede BE": (50.9833, 3.0833),
+    "Staden BE": (50.9750, 3.0167), "Moorslede BE": (50.8917, 3.0667), "Ledegem BE": (50.8583, 3.1250),
+    "Menen BE": (50.7967, 3.1217), "Wervik BE": (50.7800, 3.0383), "Poperinge BE": (50.8550, 2.7267),
+    "Vleteren BE": (50.9167, 2.7333), "Lo-Reninge BE": (50.9500, 2.7500), "Ieper BE": (50.8514, 2.8857),
+    "Langemark-Poelkapelle BE": (50.9117, 2.9167), "Zonnebeke BE": (50.8717, 2.9867), "Geluveld BE": (50.8350, 2.9950),
+    "Passendale BE": (50.9000, 3.0167), "Westrozebeke BE": (50.9250, 2.9967), "Diksmuide BE": (51.0333, 2.8667),
+    "Houthulst BE": (50.9783, 2.9500), "Merckem BE": (50.9550, 2.8550), "Klerken BE": (50.9717, 2.9000),
+    "Woumen BE": (51.0033, 2.8600), "Vladslo BE": (51.0550, 2.9217), "Beerst BE": (51.0617, 2.8717),
+    "Keiem BE": (51.0833, 2.8917), "Lampernisse BE": (51.0317, 2.7683), "Oostvleteren BE": (50.9317, 2.7400),
+    "Westvleteren BE": (50.9267, 2.7183), "Elverdinge BE": (50.8833, 2.8167), "Brielen BE": (50.8633, 2.8400),
+    "Dikkebus BE": (50.8233, 2.8317), "Voormezele BE": (50.8167, 2.8717), "Zillebeke BE": (50.8350, 2.9233),
+    "Hollebeke BE": (50.8017, 2.9333), "Kemmel BE": (50.7833, 2.8283), "Wytschaete BE": (50.7850, 2.8817),
+    "Messines BE": (50.7650, 2.8967), "Ploegsteert BE": (50.7250, 2.8783), "Comines BE": (50.7683, 3.0100),
+    "Heuvelland BE": (50.7833, 2.8167), "Dranouter BE": (50.7667, 2.7833),
+}
@@ -0,0 +1,105 @@
+"""
+城市距离索引
+按起点实际来回距离排序的城市索引，用二分查找确定短途/中途/长途范围
+"""
+
+import random
+from bisect import bisect_left, bisect_right
+from typing import Dict, List, Tuple
+
+from city_registry import FenwickSampler
+
+# 距离分类边界（来回公里数）：短途 < 150 <= 中途 <= 300 < 长途
+SHORT_TRIP_MAX_KM = 150
+LONG_TRIP_MIN_KM = 300
+
+
+def classify_distance(distance: int) -> str:
+    """返回来回距离所属的类型 short / medium / long"""
+    if distance < SHORT_TRIP_MAX_KM:
+        return "short"
+    elif distance <= LONG_TRIP_MIN_KM:
+        return "medium"
+    return "long"
+
+
+class DistanceIndex:
+    """按来回距离排序的城市索引
+
+    城市按距离升序存放在平行数组中，每种距离类型对应一个连续区间，通过 bisect 在 O(log n) 内定位。
+    区间内按权重抽样由树状数组完成；达到使用上限或无法访问的城市通过 remove() 在 O(log n) 内移出候选。
+    """
+
+    def __init__(self, distances: Dict[str, int], rng: random.Random = None, weights: Dict[str, float] = None):
+        entries = sorted((km, city) for city, km in distances.items() if km is not None)
+        self.distances = [km for km, _ in entries]
+        self.cities = [city for _, city in entries]
+        self.positions = {city: i for i, city in enumerate(self.cities)}
+        self.rng = rng or random
+        weights = weights or {}
+        self._sampler = FenwickSampler([weights.get(city, 1) for city in self.cities], rng=self.rng)
+        self._available_count = sum(1 for weight in self._sampler.weights if weight > 0)
+
+    def __len__(self):
+        return self._available_count
+
+    def copy(self, rng: random.Random = None) -> "DistanceIndex":
+        """复制索引的可用状态：排序后的距离和城市数组是只读的，在副本间共享"""
+        clone = object.__new__(DistanceIndex)
+        clone.distances = self.distances
+        clone.cities = self.cities
+        clone.positions = self.positions
+        clone.rng = rng or self.rng
+        clone._sampler = self._sampler.copy(rng=clone.rng)
+        clone._available_count = self._available_count
+        return clone
+
+    def __contains__(self, city: str) -> bool:
+        i = self.positions.get(city)
+        return i is not None and self._sampler.weights[i] > 0
+
+    def range_for(self, min_km: float = None, max_km: float = None, include_max: bool = True) -> Tuple[int, int]:
+        """返回来回距离位于 [min_km, max_km] 的城市下标区间 [lo, hi)"""
+        lo = 0 if min_km is None else bisect_left(self.distances, min_km)
+        if max_km is None:
+            hi = len(self.distances)
+        elif include_max:
+            hi = bisect_right(self.distances, max_km)
+        else:
+            hi = bisect_left(self.distances, max_km)
+        return lo, max(lo, hi)
+
+    def bucket_range(self, distance_type: str) -> Tuple[int, int]:
+        """返回某个距离类型对应的下标区间"""
+        if distance_type == "short":
+            return self.range_for(max_km=SHORT_TRIP_MAX_KM, include_max=False)
+        elif distance_type == "medium":
+            return self.range_for(SHORT_TRIP_MAX_KM, LONG_TRIP_MIN_KM)
+        return bisect_right(self.distances, LONG_TRIP_MIN_KM), len(self.distances)
+
+    def candidates(self, distance_type: str = None) -> List[str]:
+        """返回某个距离类型（默认全部）中仍可用的城市"""
+        lo, hi = self.bucket_range(distance_type) if distance_type else (0, len(self.cities))
+        return [self.cities[i] for i in range(lo, hi) if self._sampler.weights[i] > 0]
+
+    def bucket_sizes(self) -> Dict[str, int]:
+        """各距离类型中仍可用的城市数量"""
+        return {distance_type: len(self.candidates(distance_type))
+                for distance_type in ("short", "medium", "long")}
+
+    def sample(self, distance_type: str = None) -> str:
+        """从某个距离类型（默认全部）中按权重随机选择一个可用城市，没有可用城市时返回None"""
+        lo, hi = self.bucket_range(distance_type) if distance_type else (0, len(self.cities))
+        i = self._sampler.sample(lo, hi)
+        return self.cities[i] if i is not None else None
+
+    def remove(self, city: str):
+        """将城市移出候选（达到使用上限或无法访问）"""
+        i = self.positions.get(city)
+        if i is not None and self._sampler.weights[i] > 0:
+            self._sampler.remove(i)
+            self._available_count -= 1
+
+    def distance(self, city: str) -> int:
+        i = self.positions.get(city)
+        return self.distances[i] if i is not None else None
@@ -0,0 +1,209 @@
+"""
+城市注册表
+为每个城市分配紧凑的整数ID并记录国家和地区，使用数组计数器跟踪使用次数，
+通过树状数组 (Fenwick tree) 在 O(log n) 内加权抽样和移除城市
+"""
+
+import random
+from array import array
+from typing import Dict, Iterable, List
+
+# 比利时城市名的后缀（如 "Gent BE"）
+BELGIAN_SUFFIX = " BE"
+
+# 每个目的地最多使用的次数
+DEFAULT_MAX_PER_DESTINATION = 3
+
+
+class FenwickSampler:
+    """可移除元素的加权抽样器
+
+    树状数组保存权重的前缀和：修改权重、按权重抽样（可限定下标区间）都是 O(log n)。
+    权重为0的元素不会被抽中，移除即把权重设为0。
+    """
+
+    def __init__(self, weights: Iterable[float], rng: random.Random = None):
+        self.weights = list(weights)
+        self.rng = rng or random
+        self._size = len(self.weights)
+        self._step = 1 << max(self._size.bit_length() - 1, 0)
+
+        # O(n) 建树：每个节点把自己的部分和累加到父节点
+        self._tree = [0] + self.weights
+        for i in range(1, self._size + 1):
+            parent = i + (i & -i)
+            if parent <= self._size:
+                self._tree[parent] += self._tree[i]
+
+    def __len__(self):
+        return self._size
+
+    def copy(self, rng: random.Random = None) -> "FenwickSampler":
+        """复制当前权重和树（O(n)，无需重新建树），副本的修改互不影响"""
+        clone = object.__new__(FenwickSampler)
+        clone.weights = list(self.weights)
+        clone.rng = rng or self.rng
+        clone._size = self._size
+        clone._step = self._step
+        clone._tree = list(self._tree)
+        return clone
+
+    def prefix(self, i: int) -> float:
+        """下标 [0, i) 的权重之和"""
+        total = 0
+        while i > 0:
+            total += self._tree[i]
+            i -= i & -i
+        return total
+
+    def total(self, lo: int = 0, hi: int = None) -> float:
+        """下标 [lo, hi) 的权重之和"""
+        hi = self._size if hi is None else hi
+        return self.prefix(hi) - self.prefix(lo) if hi > lo else 0
+
+    def set_weight(self, i: int, weight: float):
+        delta = weight - self.weights[i]
+        if not delta:
+            return
+        self.weights[i] = weight
+        i += 1
+        while i <= self._size:
+            self._tree[i] += delta
+            i += i & -i
+
+    def remove(self, i: int):
+        self.set_weight(i, 0)
+
+    def sample(self, lo: int = 0, hi: int = None) -> int:
+        """按权重在下标 [lo, hi) 中抽取一个元素，区间内权重全为0时返回None"""
+        hi = self._size if hi is None else hi
+        if hi <= lo:
+            return None
+        base = self.prefix(lo)
+        span = self.prefix(hi) - base
+        if span <= 0:
+            return None
+
+        # 在树上向下查找前缀和首次超过目标值的位置
+        target = base + self.rng.random() * span
+        position = 0
+        step = self._step
+        while step:
+            candidate = position + step
+            if candidate <= self._size and self._tree[candidate] <= target:
+                position = candidate
+                target -= self._tree[candidate]
+            step >>= 1
+
+        # 浮点误差可能落在区间边界或权重为0的元素上，此时在区间内就近修正
+        i = min(max(position, lo), hi - 1)
+        if self.weights[i] > 0:
+            return i
+        for j in range(i + 1, hi):
+            if self.weights[j] > 0:
+                return j
+        for j in range(i - 1, lo - 1, -1):
+            if self.weights[j] > 0:
+                return j
+        return None
+
+
+class CityRegistry:
+    """去重后的城市表：城市名 <-> 整数ID，以及每个城市的国家和地区"""
+
+    def __init__(self, regions: Dict[str, List[str]] = None):
+        self.names: List[str] = []
+        self.ids: Dict[str, int] = {}
+        self.countries: List[str] = []
+        self.regions: List[str] = []
+        for region, cities in (regions or {}).items():
+            for city in cities:
+                self.add(city, region)
+
+    def __len__(self):
+        return len(self.names)
+
+    def __contains__(self, city: str) -> bool:
+        return city in self.ids
+
+    def add(self, city: str, region: str = None) -> int:
+        """登记城市并返回其ID；已登记的城市保留第一次出现时的地区"""
+        city_id = self.ids.get(city)
+        if city_id is None:
+            city_id = len(self.names)
+            self.ids[city] = city_id
+            self.names.append(city)
+            self.countries.append("BE" if city.endswith(BELGIAN_SUFFIX) else "NL")
+            self.regions.append(region)
+        return city_id
+
+    def country(self, city: str) -> str:
+        return self.countries[self.ids[city]]
+
+    def region(self, city: str) -> str:
+        return self.regions[self.ids[city]]
+
+
+class CityUsage:
+    """一次生成过程中各城市的使用次数和失败状态
+
+    计数器是按城市ID索引的数组；仍可选择的城市保存在加权抽样器中，
+    达到使用上限或无法访问时在 O(log n) 内移出。
+    """
+
+    def __init__(self, registry: CityRegistry, max_per_destination: int = DEFAULT_MAX_PER_DESTINATION,
+                 weights: Iterable[float] = None, rng: random.Random = None):
+        self.registry = registry
+        self.max_per_destination = max_per_destination
+        self.counts = array("H", bytes(2 * len(registry)))
+        self.failed = bytearray(len(registry))
+        self.sampler = FenwickSampler(weights if weights is not None else [1] * len(registry), rng=rng)
+        self._extra_counts: Dict[str, int] = {}
+        self._extra_failed = set()
+
+    def count(self, city: str) -> int:
+        city_id = self._id(city)
+        return self.counts[city_id] if city_id is not None else self._extra_counts.get(city, 0)
+
+    def is_available(self, city: str) -> bool:
+        """城市未失败且使用次数未达到上限"""
+        city_id = self._id(city)
+        if city_id is None:
+            return city not in self._extra_failed and self.count(city) < self.max_per_destination
+        return not self.failed[city_id] and self.counts[city_id] < self.max_per_destination
+
+    def record(self, city: str) -> int:
+        """记录一次使用并返回该城市的使用次数，达到上限时移出抽样器"""
+        city_id = self._id(city)
+        if city_id is None:
+            self._extra_counts[city] = self._extra_counts.get(city, 0) + 1
+            return self._extra_counts[city]
+        self.counts[city_id] += 1
+        if self.counts[city_id] >= self.max_per_destination:
+            self.sampler.remove(city_id)
+        return self.counts[city_id]
+
+    def fail(self, city: str):
+        """标记城市无法访问并移出抽样器"""
+        city_id = self._id(city)
+        if city_id is None:
+            self._extra_failed.add(city)
+            return
+        self.failed[city_id] = 1
+        self.sampler.remove(city_id)
+
+    def sample(self) -> str:
+        """按权重随机抽取一个仍可选择的城市，没有时返回None"""
+        city_id = self.sampler.sample()
+        return self.registry.names[city_id] if city_id is not None else None
+
+    def as_dict(self) -> Dict[str, int]:
+        """已使用城市的使用次数 {城市: 次数}"""
+        usage = {self.registry.names[city_id]: count for city_id, count in enumerate(self.counts) if count}
+        usage.update(self._extra_counts)
+        return usage
+
+    def _id(self, city: str) -> int:
+        # 创建之后才登记或不在注册表中的城市（如自定义首选城市）不在数组中，单独用字典记录
+        city_id = self.registry.ids.get(city)
+        return city_id if city_id is not None and city_id < len(self.counts) else None
@@ -0,0 +1,257 @@
+"""
+距离缓存
+将Google Maps距离查询结果持久化到本地SQLite文件，避免每次运行重复调用API；
+同时记录每个城市最终匹配成功的地址格式、确认无法匹配的城市（负缓存）和地址的地理编码坐标
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from typing import List
+
+# 默认缓存文件和有效期
+DEFAULT_CACHE_PATH = ".distance_cache.sqlite"
+DEFAULT_CACHE_TTL_DAYS = 180
+DEFAULT_CACHE_MAX_ENTRIES = 50000
+
+# 无法匹配的城市在负缓存中保留的天数，过期后会重新尝试
+DEFAULT_NEGATIVE_TTL_DAYS = 30
+
+
+class DistanceCache:
+    """基于SQLite的持久化距离缓存
+
+    以 (起点, 实际使用的地址格式, mode, units, avoid) 为键，保存单程距离(米)和行驶时间(秒)。
+    超过有效期的记录视为未命中并被清理；条目超过上限时淘汰最早写入的记录。
+
+    另外两张表与起点无关：variants 记录每个城市匹配成功的地址格式（与距离使用相同的有效期），
+    failures 记录所有地址格式都无法匹配的城市（使用单独的、较短的有效期，为0时不使用负缓存）。
+    geocodes 记录地址文本的地理编码结果（坐标和 place ID），地点位置不会变化，不会过期；
+    geocode_failures 记录无结果或结果不可信的地址文本，与 failures 使用相同的负缓存有效期。
+    """
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, ttl_days: float = DEFAULT_CACHE_TTL_DAYS,
+                 max_entries: int = DEFAULT_CACHE_MAX_ENTRIES,
+                 negative_ttl_days: float = DEFAULT_NEGATIVE_TTL_DAYS):
+        self.path = path
+        self.ttl_seconds = ttl_days * 86400 if ttl_days else None
+        self.negative_ttl_seconds = negative_ttl_days * 86400 if negative_ttl_days else 0
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+        # 同一个连接可能被多个线程使用，所有访问都通过锁串行化
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS distances (
+                origin TEXT NOT NULL,
+                address TEXT NOT NULL,
+                mode TEXT NOT NULL,
+                units TEXT NOT NULL,
+                avoid TEXT NOT NULL,
+                distance_m INTEGER NOT NULL,
+                duration_s INTEGER,
+                created_at REAL NOT NULL,
+                PRIMARY KEY (origin, address, mode, units, avoid)
+            )
+        """)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS variants (
+                destination TEXT PRIMARY KEY,
+                address TEXT NOT NULL,
+                created_at REAL NOT NULL
+            )
+        """)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS failures (
+                destination TEXT PRIMARY KEY,
+                status TEXT NOT NULL,
+                created_at REAL NOT NULL
+            )
+        """)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS geocodes (
+                address TEXT PRIMARY KEY,
+                lat REAL NOT NULL,
+                lng REAL NOT NULL,
+                place_id TEXT,
+                formatted_address TEXT,
+                created_at REAL NOT NULL
+            )
+        """)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS geocode_failures (
+                address TEXT PRIMARY KEY,
+                status TEXT NOT NULL,
+                created_at REAL NOT NULL
+            )
+        """)
+        self._conn.commit()
+        self.evict()
+
+    def get(self, origin: str, address: str, mode: str, units: str, avoid: str):
+        """查询缓存，命中时返回 (单程距离米, 行驶时间秒)，否则返回None"""
+        cached = self.get_any(origin, [address], mode, units, avoid)
+        return cached[1:] if cached is not None else None
+
+    def get_any(self, origin: str, addresses: List[str], mode: str, units: str, avoid: str):
+        """依次查询同一目的地的多个地址格式，命中时返回 (地址, 单程距离米, 行驶时间秒)，否则返回None
+
+        无论尝试了几个地址格式，都只计一次命中或未命中。
+        """
+        with self._lock:
+            for address in addresses:
+                row = self._conn.execute(
+                    "SELECT distance_m, duration_s, created_at FROM distances "
+                    "WHERE origin = ? AND address = ? AND mode = ? AND units = ? AND avoid = ?",
+                    (origin, address, mode, units, avoid or "")
+                ).fetchone()
+                if row is not None and not self._is_expired(row[2]):
+                    self.hits += 1
+                    return address, row[0], row[1]
+            self.misses += 1
+        return None
+
+    def put(self, origin: str, address: str, mode: str, units: str, avoid: str,
+            distance_m: int, duration_s: int = None):
+        """写入一条距离记录"""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO distances "
+                "(origin, address, mode, units, avoid, distance_m, duration_s, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (origin, address, mode, units, avoid or "", distance_m, duration_s, time.time())
+            )
+            self._conn.commit()
+            self.writes += 1
+
+    def variants(self) -> dict:
+        """返回所有未过期的已学习地址格式 {城市: 地址}"""
+        with self._lock:
+            rows = self._conn.execute("SELECT destination, address, created_at FROM variants").fetchall()
+        return {destination: address for destination, address, created_at in rows
+                if not self._is_expired(created_at)}
+
+    def put_variant(self, destination: str, address: str):
+        """记录城市匹配成功的地址格式，并清除该城市的负缓存"""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO variants (destination, address, created_at) VALUES (?, ?, ?)",
+                (destination, address, time.time())
+            )
+            self._conn.execute("DELETE FROM failures WHERE destination = ?", (destination,))
+            self._conn.commit()
+
+    def failures(self) -> dict:
+        """返回负缓存中仍在有效期内的城市 {城市: API元素状态}，未启用负缓存时为空"""
+        if not self.negative_ttl_seconds:
+            return {}
+        cutoff = time.time() - self.negative_ttl_seconds
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT destination, status FROM failures WHERE created_at >= ?", (cutoff,)
+            ).fetchall()
+        return dict(rows)
+
+    def put_failure(self, destination: str, status: str):
+        """把所有地址格式都无法匹配的城市写入负缓存"""
+        if not self.negative_ttl_seconds:
+            return
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO failures (destination, status, created_at) VALUES (?, ?, ?)",
+                (destination, status, time.time())
+            )
+            self._conn.commit()
+
+    def get_geocode(self, address: str):
+        """查询地址的地理编码，命中时返回 (纬度, 经度, place ID)，否则返回None"""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT lat, lng, place_id FROM geocodes WHERE address = ?", (address,)
+            ).fetchone()
+
+    def put_geocode(self, address: str, lat: float, lng: float, place_id: str = None,
+                    formatted_address: str = None):
+        """写入地址的地理编码结果，并清除该地址的负缓存"""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO geocodes (address, lat, lng, place_id, formatted_address, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (address, lat, lng, place_id, formatted_address, time.time())
+            )
+            self._conn.execute("DELETE FROM geocode_failures WHERE address = ?", (address,))
+            self._conn.commit()
+
+    def get_geocode_failure(self, address: str) -> str:
+        """查询地址的地理编码负缓存，仍在有效期内时返回状态（如 ZERO_RESULTS），否则返回None"""
+        if not self.negative_ttl_seconds:
+            return None
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT status FROM geocode_failures WHERE address = ? AND created_at >= ?",
+                (address, time.time() - self.negative_ttl_seconds)
+            ).fetchone()
+        return row[0] if row is not None else None
+
+    def put_geocode_failure(self, address: str, status: str):
+        """把无结果或结果不可信的地址写入地理编码负缓存"""
+        if not self.negative_ttl_seconds:
+            return
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO geocode_failures (address, status, created_at) VALUES (?, ?, ?)",
+                (address, status, time.time())
+            )
+            self._conn.commit()
+
+    def evict(self):
+        """清理过期记录，并在超过条目上限时淘汰最早写入的记录"""
+        with self._lock:
+            if self.ttl_seconds:
+                self._conn.execute("DELETE FROM distances WHERE created_at < ?",
+                                   (time.time() - self.ttl_seconds,))
+                self._conn.execute("DELETE FROM variants WHERE created_at < ?",
+                                   (time.time() - self.ttl_seconds,))
+            if self.negative_ttl_seconds:
+                self._conn.execute("DELETE FROM failures WHERE created_at < ?",
+                                   (time.time() - self.negative_ttl_seconds,))
+                self._conn.execute("DELETE FROM geocode_failures WHERE created_at < ?",
+                                   (time.time() - self.negative_ttl_seconds,))
+            if self.max_entries:
+                self._conn.execute("""
+                    DELETE FROM distances WHERE rowid IN (
+                        SELECT rowid FROM distances ORDER BY created_at DESC LIMIT -1 OFFSET ?
+                    )
+                """, (self.max_entries,))
+            self._conn.commit()
+
+    def _is_expired(self, created_at: float) -> bool:
+        return bool(self.ttl_seconds) and created_at < time.time() - self.ttl_seconds
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM distances").fetchone()[0]
+
+    def stats(self) -> dict:
+        """返回命中/未命中统计（每次查询一个目的地计一次）"""
+        with self._lock:
+            hits, misses, writes = self.hits, self.misses, self.writes
+        lookups = hits + misses
+        return {
+            "hits": hits,
+            "misses": misses,
+            "writes": writes,
+            "hit_rate": hits / lookups if lookups else 0.0,
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
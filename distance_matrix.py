@@ -0,0 +1,168 @@
+"""
+多起点距离矩阵
+起点 × 候选城市的来回距离（公里）和来回行驶时间（秒）保存为 .npy 数组，另有一个 JSON 索引记录起点和城市的顺序；
+以内存映射方式打开，多个进程共享同一份页面缓存，按下标直接读取而不复制成各自的字典
+"""
+
+import json
+import os
+from collections.abc import MutableMapping
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import numpy as np
+
+# 矩阵格式版本，结构不兼容地变化时递增
+MATRIX_VERSION = 1
+
+# 矩阵目录中的文件
+DISTANCES_FILE = "distances.npy"
+DURATIONS_FILE = "durations.npy"
+INDEX_FILE = "index.json"
+
+# 无法解析的距离/行驶时间
+MISSING = -1
+
+MATRIX_DTYPE = np.int32
+
+
+def write_matrix(directory: str, origins: List[str], cities: List[str], distances: np.ndarray,
+                 durations: np.ndarray, **metadata) -> str:
+    """写入矩阵目录：两个 (起点数, 城市数) 的 int32 数组和 JSON 索引
+
+    每个文件先写临时文件再替换；索引最后写入，读取方看到新索引时数组已经就绪。
+    """
+    shape = (len(origins), len(cities))
+    if distances.shape != shape or durations.shape != shape:
+        raise ValueError(f"matrixvorm {distances.shape}/{durations.shape} past niet bij {shape}")
+
+    os.makedirs(directory, exist_ok=True)
+    for name, values in ((DISTANCES_FILE, distances), (DURATIONS_FILE, durations)):
+        path = os.path.join(directory, name)
+        with open(f"{path}.tmp", "wb") as f:
+            np.save(f, np.ascontiguousarray(values, dtype=MATRIX_DTYPE))
+        os.replace(f"{path}.tmp", path)
+
+    index = dict(metadata)
+    index.update({
+        "version": MATRIX_VERSION,
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "origins": list(origins),
+        "cities": list(cities),
+    })
+    path = os.path.join(directory, INDEX_FILE)
+    with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+        json.dump(index, f, ensure_ascii=False)
+    os.replace(f"{path}.tmp", path)
+    return directory
+
+
+class MatrixRow(MutableMapping):
+    """一个起点的距离行，可直接作为 TripGenerator.distance_memo 使用
+
+    矩阵中的城市从内存映射数组读取（MISSING 读作 None），写入的值保存在本地字典中并优先于矩阵，
+    矩阵本身始终只读。
+    """
+
+    def __init__(self, values: np.ndarray, city_ids: Dict[str, int], extra: Dict[str, Optional[int]] = None):
+        self._values = values
+        self._city_ids = city_ids
+        self._extra = extra if extra is not None else {}
+
+    def __getitem__(self, city: str) -> Optional[int]:
+        if city in self._extra:
+            return self._extra[city]
+        value = int(self._values[self._city_ids[city]])
+        return None if value == MISSING else value
+
+    def get(self, city: str, default=None):
+        if city in self._extra:
+            return self._extra[city]
+        j = self._city_ids.get(city)
+        if j is None:
+            return default
+        value = int(self._values[j])
+        return None if value == MISSING else value
+
+    def __contains__(self, city) -> bool:
+        return city in self._extra or city in self._city_ids
+
+    def __setitem__(self, city: str, value: Optional[int]):
+        self._extra[city] = value
+
+    def __delitem__(self, city: str):
+        del self._extra[city]
+
+    def __iter__(self):
+        yield from self._city_ids
+        yield from (city for city in self._extra if city not in self._city_ids)
+
+    def __len__(self) -> int:
+        return len(self._city_ids) + sum(1 for city in self._extra if city not in self._city_ids)
+
+    def copy(self) -> "MatrixRow":
+        """共享矩阵行，只复制本地写入的部分"""
+        return MatrixRow(self._values, self._city_ids, dict(self._extra))
+
+
+class DistanceMatrix:
+    """以内存映射方式打开的距离矩阵（只读）"""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        with open(os.path.join(directory, INDEX_FILE), "r", encoding="utf-8") as f:
+            index = json.load(f)
+        if index.get("version") != MATRIX_VERSION:
+            raise ValueError(f"afstandsmatrix {directory} heeft versie {index.get('version')}, "
+                             f"verwacht versie {MATRIX_VERSION}")
+
+        self.origins = index["origins"]
+        self.cities = index["cities"]
+        self.origin_ids = {origin: i for i, origin in enumerate(self.origins)}
+        self.city_ids = {city: j for j, city in enumerate(self.cities)}
+        self.mode = index.get("mode")
+        self.units = index.get("units")
+        self.avoid = index.get("avoid")
+        self.distance_provider = index.get("distance_provider")
+        self.created_at = index.get("created_at")
+
+        self.distances = np.load(os.path.join(directory, DISTANCES_FILE), mmap_mode="r")
+        self.durations = np.load(os.path.join(directory, DURATIONS_FILE), mmap_mode="r")
+        shape = (len(self.origins), len(self.cities))
+        if self.distances.shape != shape or self.durations.shape != shape:
+            raise ValueError(f"afstandsmatrix {directory} is beschadigd: vorm {self.distances.shape}, "
+                             f"verwacht {shape}")
+
+    def __len__(self) -> int:
+        return len(self.origins)
+
+    def __contains__(self, origin: str) -> bool:
+        return origin in self.origin_ids
+
+    def matches(self, mode: str, units: str, avoid: str) -> bool:
+        """矩阵是否用相同的查询参数生成"""
+        return (self.mode, self.units, self.avoid or "") == (mode, units, avoid or "")
+
+    def distance(self, origin: str, city: str) -> Optional[int]:
+        """来回距离（公里），无法解析时返回None；起点或城市不在矩阵中时抛出 KeyError"""
+        value = int(self.distances[self.origin_ids[origin], self.city_ids[city]])
+        return None if value == MISSING else value
+
+    def duration(self, origin: str, city: str) -> Optional[int]:
+        """来回行驶时间（秒），未知时返回None"""
+        value = int(self.durations[self.origin_ids[origin], self.city_ids[city]])
+        return None if value == MISSING else value
+
+    def row(self, origin: str) -> MatrixRow:
+        """起点的距离行（共享内存映射，不复制数据）"""
+        return MatrixRow(self.distances[self.origin_ids[origin]], self.city_ids)
+
+    def stats(self) -> dict:
+        """起点数、城市数、已解析和无法解析的元素数"""
+        resolved = int(np.count_nonzero(self.distances != MISSING))
+        return {
+            "origins": len(self.origins),
+            "cities": len(self.cities),
+            "resolved": resolved,
+            "missing": self.distances.size - resolved,
+        }
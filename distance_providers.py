@@ -0,0 +1,371 @@
+"""
+距离提供者
+统一的 Distance Matrix 接口：Google Maps API、离线坐标估算、录制和回放
+"""
+
+import json
+import os
+import re
+import threading
+import time
+from typing import List, Tuple
+
+# 地球平均半径（公里）
+EARTH_RADIUS_KM = 6371.0088
+
+# 直线距离换算为道路距离的默认系数
+DEFAULT_DETOUR_FACTOR = 1.3
+
+# 估算行驶时间使用的平均车速（公里/小时）
+DEFAULT_AVERAGE_SPEED_KMH = 80
+
+# 地址中的国家后缀
+_DUTCH_SUFFIXES = (", Netherlands", ", Nederland", ", Holland", ", NL")
+_BELGIAN_SUFFIXES = (", Belgium", ", België", ", BE")
+
+_LAT_LNG_PATTERN = re.compile(r"^\s*(-?\d+(?:\.\d+)?)\s*,\s*(-?\d+(?:\.\d+)?)\s*$")
+
+
+def parse_coordinates(text: str) -> Tuple[float, float]:
+    """解析 '纬度,经度' 形式的地址，不是坐标时返回None"""
+    match = _LAT_LNG_PATTERN.match(text)
+    if match is None:
+        return None
+    return float(match.group(1)), float(match.group(2))
+
+
+def _haversine_km(lat, lng, cos_lat, lats, lngs, cos_lats):
+    """一个点到一组点的大圆距离（公里），坐标为弧度，向量化计算"""
+    import numpy as np
+    a = np.sin((lats - lat) / 2) ** 2 + cos_lat * cos_lats * np.sin((lngs - lng) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+
+
+class DistanceProvider:
+    """距离提供者基类
+
+    子类实现 distance_matrix()，返回与 Google Distance Matrix API 相同结构的结果。
+    """
+
+    name = "base"
+    # 单次请求的起点/目的地/元素上限，None表示不限制
+    max_origins_per_request = 25
+    max_destinations_per_request = 25
+    max_elements_per_request = 100
+    # 结果是否是真实距离，可以写入持久化缓存
+    cacheable = False
+    # 是否按请求计费并受配额限制（需要经过 request_scheduler 限速和预算控制）
+    metered = False
+    # 起点/目的地是否可以用 '纬度,经度' 表示，以及是否提供地理编码服务 (geocode)
+    coordinates = False
+    geocoding = False
+
+    def distance_matrix(self, origins: List[str], destinations: List[str], mode: str = "driving",
+                        units: str = "metric", avoid: str = None) -> dict:
+        raise NotImplementedError
+
+    def geocode(self, address: str) -> dict:
+        """地址解析为 {"lat", "lng", "place_id", "formatted_address", "partial_match", "types"}，没有结果时返回None"""
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class GoogleDistanceProvider(DistanceProvider):
+    """通过 googlemaps.Client 调用 Google Distance Matrix API"""
+
+    name = "google"
+    cacheable = True
+    metered = True
+    coordinates = True
+    geocoding = True
+
+    def __init__(self, api_key: str):
+        import googlemaps
+        # 配额错误由 request_scheduler 退避重试，客户端自身不再静默重试
+        self.client = googlemaps.Client(key=api_key, retry_over_query_limit=False)
+
+    def distance_matrix(self, origins: List[str], destinations: List[str], mode: str = "driving",
+                        units: str = "metric", avoid: str = None) -> dict:
+        return self.client.distance_matrix(origins=origins, destinations=destinations,
+                                           mode=mode, units=units, avoid=avoid)
+
+    def geocode(self, address: str) -> dict:
+        # 地区偏向荷兰：没有国家后缀的同名地点优先解析为荷兰境内的位置
+        results = self.client.geocode(address, region="nl")
+        if not results:
+            return None
+        best = results[0]
+        location = best["geometry"]["location"]
+        return {
+            "lat": location["lat"],
+            "lng": location["lng"],
+            "place_id": best.get("place_id"),
+            "formatted_address": best.get("formatted_address"),
+            "partial_match": bool(best.get("partial_match")),
+            "types": best.get("types", []),
+        }
+
+
+class OfflineDistanceProvider(DistanceProvider):
+    """基于内置坐标表的离线距离估算
+
+    使用大圆距离乘以绕行系数近似道路距离，一次计算某个起点到所有城市的距离。
+    起点和目的地也可以是 '纬度,经度'（例如地理编码缓存中的坐标）。
+    """
+
+    name = "offline"
+    max_origins_per_request = None
+    max_destinations_per_request = None
+    max_elements_per_request = None
+    coordinates = True
+
+    def __init__(self, detour_factor: float = DEFAULT_DETOUR_FACTOR,
+                 average_speed_kmh: float = DEFAULT_AVERAGE_SPEED_KMH, coordinates: dict = None):
+        # numpy 和坐标表只在离线模式下需要，按需导入以加快启动
+        import numpy as np
+        from city_coordinates import CITY_COORDINATES
+
+        self.detour_factor = detour_factor
+        self.average_speed_kmh = average_speed_kmh
+
+        coordinates = coordinates or CITY_COORDINATES
+        self.names = list(coordinates)
+        self.index = {name: i for i, name in enumerate(self.names)}
+        points = np.radians(np.array([coordinates[name] for name in self.names], dtype=np.float64))
+        self._lat = points[:, 0]
+        self._lng = points[:, 1]
+        self._cos_lat = np.cos(self._lat)
+
+        # 按小写城市名从长到短排列，用于在自由文本起点中查找城市
+        self._names_by_length = sorted(self.names, key=len, reverse=True)
+        self._row_cache = {}
+        self._origin_points = {}
+
+    def locate(self, text: str) -> Tuple[float, float]:
+        """将地址解析为坐标（纬度, 经度），无法识别时返回None"""
+        import numpy as np
+
+        point = parse_coordinates(text)
+        if point is not None:
+            return point
+
+        name = self._gazetteer_name(text)
+        if name is not None:
+            i = self.index[name]
+            return float(np.degrees(self._lat[i])), float(np.degrees(self._lng[i]))
+
+        # 自由文本地址（如 "Stationsplein 1, Duiven"）：匹配其中最长的城市名
+        lowered = f" {re.sub(r'[^0-9a-zà-ÿ]+', ' ', text.lower())} "
+        for candidate in self._names_by_length:
+            plain = candidate[:-3] if candidate.endswith(" BE") else candidate
+            if f" {re.sub(r'[^0-9a-zà-ÿ]+', ' ', plain.lower())} " in lowered:
+                i = self.index[candidate]
+                return float(np.degrees(self._lat[i])), float(np.degrees(self._lng[i]))
+        return None
+
+    def _gazetteer_name(self, address: str) -> str:
+        """将地址格式（如 "Gent, België"）还原为坐标表中的城市名"""
+        if address in self.index:
+            return address
+        for suffix in _BELGIAN_SUFFIXES:
+            if address.endswith(suffix):
+                name = f"{address[:-len(suffix)]} BE"
+                return name if name in self.index else None
+        for suffix in _DUTCH_SUFFIXES:
+            if address.endswith(suffix):
+                name = address[:-len(suffix)]
+                return name if name in self.index else None
+        return None
+
+    def distances_from(self, origin: str):
+        """计算起点到坐标表中所有城市的单程道路距离估算（公里），无法识别起点时返回None"""
+        if origin in self._row_cache:
+            return self._row_cache[origin]
+
+        import numpy as np
+
+        point = self.locate(origin)
+        row = None
+        if point is not None:
+            lat, lng = np.radians(point)
+            # haversine 公式，对所有城市一次性向量化计算
+            row = _haversine_km(lat, lng, np.cos(lat), self._lat, self._lng, self._cos_lat) * self.detour_factor
+        self._row_cache[origin] = row
+        self._origin_points[origin] = point
+        return row
+
+    def distance_matrix(self, origins: List[str], destinations: List[str], mode: str = "driving",
+                        units: str = "metric", avoid: str = None) -> dict:
+        """返回与 Google Distance Matrix API 相同结构的结果"""
+        import numpy as np
+
+        indices = [self.index.get(self._gazetteer_name(address)) for address in destinations]
+        known = np.array([i if i is not None else 0 for i in indices], dtype=np.intp)
+
+        # 坐标表中没有、但以坐标给出的目的地单独计算
+        points = {k: parse_coordinates(address) for k, (i, address) in enumerate(zip(indices, destinations))
+                  if i is None}
+        points = {k: point for k, point in points.items() if point is not None}
+        if points:
+            columns = np.array(list(points), dtype=np.intp)
+            point_lat, point_lng = np.radians(np.array(list(points.values()), dtype=np.float64)).T
+
+        rows = []
+        for origin in origins:
+            row = self.distances_from(origin)
+            if row is None:
+                rows.append({"elements": [{"status": "NOT_FOUND"} for _ in destinations]})
+                continue
+
+            km = row[known]
+            if points:
+                lat, lng = np.radians(self._origin_points[origin])
+                km[columns] = _haversine_km(lat, lng, np.cos(lat), point_lat, point_lng,
+                                            np.cos(point_lat)) * self.detour_factor
+            distances_m = np.rint(km * 1000).astype(np.int64)
+            durations_s = np.rint(km / self.average_speed_kmh * 3600).astype(np.int64)
+            elements = []
+            for k, (i, distance_m, duration_s) in enumerate(zip(indices, distances_m.tolist(),
+                                                                durations_s.tolist())):
+                if i is None and k not in points:
+                    elements.append({"status": "NOT_FOUND"})
+                    continue
+                elements.append({
+                    "status": "OK",
+                    "distance": {"value": distance_m, "text": f"{distance_m / 1000:.1f} km"},
+                    "duration": {"value": duration_s, "text": f"{round(duration_s / 60)} mins"},
+                })
+            rows.append({"elements": elements})
+
+        return {
+            "status": "OK",
+            "origin_addresses": list(origins),
+            "destination_addresses": list(destinations),
+            "rows": rows,
+        }
+
+
+def _request_key(origin: str, destination: str, mode: str, units: str, avoid: str) -> tuple:
+    return origin, destination, mode, units, avoid or ""
+
+
+class RecordingDistanceProvider(DistanceProvider):
+    """包装另一个提供者，把每次请求和响应追加写入 JSON Lines 录制文件"""
+
+    def __init__(self, inner: DistanceProvider, fixture_path: str):
+        self.inner = inner
+        self.fixture_path = fixture_path
+        self.name = f"record:{inner.name}"
+        self.max_origins_per_request = inner.max_origins_per_request
+        self.max_destinations_per_request = inner.max_destinations_per_request
+        self.max_elements_per_request = inner.max_elements_per_request
+        self.cacheable = inner.cacheable
+        self.metered = inner.metered
+        self.recorded = 0
+
+        directory = os.path.dirname(os.path.abspath(fixture_path))
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._file = open(fixture_path, "a", encoding="utf-8")
+
+    def distance_matrix(self, origins: List[str], destinations: List[str], mode: str = "driving",
+                        units: str = "metric", avoid: str = None) -> dict:
+        response = self.inner.distance_matrix(origins, destinations, mode=mode, units=units, avoid=avoid)
+        record = {
+            "origins": list(origins),
+            "destinations": list(destinations),
+            "mode": mode,
+            "units": units,
+            "avoid": avoid or "",
+            "response": response,
+        }
+        with self._lock:
+            self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+            self._file.flush()
+            self.recorded += 1
+        return response
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+        self.inner.close()
+
+
+class ReplayDistanceProvider(DistanceProvider):
+    """从录制文件回放响应，可选地为每次请求注入固定延迟
+
+    录制的响应按 (起点, 目的地, mode, units, avoid) 拆分成单个元素索引，
+    因此回放时请求的分批方式不必与录制时一致。未录制的元素返回 NOT_FOUND。
+    """
+
+    name = "replay"
+
+    def __init__(self, fixture_path: str, latency: float = 0.0):
+        self.fixture_path = fixture_path
+        self.latency = latency
+        self.hits = 0
+        self.misses = 0
+        self._elements = {}
+        self._lock = threading.Lock()
+
+        with open(fixture_path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                record = json.loads(line)
+                response = record["response"]
+                if response.get("status") != "OK":
+                    continue
+                for origin, row in zip(record["origins"], response.get("rows", [])):
+                    for destination, element in zip(record["destinations"], row.get("elements", [])):
+                        key = _request_key(origin, destination, record["mode"], record["units"], record["avoid"])
+                        self._elements[key] = element
+
+    def __len__(self):
+        return len(self._elements)
+
+    def distance_matrix(self, origins: List[str], destinations: List[str], mode: str = "driving",
+                        units: str = "metric", avoid: str = None) -> dict:
+        if self.latency:
+            time.sleep(self.latency)
+
+        rows = []
+        hits = misses = 0
+        for origin in origins:
+            elements = []
+            for destination in destinations:
+                element = self._elements.get(_request_key(origin, destination, mode, units, avoid))
+                if element is None:
+                    misses += 1
+                    element = {"status": "NOT_FOUND"}
+                else:
+                    hits += 1
+                elements.append(element)
+            rows.append({"elements": elements})
+
+        with self._lock:
+            self.hits += hits
+            self.misses += misses
+
+        return {
+            "status": "OK",
+            "origin_addresses": list(origins),
+            "destination_addresses": list(destinations),
+            "rows": rows,
+        }
+
+
+def build_provider(options: dict) -> DistanceProvider:
+    """根据命令行选项 (distance_provider, google_api_key, detour_factor, replay_fixture, replay_latency)
+    创建距离提供者，没有可用的来源时返回None"""
+    if options["distance_provider"] == "offline":
+        return OfflineDistanceProvider(options["detour_factor"] or DEFAULT_DETOUR_FACTOR)
+    if options["distance_provider"] == "replay":
+        return ReplayDistanceProvider(options["replay_fixture"], latency=options["replay_latency"])
+    api_key = options["google_api_key"] or os.getenv("GOOGLE_MAPS_API_KEY")
+    if not api_key:
+        return None
+    return GoogleDistanceProvider(api_key)
@@ -0,0 +1,193 @@
+"""
+地理编码
+起点在每次运行中只解析一次，目的地的每个地址格式只解析一次并保存在持久化缓存中；
+距离矩阵请求改用 '纬度,经度'，服务端不再每次重新解析自由文本地址，
+同名地点（如 Alphen、Bergen、Horst）始终对应同一个位置。缓存中的坐标同样用于离线估算。
+"""
+
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+
+from distance_cache import DistanceCache
+from distance_providers import DistanceProvider, parse_coordinates
+from request_scheduler import QuotaError, RequestScheduler
+from run_logging import log, log_event
+
+# 坐标保留的小数位数（约 0.1 米），同一地址总是得到相同的请求文本
+COORDINATE_DECIMALS = 6
+
+# 可信的地理编码结果类型：地名解析到城镇，完整地址（起点）解析到门牌；
+# 其他类型（道路、省份、国家等）和部分匹配说明地址文本有误，按无结果处理
+ACCEPTED_PLACE_TYPES = {"locality", "sublocality", "postal_town", "street_address", "premise", "subpremise"}
+
+
+def format_coordinates(lat: float, lng: float) -> str:
+    """坐标转为距离矩阵请求使用的 '纬度,经度' 文本"""
+    return f"{lat:.{COORDINATE_DECIMALS}f},{lng:.{COORDINATE_DECIMALS}f}"
+
+
+def is_confident(result: dict) -> bool:
+    """地理编码结果是否可信：不是部分匹配，且类型（提供者报告时）包含城镇或完整地址"""
+    if result.get("partial_match"):
+        return False
+    types = result.get("types")
+    return not types or bool(ACCEPTED_PLACE_TYPES.intersection(types))
+
+
+class Geocoder:
+    """地址 -> 坐标：依次查找本次运行已解析的结果、持久化缓存和提供者的地理编码服务
+
+    提供者没有地理编码服务（离线估算）时只使用缓存中的坐标。
+    无结果或结果不可信的地址写入负缓存，在负缓存有效期内不再请求；请求异常不写入。
+    无法解析或结果不可信的地址返回None，调用方继续使用原来的地址文本，
+    由距离矩阵对错误的地址格式返回 NOT_FOUND（地址格式学习和负缓存依赖这一点）。
+    """
+
+    def __init__(self, provider: DistanceProvider, cache: DistanceCache = None,
+                 scheduler: RequestScheduler = None):
+        self.provider = provider
+        self.cache = cache
+        self.scheduler = scheduler
+        self.requests = 0
+        self.cache_hits = 0
+        self.failed = 0
+        self.rejected = 0
+        self.negative_hits = 0
+        self._memo = {}
+        self._lock = threading.Lock()
+
+    def locate(self, address: str) -> str:
+        """返回地址的 '纬度,经度'，无法解析时返回None；已经是坐标的地址原样返回"""
+        if parse_coordinates(address) is not None:
+            return address
+        with self._lock:
+            if address in self._memo:
+                return self._memo[address]
+        coordinates = self._lookup(address)
+        with self._lock:
+            self._memo[address] = coordinates
+        return coordinates
+
+    def locate_all(self, addresses: List[str], max_workers: int = 1):
+        """在发送矩阵请求前并发解析一批地址，之后的 locate 直接读取结果；配额错误向上抛出"""
+        with self._lock:
+            pending = [address for address in dict.fromkeys(addresses)
+                       if address not in self._memo and parse_coordinates(address) is None]
+        if not pending:
+            return
+        if max_workers <= 1 or len(pending) == 1:
+            for address in pending:
+                self.locate(address)
+            return
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(pending))) as executor:
+            for _ in executor.map(self.locate, pending):
+                pass
+
+    def _lookup(self, address: str) -> str:
+        if self.cache is not None:
+            cached = self.cache.get_geocode(address)
+            if cached is not None:
+                with self._lock:
+                    self.cache_hits += 1
+                return format_coordinates(cached[0], cached[1])
+            status = self.cache.get_geocode_failure(address)
+            if status is not None:
+                with self._lock:
+                    self.negative_hits += 1
+                log_event(log, logging.DEBUG, "geocode_negative_hit",
+                          f"📍 地理编码负缓存命中 ({status})，使用地址文本: {address}",
+                          address=address, status=status)
+                return None
+        if not self.provider.geocoding:
+            return None
+
+        try:
+            if self.scheduler is not None:
+                result = self.scheduler.call(lambda: self.provider.geocode(address), 1)
+            else:
+                result = self.provider.geocode(address)
+        except QuotaError:
+            raise
+        except Exception as e:
+            log_event(log, logging.WARNING, "geocode_error", f"⚠️  地理编码异常: {address} - {e}",
+                      address=address, error=str(e))
+            with self._lock:
+                self.requests += 1
+                self.failed += 1
+            return None
+        confident = result is not None and is_confident(result)
+        with self._lock:
+            self.requests += 1
+            self.failed += result is None
+            self.rejected += result is not None and not confident
+        if result is not None and not confident:
+            log_event(log, logging.DEBUG, "geocode_rejected",
+                      f"📍 地理编码结果不可信，使用地址文本: {address} -> {result.get('formatted_address') or ''} "
+                      f"({'部分匹配' if result.get('partial_match') else ', '.join(result.get('types') or [])})",
+                      address=address, partial_match=bool(result.get("partial_match")), types=result.get("types"))
+            if self.cache is not None:
+                self.cache.put_geocode_failure(address, "PARTIAL_MATCH" if result.get("partial_match")
+                                               else "REJECTED_TYPE")
+            return None
+        if result is None:
+            log_event(log, logging.DEBUG, "geocode_failed", f"📍 地理编码无结果，使用地址文本: {address}",
+                      address=address)
+            if self.cache is not None:
+                self.cache.put_geocode_failure(address, "ZERO_RESULTS")
+            return None
+
+        if self.cache is not None:
+            self.cache.put_geocode(address, result["lat"], result["lng"], result.get("place_id"),
+                                   result.get("formatted_address"))
+        log_event(log, logging.DEBUG, "geocoded",
+                  f"📍 地理编码: {address} -> {result.get('formatted_address') or ''} "
+                  f"({result['lat']:.5f}, {result['lng']:.5f})",
+                  address=address, lat=result["lat"], lng=result["lng"], place_id=result.get("place_id"))
+        return format_coordinates(result["lat"], result["lng"])
+
+    def stats(self) -> dict:
+        """地理编码请求数、缓存命中数、负缓存命中数、无结果和结果不可信的地址数"""
+        with self._lock:
+            return {"requests": self.requests, "cache_hits": self.cache_hits,
+                    "negative_hits": self.negative_hits, "failed": self.failed, "rejected": self.rejected}
+
+
+class GeocodingDistanceProvider(DistanceProvider):
+    """包装接受坐标的距离提供者：起点和目的地先经过地理编码，矩阵请求按坐标发送
+
+    响应中的行和元素顺序与请求一致，调用方仍然使用原来的地址文本（缓存键和地址格式学习不变）。
+    调用方应先用 geocoder.locate_all 并发解析一轮的所有地址，请求路径上只读取已解析的结果。
+    """
+
+    def __init__(self, inner: DistanceProvider, geocoder: Geocoder):
+        self.inner = inner
+        self.geocoder = geocoder
+        self.name = inner.name
+        self.max_origins_per_request = inner.max_origins_per_request
+        self.max_destinations_per_request = inner.max_destinations_per_request
+        self.max_elements_per_request = inner.max_elements_per_request
+        self.cacheable = inner.cacheable
+        self.metered = inner.metered
+
+    def _queries(self, addresses: List[str]) -> List[str]:
+        return [self.geocoder.locate(address) or address for address in addresses]
+
+    def distance_matrix(self, origins: List[str], destinations: List[str], mode: str = "driving",
+                        units: str = "metric", avoid: str = None) -> dict:
+        return self.inner.distance_matrix(self._queries(origins), self._queries(destinations),
+                                          mode=mode, units=units, avoid=avoid)
+
+    def close(self):
+        self.inner.close()
+
+
+def geocoded(provider: DistanceProvider, cache: DistanceCache = None,
+             scheduler: RequestScheduler = None) -> DistanceProvider:
+    """接受坐标的提供者加上地理编码；不接受坐标、已经包装过或没有坐标来源（无服务也无缓存）时原样返回"""
+    if provider is None or not provider.coordinates or isinstance(provider, GeocodingDistanceProvider):
+        return provider
+    if not provider.geocoding and cache is None:
+        return provider
+    return GeocodingDistanceProvider(provider, Geocoder(provider, cache, scheduler))
@@ -0,0 +1,343 @@
+#!/usr/bin/env python3
+"""
+距离矩阵预计算
+为多个起始地址一次性批量查询到所有候选城市的来回距离和行驶时间，保存为内存映射的距离矩阵，
+供 trip_generator.py、batch_generate.py 和 trip_service.py 通过 --matrix 共享
+"""
+
+import argparse
+import logging
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from batch_generate import load_manifest
+from city_registry import CityRegistry
+from distance_cache import DistanceCache, DEFAULT_CACHE_PATH, DEFAULT_CACHE_TTL_DAYS, DEFAULT_NEGATIVE_TTL_DAYS
+from distance_matrix import MATRIX_DTYPE, MISSING, write_matrix
+from distance_providers import DistanceProvider, build_provider
+from geocoding import geocoded
+from request_scheduler import (DEFAULT_MAX_ELEMENTS_PER_SECOND, DEFAULT_MAX_QPS, ApiBudget, QuotaError,
+                               RequestScheduler, scheduled)
+from run_logging import LOG_FORMATS, configure_logging, log, log_event, summary_log
+from trip_generator import DEFAULT_MAX_WORKERS, TripGenerator, load_env_file
+
+DEFAULT_MATRIX_DIR = "afstandsmatrix"
+
+
+class MatrixBuilder:
+    """用多起点 × 多目的地的批量请求计算距离矩阵
+
+    每个起点由一个 TripGenerator 读写持久化缓存；地址格式学习和负缓存只与城市有关，在所有起点之间共享。
+    按地址格式逐轮查询，待查询城市相同的起点合并到同一批请求中，每个请求尽量填满提供者的元素上限。
+    """
+
+    def __init__(self, origins: List[str], provider: DistanceProvider, cache: DistanceCache = None,
+                 registry: CityRegistry = None, max_workers: int = DEFAULT_MAX_WORKERS,
+                 scheduler: RequestScheduler = None, geocode: bool = True):
+        self.origins = list(dict.fromkeys(origins))
+        # 起点和城市先地理编码（所有起点共享），矩阵请求按坐标发送
+        if geocode:
+            provider = geocoded(provider, cache, scheduler)
+        self.geocoder = getattr(provider, "geocoder", None)
+        self.provider = scheduled(provider, scheduler)
+        self.max_workers = max(1, max_workers)
+        self.generators = [TripGenerator(0, 1, 0, origin, cache=cache, provider=self.provider, registry=registry,
+                                         max_workers=max_workers)
+                           for origin in self.origins]
+        first = self.generators[0]
+        for generator in self.generators[1:]:
+            generator.learned_variants = first.learned_variants
+            generator.known_failures = first.known_failures
+
+        self.cities = list(dict.fromkeys(city for generator in self.generators
+                                         for city in generator._candidate_cities()))
+        shape = (len(self.origins), len(self.cities))
+        self.distances = np.full(shape, MISSING, dtype=MATRIX_DTYPE)
+        self.durations = np.full(shape, MISSING, dtype=MATRIX_DTYPE)
+        self.requests = 0
+        self.cache_hits = 0
+        # API 配额不可用的原因：之后不再发出请求，矩阵不完整
+        self.unavailable = None
+        self._lock = threading.Lock()
+
+    def _read_cache(self) -> Dict[int, List[int]]:
+        """先从持久化缓存填充矩阵，返回仍需查询的 {起点下标: [城市下标]}"""
+        pending = defaultdict(list)
+        for i, generator in enumerate(self.generators):
+            for j, city in enumerate(self.cities):
+                cached = generator._lookup_cache(generator._address_variants(city))
+                if cached is not None:
+                    address, distance_m, duration_s = cached
+                    generator._learn_variant(city, address)
+                    self._set(i, j, distance_m, duration_s)
+                    self.cache_hits += 1
+                elif city not in generator.known_failures:
+                    pending[i].append(j)
+        return pending
+
+    def _set(self, i: int, j: int, distance_m: int, duration_s: int = None):
+        self.distances[i, j] = int(distance_m / 1000 * 2)
+        if duration_s is not None:
+            self.durations[i, j] = duration_s * 2
+
+    def _blocks(self, pending: Dict[int, List[int]]) -> List[Tuple[List[int], List[int]]]:
+        """把待查询的 (起点, 城市) 对分成符合提供者请求上限的 (起点列表, 城市列表) 块"""
+        groups = defaultdict(list)
+        for i, cities in pending.items():
+            groups[tuple(cities)].append(i)
+
+        blocks = []
+        for cities, origins in groups.items():
+            origins_per_request, per_request = self._block_shape(len(origins), len(cities))
+            for start in range(0, len(origins), origins_per_request):
+                for offset in range(0, len(cities), per_request):
+                    blocks.append((origins[start:start + origins_per_request],
+                                   list(cities[offset:offset + per_request])))
+        return blocks
+
+    def _block_shape(self, origins: int, cities: int) -> Tuple[int, int]:
+        """在提供者的上限内选择请求次数最少的 (每次起点数, 每次城市数)"""
+        provider = self.provider
+        best = None
+        for per_origin in range(1, min(origins, provider.max_origins_per_request or origins) + 1):
+            per_request = cities
+            for limit in (provider.max_destinations_per_request,
+                          provider.max_elements_per_request and provider.max_elements_per_request // per_origin):
+                if limit:
+                    per_request = min(per_request, limit)
+            if per_request < 1:
+                break
+            requests = -(-origins // per_origin) * -(-cities // per_request)
+            if best is None or requests < best[0]:
+                best = (requests, per_origin, per_request)
+        return best[1], best[2]
+
+    def _fetch_block(self, origin_ids: List[int], addresses: List[str]) -> List[List[dict]]:
+        """一次矩阵请求，返回每个起点一行元素（请求失败时元素为None）"""
+        generator = self.generators[0]
+        failed = [[None] * len(addresses) for _ in origin_ids]
+        try:
+            result = self.provider.distance_matrix(
+                origins=[self.origins[i] for i in origin_ids],
+                destinations=addresses,
+                mode=generator.mode,
+                units=generator.units,
+                avoid=generator.avoid
+            )
+        except QuotaError as e:
+            with self._lock:
+                self.unavailable = self.unavailable or str(e)
+            return failed
+        except Exception as e:
+            with self._lock:
+                self.requests += 1
+            log_event(log, logging.WARNING, "api_error",
+                      f"⚠️  Matrixverzoek mislukt ({len(origin_ids)}x{len(addresses)}) - {e}",
+                      origins=len(origin_ids), addresses=len(addresses), error=str(e))
+            return failed
+        with self._lock:
+            self.requests += 1
+        if result.get('status') != 'OK' or len(result.get('rows', [])) != len(origin_ids):
+            log_event(log, logging.WARNING, "api_error",
+                      f"⚠️  Matrixverzoek mislukt, API-status: {result.get('status', 'UNKNOWN')}",
+                      origins=len(origin_ids), addresses=len(addresses),
+                      api_status=result.get('status', 'UNKNOWN'))
+            return failed
+        return [row['elements'] for row in result['rows']]
+
+    def build(self):
+        """计算整个矩阵，返回 (距离数组, 行驶时间数组)"""
+        pending = self._read_cache()
+        variants = {j: self.generators[0]._address_variants(self.cities[j])
+                    for j in sorted({j for cities in pending.values() for j in cities})}
+        statuses = defaultdict(list)
+        log_event(log, logging.INFO, "matrix_started",
+                  f"🧮 {len(self.origins)} startlocaties x {len(self.cities)} plaatsen, "
+                  f"{self.cache_hits} uit de cache, {sum(map(len, pending.values()))} op te vragen",
+                  origins=len(self.origins), cities=len(self.cities), cache_hits=self.cache_hits,
+                  pending=sum(map(len, pending.values())))
+
+        variant_index = 0
+        while pending and self.unavailable is None:
+            pending = {i: [j for j in cities if variant_index < len(variants[j])] for i, cities in pending.items()}
+            pending = {i: cities for i, cities in pending.items() if cities}
+            if not pending:
+                break
+
+            # 先并发地理编码起点和本轮的地址，再发送矩阵请求
+            if self.geocoder is not None:
+                try:
+                    self.geocoder.locate_all(
+                        self.origins + [variants[j][variant_index] for cities in pending.values() for j in cities],
+                        self.max_workers)
+                except QuotaError as e:
+                    self.unavailable = str(e)
+                    break
+
+            unresolved = defaultdict(list)
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                futures = {
+                    executor.submit(self._fetch_block, origin_ids,
+                                    [variants[j][variant_index] for j in city_ids]): (origin_ids, city_ids)
+                    for origin_ids, city_ids in self._blocks(pending)
+                }
+                for future in as_completed(futures):
+                    origin_ids, city_ids = futures[future]
+                    for i, elements in zip(origin_ids, future.result()):
+                        generator = self.generators[i]
+                        for j, element in zip(city_ids, elements):
+                            if not generator._element_ok(element):
+                                statuses[i, j].append(element.get('status', 'UNKNOWN') if element else 'ERROR')
+                                unresolved[i].append(j)
+                                continue
+                            address = variants[j][variant_index]
+                            generator._learn_variant(self.cities[j], address)
+                            generator._store_element(address, element)
+                            self._set(i, j, element['distance']['value'], element.get('duration', {}).get('value'))
+
+            pending = {i: sorted(cities) for i, cities in unresolved.items()}
+            variant_index += 1
+
+        # 只有所有起点都无法匹配的城市才写入负缓存（某个起点本身无法识别时不影响其他起点）
+        resolved = (self.distances != MISSING).any(axis=0)
+        for (i, j), city_statuses in statuses.items():
+            if not resolved[j]:
+                self.generators[i]._record_failure(self.cities[j], city_statuses)
+        return self.distances, self.durations
+
+    def save(self, directory: str) -> str:
+        generator = self.generators[0]
+        return write_matrix(directory, self.origins, self.cities, self.distances, self.durations,
+                            mode=generator.mode, units=generator.units, avoid=generator.avoid or "",
+                            distance_provider=self.provider.name)
+
+
+def load_origins(addresses: List[str], manifest: str = None) -> List[str]:
+    """命令行地址和任务清单 (batch_generate.py 格式) 中的起始地址，去重保序"""
+    origins = [address.strip() for address in addresses or [] if address.strip()]
+    if manifest:
+        origins.extend(job["address"] for job in load_manifest(manifest))
+    return list(dict.fromkeys(origins))
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Afstandsmatrix vooraf berekenen voor meerdere startlocaties",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Gebruiksvoorbeelden:
+  python precompute_matrix.py Duiven "Den Haag" Utrecht --output afstandsmatrix
+  python precompute_matrix.py --manifest taken.csv --output afstandsmatrix
+  python batch_generate.py taken.csv --matrix afstandsmatrix
+        """
+    )
+
+    parser.add_argument('addresses', nargs='*', metavar='ADRES', help='Startlocaties')
+    parser.add_argument('--manifest', type=str, metavar='TAKENLIJST',
+                        help='Startlocaties uit een takenlijst van batch_generate.py (kolom address)')
+    parser.add_argument('--output', '-o', type=str, default=DEFAULT_MATRIX_DIR,
+                        help=f'Map voor de matrix (standaard: {DEFAULT_MATRIX_DIR})')
+    parser.add_argument('--google-api-key', type=str, help='Google Maps API sleutel voor echte afstanden')
+    parser.add_argument('--cache-path', type=str, default=DEFAULT_CACHE_PATH,
+                        help=f'Pad naar de afstandscache (standaard: {DEFAULT_CACHE_PATH})')
+    parser.add_argument('--cache-ttl-days', type=float, default=DEFAULT_CACHE_TTL_DAYS,
+                        help=f'Geldigheid van cache-items in dagen (standaard: {DEFAULT_CACHE_TTL_DAYS})')
+    parser.add_argument('--negative-ttl-days', type=float, default=DEFAULT_NEGATIVE_TTL_DAYS,
+                        help='Dagen dat onvindbare plaatsnamen niet opnieuw worden opgevraagd, 0 = uit '
+                             f'(standaard: {DEFAULT_NEGATIVE_TTL_DAYS})')
+    parser.add_argument('--no-cache', action='store_true', help='Afstandscache uitschakelen')
+    parser.add_argument('--distance-provider', choices=['google', 'offline', 'replay'], default='google',
+                        help='Bron van afstanden (standaard: google)')
+    parser.add_argument('--detour-factor', type=float,
+                        help='Omrijfactor voor offline schattingen (standaard: 1.3)')
+    parser.add_argument('--replay-fixture', type=str, metavar='FIXTURE',
+                        help='Opgenomen antwoorden afspelen (met --distance-provider replay)')
+    parser.add_argument('--replay-latency', type=float, default=0.0,
+                        help='Gesimuleerde vertraging per verzoek in seconden bij afspelen (standaard: 0)')
+    parser.add_argument('--workers', type=int, default=DEFAULT_MAX_WORKERS,
+                        help=f'Maximaal aantal gelijktijdige API-verzoeken (standaard: {DEFAULT_MAX_WORKERS})')
+    parser.add_argument('--api-budget', type=int, metavar='ELEMENTEN',
+                        help='Maximaal aantal API-elementen voor deze run (standaard: onbeperkt)')
+    parser.add_argument('--max-qps', type=float, default=DEFAULT_MAX_QPS,
+                        help=f'Maximaal aantal API-verzoeken per seconde (standaard: {DEFAULT_MAX_QPS})')
+    parser.add_argument('--max-elements-per-second', type=float, default=DEFAULT_MAX_ELEMENTS_PER_SECOND,
+                        help=f'Maximaal aantal API-elementen per seconde '
+                             f'(standaard: {DEFAULT_MAX_ELEMENTS_PER_SECOND})')
+    parser.add_argument('--no-geocode', action='store_true',
+                        help='Adressen niet geocoderen (afstanden opvragen met de adrestekst)')
+    parser.add_argument('--log-format', choices=LOG_FORMATS, default='text',
+                        help='Uitvoerformaat: text (leesbaar) of json (één JSON-regel per gebeurtenis)')
+    parser.add_argument('--quiet', '-q', action='store_true', help='Alleen waarschuwingen en de samenvatting tonen')
+
+    args = parser.parse_args()
+
+    configure_logging(args.log_format, quiet=args.quiet)
+    load_env_file()
+
+    if args.distance_provider == 'replay' and not args.replay_fixture:
+        parser.error('--distance-provider replay vereist --replay-fixture')
+    try:
+        origins = load_origins(args.addresses, args.manifest)
+    except (OSError, ValueError) as e:
+        parser.error(f'--manifest: {e}')
+    if not origins:
+        parser.error('geef minimaal één startlocatie op (als argument of met --manifest)')
+    if args.api_budget is not None and args.api_budget < 0:
+        parser.error('--api-budget mag niet negatief zijn')
+    if args.max_qps <= 0 or args.max_elements_per_second <= 0:
+        parser.error('--max-qps en --max-elements-per-second moeten groter dan 0 zijn')
+
+    provider = build_provider({
+        "distance_provider": args.distance_provider,
+        "detour_factor": args.detour_factor,
+        "replay_fixture": args.replay_fixture,
+        "replay_latency": args.replay_latency,
+        "google_api_key": args.google_api_key,
+    })
+    if provider is None:
+        parser.error('geen Google Maps API sleutel gevonden (gebruik --google-api-key of GOOGLE_MAPS_API_KEY)')
+    cache = None
+    if not args.no_cache:
+        cache = DistanceCache(args.cache_path, ttl_days=args.cache_ttl_days,
+                              negative_ttl_days=args.negative_ttl_days)
+
+    started = time.perf_counter()
+    try:
+        scheduler = RequestScheduler(args.max_qps, args.max_elements_per_second, ApiBudget(args.api_budget))
+        builder = MatrixBuilder(origins, provider, cache, max_workers=args.workers, scheduler=scheduler,
+                                geocode=not args.no_geocode)
+        distances, _ = builder.build()
+        # 不完整的矩阵会把未查询的城市当作无法解析，因此不保存；已查询的距离在缓存中，下次运行不再请求
+        if builder.unavailable is None:
+            builder.save(args.output)
+    finally:
+        provider.close()
+        if cache is not None:
+            cache.close()
+
+    if builder.unavailable is not None:
+        kept = "staan in de cache; draai opnieuw om verder te gaan" if cache is not None else "zijn niet bewaard"
+        log_event(summary_log, logging.ERROR, "matrix_incomplete",
+                  f"❌ Afstandsmatrix niet opgeslagen: {builder.unavailable}. "
+                  f"De resultaten van {builder.requests} API-verzoeken {kept}",
+                  reason=builder.unavailable, requests=builder.requests, api=scheduler.stats())
+        raise SystemExit(1)
+
+    missing = int(np.count_nonzero(distances == MISSING))
+    log_event(summary_log, logging.INFO, "matrix_saved",
+              f"💾 Afstandsmatrix opgeslagen in {args.output}: {len(builder.origins)} startlocaties x "
+              f"{len(builder.cities)} plaatsen, {builder.requests} API-verzoeken, {builder.cache_hits} uit de cache, "
+              f"{missing} onbekend ({time.perf_counter() - started:.1f}s)",
+              directory=args.output, origins=len(builder.origins), cities=len(builder.cities),
+              requests=builder.requests, cache_hits=builder.cache_hits, missing=missing,
+              geocoding=builder.geocoder.stats() if builder.geocoder is not None else None,
+              seconds=round(time.perf_counter() - started, 3))
+
+
+if __name__ == "__main__":
+    main()
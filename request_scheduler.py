@@ -0,0 +1,218 @@
+"""
+API 请求调度
+位于计费的距离提供者之前：用令牌桶限制每秒请求数和每秒元素数，配额错误时按带随机抖动的指数退避重试，
+并限制每次运行最多使用的元素数；预算用完或配额持续不可用后不再发出请求，运行改用缓存中已有的距离
+"""
+
+import logging
+import random
+import threading
+import time
+from typing import Callable, List
+
+from distance_providers import DistanceProvider
+from run_logging import log, log_event
+
+# Google Distance Matrix API 的默认速率上限：每秒请求数和每秒元素数（起点数 × 目的地数）
+DEFAULT_MAX_QPS = 50
+DEFAULT_MAX_ELEMENTS_PER_SECOND = 1000
+
+# 配额错误的退避：第 n 次重试前等待 0 ~ min(上限, 基数 × 2^n) 秒之间的随机时长
+DEFAULT_MAX_RETRIES = 5
+DEFAULT_BACKOFF_BASE = 0.5
+DEFAULT_BACKOFF_MAX = 30.0
+
+# 表示配额用完的 API 状态：OVER_QUERY_LIMIT 通常是暂时的（退避后重试），OVER_DAILY_LIMIT 当天不会恢复
+RETRYABLE_STATUSES = ("OVER_QUERY_LIMIT",)
+QUOTA_STATUSES = ("OVER_QUERY_LIMIT", "OVER_DAILY_LIMIT")
+
+
+class QuotaError(Exception):
+    """API 配额不可用（退避重试后仍超出配额），之后的请求也不会成功"""
+
+
+class BudgetExhausted(QuotaError):
+    """本次运行的元素预算已用完，请求没有发出"""
+
+
+class TokenBucket:
+    """线程安全的令牌桶：每秒补充 rate 个令牌，最多积累 capacity 个（默认一秒的量）
+
+    令牌不足时预先扣除并等待到令牌补足为止，多个线程按到达顺序排队；
+    单次需要的令牌数超过容量时同样只需等待，不会永久阻塞。
+    """
+
+    def __init__(self, rate: float, capacity: float = None):
+        self.rate = rate
+        self.capacity = capacity or rate
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: float = 1) -> float:
+        """取出 tokens 个令牌，返回等待的秒数"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= tokens
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        if wait:
+            time.sleep(wait)
+        return wait
+
+
+class ApiBudget:
+    """每次运行可以使用的元素总数，limit 为 None 表示不限制
+
+    counter 为 multiprocessing.Value 时，多个进程共享同一份预算（批量生成）。
+    """
+
+    def __init__(self, limit: int = None, counter=None):
+        self.limit = limit
+        self._counter = counter
+        self._spent = 0
+        self._lock = counter.get_lock() if counter is not None else threading.Lock()
+
+    @property
+    def spent(self) -> int:
+        return self._counter.value if self._counter is not None else self._spent
+
+    @property
+    def remaining(self) -> int:
+        return None if self.limit is None else max(0, self.limit - self.spent)
+
+    def spend(self, elements: int) -> bool:
+        """预算足够时记入 elements 个元素并返回True，否则不记入并返回False"""
+        with self._lock:
+            spent = self.spent + elements
+            if self.limit is not None and spent > self.limit:
+                return False
+            if self._counter is not None:
+                self._counter.value = spent
+            else:
+                self._spent = spent
+            return True
+
+
+class RequestScheduler:
+    """在速率和预算限制下执行 API 请求，配额错误时退避重试
+
+    预算在请求发出前按元素数扣除，退避重试不重复扣除；预算不足或重试后仍超出配额时抛出 QuotaError，
+    此后的请求直接抛出同一错误，调用方据此改用缓存中的数据。
+    """
+
+    def __init__(self, max_qps: float = DEFAULT_MAX_QPS,
+                 max_elements_per_second: float = DEFAULT_MAX_ELEMENTS_PER_SECOND,
+                 budget: ApiBudget = None, max_retries: int = DEFAULT_MAX_RETRIES,
+                 backoff_base: float = DEFAULT_BACKOFF_BASE, backoff_max: float = DEFAULT_BACKOFF_MAX):
+        self.requests = TokenBucket(max_qps) if max_qps else None
+        self.elements = TokenBucket(max_elements_per_second) if max_elements_per_second else None
+        self.budget = budget or ApiBudget()
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.unavailable = None
+        self.counts = {"requests": 0, "elements": 0, "quota_retries": 0, "refused": 0}
+        self.throttled_seconds = 0.0
+        self._lock = threading.Lock()
+        # 退避抖动使用独立的随机数流，不影响生成器的种子
+        self._jitter = random.Random()
+
+    def _count(self, name: str, amount: int = 1):
+        with self._lock:
+            self.counts[name] += amount
+
+    def _throttle(self, elements: int):
+        waited = 0.0
+        if self.requests is not None:
+            waited += self.requests.acquire()
+        if self.elements is not None:
+            waited += self.elements.acquire(elements)
+        if waited:
+            with self._lock:
+                self.throttled_seconds += waited
+
+    def _give_up(self, error: QuotaError):
+        """记住第一个配额错误并抛出（由调用方记录日志并改用缓存）"""
+        with self._lock:
+            if self.unavailable is None:
+                self.unavailable = error
+        raise error
+
+    def call(self, request: Callable[[], dict], elements: int) -> dict:
+        """执行 request()（一次包含 elements 个元素的矩阵请求），返回其结果"""
+        if self.unavailable is not None:
+            self._count("refused")
+            raise type(self.unavailable)(str(self.unavailable))
+        if not self.budget.spend(elements):
+            self._count("refused")
+            self._give_up(BudgetExhausted(f"API预算已用完 ({self.budget.spent}/{self.budget.limit}个元素)"))
+
+        status = None
+        for attempt in range(self.max_retries + 1):
+            self._throttle(elements)
+            self._count("requests")
+            try:
+                result = request()
+            except Exception as e:
+                # googlemaps 把配额错误作为带 status 属性的 ApiError 抛出
+                status = getattr(e, "status", None)
+                if status not in QUOTA_STATUSES:
+                    raise
+            else:
+                status = result.get("status") if isinstance(result, dict) else None
+                if status not in QUOTA_STATUSES:
+                    self._count("elements", elements)
+                    return result
+
+            if status not in RETRYABLE_STATUSES or attempt == self.max_retries:
+                break
+            delay = self._jitter.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+            self._count("quota_retries")
+            log_event(log, logging.WARNING, "api_backoff",
+                      f"⏳ API配额错误 ({status})，{delay:.1f}秒后重试 ({attempt + 1}/{self.max_retries})",
+                      status=status, attempt=attempt + 1, delay_s=round(delay, 3))
+            time.sleep(delay)
+
+        self._give_up(QuotaError(f"API配额不可用 ({status})"))
+
+    def stats(self) -> dict:
+        """请求数、成功的元素数、退避重试次数、拒绝的请求数、限速等待时间和预算使用情况"""
+        with self._lock:
+            stats = dict(self.counts)
+            stats["throttled_seconds"] = round(self.throttled_seconds, 3)
+        stats.update(budget=self.budget.limit, budget_spent=self.budget.spent,
+                     unavailable=str(self.unavailable) if self.unavailable is not None else None)
+        return stats
+
+
+class ScheduledDistanceProvider(DistanceProvider):
+    """包装计费的距离提供者，所有请求都经过 RequestScheduler"""
+
+    def __init__(self, inner: DistanceProvider, scheduler: RequestScheduler):
+        self.inner = inner
+        self.scheduler = scheduler
+        self.name = inner.name
+        self.max_origins_per_request = inner.max_origins_per_request
+        self.max_destinations_per_request = inner.max_destinations_per_request
+        self.max_elements_per_request = inner.max_elements_per_request
+        self.cacheable = inner.cacheable
+        self.metered = inner.metered
+
+    def distance_matrix(self, origins: List[str], destinations: List[str], mode: str = "driving",
+                        units: str = "metric", avoid: str = None) -> dict:
+        return self.scheduler.call(
+            lambda: self.inner.distance_matrix(origins, destinations, mode=mode, units=units, avoid=avoid),
+            len(origins) * len(destinations))
+
+    def close(self):
+        self.inner.close()
+
+
+def scheduled(provider: DistanceProvider, scheduler: RequestScheduler) -> DistanceProvider:
+    """计费的提供者加上请求调度；离线估算、回放等本地提供者和已调度的提供者原样返回"""
+    if (provider is None or scheduler is None or not provider.metered
+            or isinstance(provider, ScheduledDistanceProvider)):
+        return provider
+    return ScheduledDistanceProvider(provider, scheduler)
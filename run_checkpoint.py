@@ -0,0 +1,58 @@
+"""
+运行检查点
+把长时间运行的生成状态（已接受的行程、使用次数、日期计数、各类距离累计、已解析的距离和随机数状态）
+定期保存为 gzip 压缩的 JSON 文件，中断后可以从同一位置继续而不重复调用API
+"""
+
+import gzip
+import json
+import os
+from datetime import datetime
+
+# 检查点格式版本，结构不兼容地变化时递增
+CHECKPOINT_VERSION = 1
+
+# 默认每接受多少次行程保存一次
+DEFAULT_CHECKPOINT_EVERY = 100
+
+
+def encode_random_state(state: tuple) -> list:
+    """random.getstate() 转为可写入 JSON 的列表"""
+    version, internal, gauss_next = state
+    return [version, list(internal), gauss_next]
+
+
+def decode_random_state(state: list) -> tuple:
+    """encode_random_state() 的逆操作，结果可直接传给 random.setstate()"""
+    version, internal, gauss_next = state
+    return version, tuple(internal), gauss_next
+
+
+def save_checkpoint(path: str, state: dict) -> str:
+    """原子地写入检查点：先写临时文件再替换，进程在写入中途退出也不会留下损坏的文件"""
+    payload = dict(state)
+    payload["version"] = CHECKPOINT_VERSION
+    payload["saved_at"] = datetime.now().isoformat(timespec="seconds")
+
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    temporary = f"{path}.tmp"
+    with gzip.open(temporary, "wt", encoding="utf-8") as f:
+        json.dump(payload, f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(temporary, path)
+    return path
+
+
+def load_checkpoint(path: str) -> dict:
+    """读取检查点，版本不匹配时抛出 ValueError"""
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        state = json.load(f)
+    if state.get("version") != CHECKPOINT_VERSION:
+        raise ValueError(f"checkpoint {path} heeft versie {state.get('version')}, "
+                         f"verwacht versie {CHECKPOINT_VERSION}")
+    return state
+
+
+def mismatched_parameters(saved: dict, current: dict) -> list:
+    """返回检查点与当前运行参数不一致的字段名"""
+    return sorted(key for key in set(saved) | set(current) if saved.get(key) != current.get(key))
@@ -0,0 +1,178 @@
+"""
+运行日志
+基于标准 logging 的分级事件流：文本格式输出原有的表情符号控制台信息，JSON 格式每个事件一行，
+便于日志聚合；另提供一个在终端中原地刷新的单行进度指示
+"""
+
+import json
+import logging
+import sys
+import time
+from datetime import datetime
+
+# 所有事件都记录在这个日志器下；统计汇总使用子日志器，--quiet 时仍然输出
+LOGGER_NAME = "trip_generator"
+SUMMARY_LOGGER_NAME = f"{LOGGER_NAME}.summary"
+
+LOG_FORMATS = ("text", "json")
+
+log = logging.getLogger(LOGGER_NAME)
+summary_log = logging.getLogger(SUMMARY_LOGGER_NAME)
+
+# 当前显示中的进度指示（输出日志前先清除这一行）
+_active_progress = None
+_progress_enabled = True
+
+
+def log_event(logger: logging.Logger, level: int, event: str, message: str, **fields):
+    """记录一个事件：message 是文本格式下显示的内容，fields 是 JSON 格式下附带的结构化字段"""
+    if logger.isEnabledFor(level):
+        logger.log(level, message, extra={"event": event, "fields": fields})
+
+
+class JsonFormatter(logging.Formatter):
+    """每条记录输出为一行 JSON：时间、级别、事件名、文本和结构化字段"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "time": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname.lower(),
+            "logger": record.name,
+            "event": getattr(record, "event", "message"),
+            "message": record.getMessage().strip(),
+        }
+        payload.update(getattr(record, "fields", {}))
+        if record.exc_info:
+            payload["exception"] = self.formatException(record.exc_info)
+        return json.dumps(payload, ensure_ascii=False, default=str)
+
+
+class ConsoleHandler(logging.Handler):
+    """写到当前的 sys.stdout（因此 redirect_stdout 可以捕获）
+
+    普通记录不逐条 flush，由输出流自身缓冲；警告及以上立即刷新。
+    """
+
+    def emit(self, record: logging.LogRecord):
+        try:
+            message = self.format(record)
+            if _active_progress is not None:
+                _active_progress.clear()
+            stream = sys.stdout
+            stream.write(message + "\n")
+            if record.levelno >= logging.WARNING:
+                stream.flush()
+        except Exception:
+            self.handleError(record)
+
+    def flush(self):
+        sys.stdout.flush()
+
+
+class RecordBuffer(logging.Handler):
+    """把日志记录收集为可 pickle 的字典，工作进程据此把输出交回主进程，由主进程的控制台处理器输出"""
+
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record: logging.LogRecord):
+        data = dict(record.__dict__)
+        data["msg"] = record.getMessage()
+        data["args"] = None
+        if record.exc_info:
+            data["exc_text"] = logging.Formatter().formatException(record.exc_info)
+            data["exc_info"] = None
+        self.records.append(data)
+
+    def drain(self) -> list:
+        """取出并清空已收集的记录"""
+        records, self.records = self.records, []
+        return records
+
+
+def replay_records(records: list):
+    """在当前进程中按原日志器重新输出 RecordBuffer 收集的记录（遵循当前的级别、格式和 --quiet）"""
+    for data in records:
+        record = logging.makeLogRecord(data)
+        logger = logging.getLogger(record.name)
+        if logger.isEnabledFor(record.levelno):
+            logger.handle(record)
+
+
+def configure_logging(log_format: str = "text", quiet: bool = False, verbose: bool = False,
+                      progress: bool = True, handler: logging.Handler = None) -> logging.Logger:
+    """配置控制台输出
+
+    默认输出 INFO 及以上（每次行程一行），verbose 时包括每个地址格式的查询细节，
+    quiet 时只输出警告和统计汇总；JSON 格式或 progress=False 时不显示进度指示。
+    handler 替代控制台处理器（例如工作进程中的 RecordBuffer）。
+    """
+    global _progress_enabled
+    if log_format not in LOG_FORMATS:
+        raise ValueError(f"Onbekend logformaat: {log_format} (kies uit: {', '.join(LOG_FORMATS)})")
+
+    handler = handler or ConsoleHandler()
+    handler.setFormatter(JsonFormatter() if log_format == "json" else logging.Formatter("%(message)s"))
+    for existing in list(log.handlers):
+        log.removeHandler(existing)
+    log.addHandler(handler)
+    log.propagate = False
+    log.setLevel(logging.DEBUG if verbose else logging.WARNING if quiet else logging.INFO)
+    summary_log.setLevel(logging.INFO)
+
+    _progress_enabled = progress and log_format == "text"
+    return log
+
+
+class ProgressIndicator:
+    """单行进度指示：在终端 (stderr) 中原地刷新，最多每 interval 秒重绘一次；非终端或 JSON 格式时不输出"""
+
+    def __init__(self, label: str, total: float, unit: str = "", stream=None, interval: float = 0.1):
+        self.label = label
+        self.total = total
+        self.unit = unit
+        self.stream = stream or sys.stderr
+        self.interval = interval
+        self.enabled = _progress_enabled and getattr(self.stream, "isatty", lambda: False)()
+        self._last_render = 0.0
+        self._width = 0
+        self._line = ""
+        if self.enabled:
+            global _active_progress
+            _active_progress = self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def update(self, current: float, detail: str = ""):
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        if now - self._last_render < self.interval and current < self.total:
+            return
+        self._last_render = now
+        percent = min(100.0, current / self.total * 100) if self.total else 100.0
+        self._line = f"⏳ {self.label}: {current}/{self.total}{self.unit} ({percent:.0f}%) {detail}".rstrip()
+        self._render()
+
+    def _render(self):
+        self.stream.write("\r" + self._line.ljust(self._width))
+        self.stream.flush()
+        self._width = len(self._line)
+
+    def clear(self):
+        """清除当前行；下一次（按间隔节流的）update 时重新绘制"""
+        if self.enabled and self._width:
+            self.stream.write("\r" + " " * self._width + "\r")
+            self.stream.flush()
+            self._width = 0
+
+    def close(self):
+        global _active_progress
+        self.clear()
+        if _active_progress is self:
+            _active_progress = None
@@ -0,0 +1,103 @@
+"""
+运行指标
+统计一次生成过程中的计数（API调用、地址格式重试、失败查询、循环次数等）和各阶段耗时，
+可导出为 JSON 报告；可选地用 cProfile 包装整个运行
+"""
+
+import functools
+import json
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Iterable
+
+# 报告中始终出现的计数器（即使为0）
+DEFAULT_COUNTERS = (
+    "api_calls", "api_errors", "address_variant_retries", "cache_hits", "failed_lookups",
+    "learned_variant_hits", "negative_cache_hits", "checkpoints_saved",
+    "distance_lookups", "distance_memo_hits", "loop_iterations", "skipped_destinations",
+    "date_samples", "date_sampling_failures",
+)
+
+
+class RunMetrics:
+    """线程安全的计数器和分阶段计时器
+
+    阶段耗时按名称累加，同一阶段可以进入多次；阶段可以嵌套，各自独立计时。
+    """
+
+    def __init__(self, counters: Iterable[str] = DEFAULT_COUNTERS):
+        self.started_at = datetime.now()
+        self.counters: Dict[str, int] = {name: 0 for name in counters}
+        self.timings: Dict[str, float] = {}
+        self.calls: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._started = time.perf_counter()
+
+    def increment(self, name: str, amount: int = 1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def count(self, name: str) -> int:
+        return self.counters.get(name, 0)
+
+    @contextmanager
+    def phase(self, name: str):
+        """计时一个阶段：with metrics.phase("export"): ..."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                self.timings[name] = self.timings.get(name, 0.0) + elapsed
+                self.calls[name] = self.calls.get(name, 0) + 1
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            return {
+                "started_at": self.started_at.isoformat(timespec="seconds"),
+                "elapsed_seconds": round(time.perf_counter() - self._started, 6),
+                "counters": dict(sorted(self.counters.items())),
+                "phases": {
+                    name: {"seconds": round(seconds, 6), "calls": self.calls[name]}
+                    for name, seconds in sorted(self.timings.items())
+                },
+            }
+
+    def write_json(self, filename: str, extra: dict = None) -> str:
+        """把指标写入 JSON 文件，extra 中的字段（如运行参数）一并写入"""
+        report = dict(extra or {})
+        report.update(self.to_dict())
+        with open(filename, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        return filename
+
+
+@contextmanager
+def profiled(filename: str = None):
+    """可选地用 cProfile 包装一段代码，结束时把统计结果保存到 filename（pstats 格式）"""
+    if not filename:
+        yield None
+        return
+
+    import cProfile
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield profiler
+    finally:
+        profiler.disable()
+        profiler.dump_stats(filename)
+
+
+def timed(phase_name: str):
+    """方法装饰器：把方法的耗时计入 self.metrics 的某个阶段"""
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            with self.metrics.phase(phase_name):
+                return method(self, *args, **kwargs)
+        return wrapper
+    return decorator
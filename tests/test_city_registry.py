@@ -0,0 +1,67 @@
+"""
+城市注册表测试：Fenwick 加权抽样、移除和城市使用次数
+"""
+
+import os
+import random
+import sys
+from collections import Counter
+
+# 项目根目录（本文件位于 tests/ 下）
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from city_registry import CityRegistry, CityUsage, FenwickSampler  # noqa: E402
+
+
+def test_prefix_sums_match_weights():
+    weights = [3, 0, 1, 4, 1, 5, 9, 2, 6]
+    sampler = FenwickSampler(weights)
+    assert [sampler.prefix(i) for i in range(len(weights) + 1)] == [sum(weights[:i]) for i in range(len(weights) + 1)]
+    assert sampler.total(2, 6) == sum(weights[2:6])
+    sampler.set_weight(3, 10)
+    assert sampler.total() == sum(weights) + 6
+
+
+def test_sampling_follows_weights():
+    sampler = FenwickSampler([1, 0, 2, 7], rng=random.Random(1))
+    draws = Counter(sampler.sample() for _ in range(20000))
+    assert draws[1] == 0
+    assert abs(draws[0] / 20000 - 0.1) < 0.02
+    assert abs(draws[2] / 20000 - 0.2) < 0.02
+    assert abs(draws[3] / 20000 - 0.7) < 0.02
+
+
+def test_sampling_within_a_range():
+    sampler = FenwickSampler([5] * 10, rng=random.Random(2))
+    assert {sampler.sample(3, 6) for _ in range(500)} == {3, 4, 5}
+    assert sampler.sample(4, 4) is None
+
+
+def test_removed_elements_are_never_sampled():
+    sampler = FenwickSampler([1] * 16, rng=random.Random(3))
+    for i in range(0, 16, 2):
+        sampler.remove(i)
+    assert sampler.total() == 8
+    assert {sampler.sample() for _ in range(1000)} == set(range(1, 16, 2))
+    for i in range(1, 16, 2):
+        sampler.remove(i)
+    assert sampler.sample() is None
+
+
+def test_copy_is_independent():
+    sampler = FenwickSampler([1, 1, 1], rng=random.Random(4))
+    clone = sampler.copy()
+    clone.remove(0)
+    assert sampler.total() == 3
+    assert clone.total() == 2
+
+
+def test_usage_removes_cities_at_the_cap_and_on_failure():
+    registry = CityRegistry({"Gelderland": ["Duiven", "Zevenaar", "Duiven"], "Utrecht": ["Zeist"]})
+    assert registry.names == ["Duiven", "Zevenaar", "Zeist"]
+    usage = CityUsage(registry, max_per_destination=2, rng=random.Random(5))
+    assert [usage.record("Duiven") for _ in range(2)] == [1, 2]
+    assert not usage.is_available("Duiven")
+    usage.fail("Zeist")
+    assert {usage.sample() for _ in range(100)} == {"Zevenaar"}
+    assert usage.as_dict() == {"Duiven": 2}
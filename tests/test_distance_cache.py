@@ -0,0 +1,31 @@
+"""
+距离缓存测试
+"""
+
+import os
+import sys
+import time
+
+# 项目根目录（本文件位于 tests/ 下）
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from distance_cache import DistanceCache  # noqa: E402
+
+
+def test_disabled_negative_cache_keeps_failures(tmp_path):
+    """关闭负缓存 (negative_ttl_days=0) 的运行不能清空其他运行使用的 failures 表"""
+    path = str(tmp_path / "cache.sqlite")
+    cache = DistanceCache(path, negative_ttl_days=30)
+    cache.put_failure("Nergenshuizen", "NOT_FOUND")
+    with cache._lock:
+        cache._conn.execute("UPDATE failures SET created_at = ?", (time.time() - 86400,))
+        cache._conn.commit()
+    cache.close()
+
+    disabled = DistanceCache(path, negative_ttl_days=0)
+    assert disabled.failures() == {}
+    disabled.close()
+
+    cache = DistanceCache(path, negative_ttl_days=30)
+    assert cache.failures() == {"Nergenshuizen": "NOT_FOUND"}
+    cache.close()
@@ -0,0 +1,79 @@
+"""
+地理编码测试
+"""
+
+import os
+import sys
+import time
+
+# 项目根目录（本文件位于 tests/ 下）
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from distance_cache import DistanceCache  # noqa: E402
+from distance_providers import DistanceProvider  # noqa: E402
+from geocoding import Geocoder  # noqa: E402
+
+
+class FakeGeocodingProvider(DistanceProvider):
+    """按地址返回预设地理编码结果的提供者，记录每次请求"""
+
+    name = "fake"
+    coordinates = True
+    geocoding = True
+
+    RESULTS = {
+        "Duiven": {"lat": 51.947, "lng": 6.019, "types": ["locality", "political"]},
+        "Zwolel": {"lat": 52.516, "lng": 6.083, "partial_match": True, "types": ["locality"]},
+        "Gelderland": {"lat": 52.045, "lng": 5.871, "types": ["administrative_area_level_1"]},
+    }
+
+    def __init__(self):
+        self.calls = []
+
+    def geocode(self, address: str) -> dict:
+        self.calls.append(address)
+        return self.RESULTS.get(address)
+
+
+def test_rejected_and_missing_geocodes_are_negatively_cached(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    provider = FakeGeocodingProvider()
+    cache = DistanceCache(path, negative_ttl_days=30)
+    geocoder = Geocoder(provider, cache)
+    addresses = ["Duiven", "Zwolel", "Gelderland", "Nergenshuizen"]
+    assert [geocoder.locate(address) for address in addresses] == ["51.947000,6.019000", None, None, None]
+    assert cache.get_geocode_failure("Zwolel") == "PARTIAL_MATCH"
+    assert cache.get_geocode_failure("Gelderland") == "REJECTED_TYPE"
+    assert cache.get_geocode_failure("Nergenshuizen") == "ZERO_RESULTS"
+    cache.close()
+
+    # 下一次运行：成功结果来自 geocodes，失败结果来自负缓存，不再请求
+    cache = DistanceCache(path, negative_ttl_days=30)
+    geocoder = Geocoder(provider, cache)
+    assert [geocoder.locate(address) for address in addresses] == ["51.947000,6.019000", None, None, None]
+    assert provider.calls == addresses
+    assert geocoder.stats()["negative_hits"] == 3
+    cache.close()
+
+
+def test_expired_geocode_failures_are_retried(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    cache = DistanceCache(path, negative_ttl_days=30)
+    cache.put_geocode_failure("Nergenshuizen", "ZERO_RESULTS")
+    with cache._lock:
+        cache._conn.execute("UPDATE geocode_failures SET created_at = ?", (time.time() - 31 * 86400,))
+        cache._conn.commit()
+    provider = FakeGeocodingProvider()
+    assert Geocoder(provider, cache).locate("Nergenshuizen") is None
+    assert provider.calls == ["Nergenshuizen"]
+    cache.close()
+
+
+def test_disabled_negative_cache_does_not_record_geocode_failures(tmp_path):
+    cache = DistanceCache(str(tmp_path / "cache.sqlite"), negative_ttl_days=0)
+    provider = FakeGeocodingProvider()
+    geocoder = Geocoder(provider, cache)
+    geocoder.locate("Nergenshuizen")
+    assert Geocoder(provider, cache).locate("Nergenshuizen") is None
+    assert provider.calls == ["Nergenshuizen", "Nergenshuizen"]
+    cache.close()
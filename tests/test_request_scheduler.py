@@ -0,0 +1,130 @@
+"""
+API 请求调度测试：令牌桶限速、配额错误的指数退避和元素预算
+"""
+
+import multiprocessing
+import os
+import sys
+
+import pytest
+
+# 项目根目录（本文件位于 tests/ 下）
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import request_scheduler  # noqa: E402
+from request_scheduler import ApiBudget, BudgetExhausted, QuotaError, RequestScheduler, TokenBucket  # noqa: E402
+
+
+class ScriptedRequest:
+    """依次返回预设的 API 状态（最后一个状态重复），记录调用次数"""
+
+    def __init__(self, *statuses):
+        self.statuses = list(statuses)
+        self.calls = 0
+
+    def __call__(self):
+        status = self.statuses[min(self.calls, len(self.statuses) - 1)]
+        self.calls += 1
+        return {"status": status, "rows": []}
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    """不真正等待，记录退避时长"""
+    delays = []
+    monkeypatch.setattr(request_scheduler.time, "sleep", delays.append)
+    return delays
+
+
+def test_token_bucket_waits_when_empty():
+    bucket = TokenBucket(rate=20, capacity=2)
+    assert bucket.acquire() == 0
+    assert bucket.acquire() == 0
+    assert 0.03 < bucket.acquire() <= 0.05
+    # 超过容量的单次请求只需等待，不会永久阻塞
+    assert TokenBucket(rate=1000, capacity=1).acquire(5) <= 0.005
+
+
+def test_quota_errors_are_retried_with_bounded_backoff(sleeps):
+    scheduler = RequestScheduler(max_qps=0, max_elements_per_second=0, max_retries=5,
+                                 backoff_base=0.5, backoff_max=1.0)
+    request = ScriptedRequest("OVER_QUERY_LIMIT", "OVER_QUERY_LIMIT", "OVER_QUERY_LIMIT", "OK")
+    assert scheduler.call(request, 10)["status"] == "OK"
+    assert request.calls == 4
+    assert len(sleeps) == 3
+    assert all(0 <= delay <= limit for delay, limit in zip(sleeps, (0.5, 1.0, 1.0)))
+    stats = scheduler.stats()
+    assert stats["quota_retries"] == 3
+    assert stats["requests"] == 4
+    # 重试不重复扣除预算，只有成功的请求计入元素数
+    assert stats["elements"] == 10
+    assert stats["budget_spent"] == 10
+
+
+def test_quota_error_after_retries_disables_further_requests(sleeps):
+    scheduler = RequestScheduler(max_qps=0, max_elements_per_second=0, max_retries=2, backoff_base=0.01)
+    request = ScriptedRequest("OVER_QUERY_LIMIT")
+    with pytest.raises(QuotaError):
+        scheduler.call(request, 1)
+    assert request.calls == 3
+
+    later = ScriptedRequest("OK")
+    with pytest.raises(QuotaError):
+        scheduler.call(later, 1)
+    assert later.calls == 0
+    assert scheduler.stats()["refused"] == 1
+
+
+def test_daily_limit_is_not_retried(sleeps):
+    scheduler = RequestScheduler(max_qps=0, max_elements_per_second=0)
+    request = ScriptedRequest("OVER_DAILY_LIMIT")
+    with pytest.raises(QuotaError):
+        scheduler.call(request, 1)
+    assert request.calls == 1
+    assert sleeps == []
+
+
+def test_api_error_with_quota_status_is_retried(sleeps):
+    class ApiError(Exception):
+        status = "OVER_QUERY_LIMIT"
+
+    calls = []
+
+    def request():
+        calls.append(1)
+        if len(calls) == 1:
+            raise ApiError()
+        return {"status": "OK"}
+
+    scheduler = RequestScheduler(max_qps=0, max_elements_per_second=0, backoff_base=0.01)
+    assert scheduler.call(request, 1) == {"status": "OK"}
+    assert len(calls) == 2
+
+
+def test_budget_exhaustion_stops_requests():
+    budget = ApiBudget(10)
+    scheduler = RequestScheduler(max_qps=0, max_elements_per_second=0, budget=budget)
+    assert scheduler.call(ScriptedRequest("OK"), 6)["status"] == "OK"
+
+    request = ScriptedRequest("OK")
+    with pytest.raises(BudgetExhausted):
+        scheduler.call(request, 5)
+    assert request.calls == 0
+    assert budget.spent == 6
+    assert budget.remaining == 4
+
+    # 预算用完后，即使剩余的元素足够，之后的请求也不再发出
+    with pytest.raises(BudgetExhausted):
+        scheduler.call(request, 1)
+    assert request.calls == 0
+
+
+def test_budget_is_shared_through_a_counter():
+    counter = multiprocessing.Value("q", 0)
+    first, second = ApiBudget(10, counter), ApiBudget(10, counter)
+    assert first.spend(7)
+    assert not second.spend(4)
+    assert second.spend(3)
+    assert first.remaining == 0
+    assert counter.value == 10
+    assert ApiBudget().spend(10 ** 9)
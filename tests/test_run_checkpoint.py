@@ -0,0 +1,89 @@
+"""
+检查点测试：中断后从检查点继续 (--resume)，结果与同一种子未中断的运行相同
+"""
+
+import csv
+import logging
+import os
+import subprocess
+import sys
+
+import pytest
+
+# 项目根目录（本文件位于 tests/ 下）
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from run_checkpoint import load_checkpoint  # noqa: E402
+from run_logging import configure_logging, summary_log  # noqa: E402
+from trip_generator import TripGenerator  # noqa: E402
+
+SEED = 11
+TARGET_KM = 8000
+
+
+class InterruptedTripGenerator(TripGenerator):
+    """抽取第 interrupt_after 个日期时模拟中断 (Ctrl+C)"""
+
+    interrupt_after = 25
+
+    def _generate_valid_date(self, calendar):
+        self.interrupt_after -= 1
+        if self.interrupt_after < 0:
+            raise KeyboardInterrupt
+        return super()._generate_valid_date(calendar)
+
+
+@pytest.fixture(autouse=True)
+def quiet_logging():
+    configure_logging("text", quiet=True, progress=False)
+    summary_log.setLevel(logging.WARNING)
+
+
+def create_generator(cls=TripGenerator, **options) -> TripGenerator:
+    return cls(2025, 1, TARGET_KM, "Duiven", distance_provider="offline", seed=SEED, **options)
+
+
+def interrupted_checkpoint(path: str) -> str:
+    generator = create_generator(InterruptedTripGenerator, checkpoint_path=path, checkpoint_every=7)
+    with pytest.raises(KeyboardInterrupt):
+        generator.generate_trips()
+    state = load_checkpoint(path)
+    assert not state["finished"]
+    assert 0 < len(state["trips"]) <= 25
+    return path
+
+
+def test_resume_matches_uninterrupted_run(tmp_path):
+    expected = list(create_generator().generate_trips())
+
+    path = interrupted_checkpoint(str(tmp_path / "run.ckpt"))
+    generator = create_generator(checkpoint_path=path)
+    assert generator.resume() == len(load_checkpoint(path)["trips"])
+    assert list(generator.generate_trips()) == expected
+    assert load_checkpoint(path)["finished"]
+
+
+def test_resume_rejects_a_different_run(tmp_path):
+    path = interrupted_checkpoint(str(tmp_path / "run.ckpt"))
+    generator = TripGenerator(2025, 2, TARGET_KM, "Duiven", distance_provider="offline", seed=SEED)
+    with pytest.raises(ValueError, match="quarter"):
+        generator.resume(path)
+
+
+def test_cli_resume_matches_uninterrupted_run(tmp_path):
+    path = interrupted_checkpoint(str(tmp_path / "run.ckpt"))
+
+    def run(output, *extra):
+        subprocess.run([sys.executable, os.path.join(REPO_ROOT, "trip_generator.py"), "--year", "2025",
+                        "--quarter", "1", "--target-km", str(TARGET_KM), "--address", "Duiven",
+                        "--distance-provider", "offline", "--no-cache", "--seed", str(SEED),
+                        "--format", "csv", "-o", output, "-q", *extra],
+                       check=True, cwd=str(tmp_path), stdout=subprocess.DEVNULL)
+        with open(tmp_path / output, encoding="utf-8") as f:
+            return list(csv.reader(f))
+
+    expected = run("volledig.csv")
+    resumed = run("hervat.csv", "--checkpoint", path, "--resume")
+    assert len(expected) > 1
+    assert resumed == expected
@@ -0,0 +1,88 @@
+"""
+行程日历测试：屏蔽日期、仅工作日和每日上限
+"""
+
+import logging
+import os
+import random
+import sys
+from datetime import date, datetime
+
+import pytest
+
+# 项目根目录（本文件位于 tests/ 下）
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from run_logging import configure_logging, summary_log  # noqa: E402
+from trip_calendar import TripCalendar, dutch_holidays, parse_date_ranges  # noqa: E402
+from trip_generator import TripGenerator  # noqa: E402
+from trip_store import DATE_FORMAT  # noqa: E402
+
+JANUARY = (date(2025, 1, 1), date(2025, 1, 31))
+
+
+def book_all(calendar: TripCalendar) -> list:
+    """抽取并占用日期直到日历占满，返回占用的日期"""
+    booked = []
+    while True:
+        day = calendar.sample()
+        if day is None:
+            return booked
+        calendar.book(day)
+        booked.append(day)
+
+
+def test_blackout_dates_are_never_sampled():
+    blackout = parse_date_ranges(["06-01-2025:12-01-2025", "20-01-2025"])
+    calendar = TripCalendar(*JANUARY, max_trips_per_day=2, blackout_dates=blackout, rng=random.Random(1))
+    assert calendar.total_days == 31 - 8
+    booked = book_all(calendar)
+    assert len(booked) == 2 * (31 - 8)
+    assert not set(booked) & set(blackout)
+    with pytest.raises(ValueError):
+        calendar.book(date(2025, 1, 20))
+
+
+def test_weekdays_only_skips_weekends():
+    calendar = TripCalendar(*JANUARY, max_trips_per_day=1, weekdays_only=True, rng=random.Random(2))
+    assert calendar.total_days == 23
+    booked = book_all(calendar)
+    assert len(booked) == 23
+    assert all(day.weekday() < 5 for day in booked)
+
+
+def test_daily_cap_limits_trips_per_day():
+    calendar = TripCalendar(*JANUARY, max_trips_per_day=3, rng=random.Random(3))
+    assert calendar.remaining_capacity() == 93
+    booked = book_all(calendar)
+    assert len(booked) == 93
+    assert all(booked.count(day) == 3 for day in set(booked))
+    assert calendar.remaining_capacity() == 0
+
+
+def test_release_reopens_a_full_day():
+    calendar = TripCalendar(date(2025, 1, 6), date(2025, 1, 6), max_trips_per_day=1)
+    calendar.book(date(2025, 1, 6))
+    assert calendar.sample() is None
+    calendar.release(date(2025, 1, 6))
+    assert calendar.sample() == date(2025, 1, 6)
+
+
+def test_dutch_holidays_2025():
+    holidays = dutch_holidays(2025)
+    assert date(2025, 4, 18) in holidays   # Goede Vrijdag
+    assert date(2025, 4, 21) in holidays   # Tweede Paasdag
+    assert date(2025, 4, 26) in holidays   # Koningsdag valt op zondag 27 april
+    assert date(2025, 5, 29) in holidays   # Hemelvaartsdag
+
+
+def test_generated_trips_respect_calendar_limits():
+    configure_logging("text", quiet=True, progress=False)
+    summary_log.setLevel(logging.WARNING)
+    blackout = parse_date_ranges(["01-02-2025:28-02-2025"])
+    generator = TripGenerator(2025, 1, 5000, "Duiven", distance_provider="offline", seed=5,
+                              max_trips_per_day=1, weekdays_only=True, blackout_dates=blackout)
+    days = [datetime.strptime(trip["date"], DATE_FORMAT).date() for trip in generator.generate_trips()]
+    assert days
+    assert len(set(days)) == len(days)
+    assert all(day.weekday() < 5 and day.month != 2 for day in days)
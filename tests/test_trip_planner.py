@@ -0,0 +1,69 @@
+"""
+规划模式测试：使用离线距离估算，总公里数和 40/40/20 配额精确命中，遵守目的地和每日上限
+"""
+
+import logging
+import os
+import sys
+from collections import Counter
+from datetime import date, timedelta
+
+import pytest
+
+# 项目根目录（本文件位于 tests/ 下）
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from city_index import classify_distance  # noqa: E402
+from run_logging import configure_logging, summary_log  # noqa: E402
+from trip_generator import TripGenerator  # noqa: E402
+from trip_planner import TripPlanner, distance_quotas  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def quiet_logging():
+    configure_logging("text", quiet=True, progress=False)
+    summary_log.setLevel(logging.WARNING)
+
+
+def plan(target_km: int, seed: int, **options):
+    generator = TripGenerator(2025, 1, target_km, "Duiven", distance_provider="offline", planner="optimal",
+                              seed=seed, **options)
+    return list(generator.generate_trips())
+
+
+@pytest.mark.parametrize("target_km, seed", [(5000, 1), (5000, 2), (12345, 3)])
+def test_plan_hits_target_and_quotas_exactly(target_km, seed):
+    trips = plan(target_km, seed)
+    totals = Counter()
+    for trip in trips:
+        totals[classify_distance(trip["total_distance"])] += trip["total_distance"]
+    assert sum(totals.values()) == target_km
+    assert dict(totals) == distance_quotas(target_km)
+
+
+@pytest.mark.parametrize("max_trips_per_day", [1, 2])
+def test_plan_respects_destination_and_daily_caps(max_trips_per_day):
+    trips = plan(12345, 4, max_trips_per_day=max_trips_per_day)
+    assert max(Counter(trip["destination"] for trip in trips).values()) <= 3
+    assert max(Counter(trip["date"] for trip in trips).values()) <= max_trips_per_day
+
+
+def test_plan_raises_when_target_is_unreachable():
+    with pytest.raises(ValueError, match="无法规划行程"):
+        plan(10_000_000, 1)
+
+
+def test_plan_raises_when_calendar_is_too_small():
+    # 只剩一天、每天一次：一次行程不可能达到 5000km
+    blackout = [date(2025, 1, 1) + timedelta(days=i) for i in range(1, 90)]
+    with pytest.raises(ValueError, match="无法规划行程"):
+        plan(5000, 1, max_trips_per_day=1, blackout_dates=blackout)
+
+
+def test_planner_uses_each_destination_at_most_three_times():
+    planner = TripPlanner({"Zeist": 100, "Vianen": 200, "Assen": 400})
+    trips = planner.plan(2100, {"short": 300, "medium": 600, "long": 1200}, capacity=9)
+    assert sum(km for _, km in trips) == 2100
+    assert Counter(city for city, _ in trips) == {"Zeist": 3, "Vianen": 3, "Assen": 3}
+    with pytest.raises(ValueError):
+        planner.check_feasibility(2200, 9)
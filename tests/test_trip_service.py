@@ -0,0 +1,220 @@
+"""
+生成服务测试：在进程内以端口 0 启动 TripService，距离来自带固定延迟的替身提供者
+"""
+
+import asyncio
+import hashlib
+import io
+import json
+import os
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from openpyxl import load_workbook
+
+# 项目根目录（本文件位于 tests/ 下）
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from distance_providers import DistanceProvider  # noqa: E402
+from run_logging import configure_logging  # noqa: E402
+from trip_service import CONTENT_TYPES, TripService  # noqa: E402
+
+
+class SlowDistanceProvider(DistanceProvider):
+    """替身距离后端：距离由起点和目的地名称的哈希决定，每个请求额外等待 latency 秒"""
+
+    name = "stand-in"
+    max_origins_per_request = None
+    max_destinations_per_request = None
+    max_elements_per_request = None
+
+    def __init__(self, latency: float = 0.2):
+        self.latency = latency
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    def distance_matrix(self, origins, destinations, mode="driving", units="metric", avoid=None):
+        with self._lock:
+            self.requests += 1
+        time.sleep(self.latency)
+        rows = []
+        for origin in origins:
+            elements = []
+            for destination in destinations:
+                digest = hashlib.blake2b(f"{origin}|{destination}".encode(), digest_size=8).digest()
+                meters = 10_000 + int.from_bytes(digest, "big") % 240_000
+                elements.append({
+                    "status": "OK",
+                    "distance": {"value": meters, "text": f"{meters / 1000:.1f} km"},
+                    "duration": {"value": meters // 22, "text": f"{meters // 1320} mins"},
+                })
+            rows.append({"elements": elements})
+        return {"status": "OK", "origin_addresses": list(origins),
+                "destination_addresses": list(destinations), "rows": rows}
+
+
+class CountingTripService(TripService):
+    """记录预取（warm 中真正查询距离）的次数"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.prefetches = 0
+
+    def _prefetch(self, request):
+        self.prefetches += 1
+        return super()._prefetch(request)
+
+
+@pytest.fixture
+def service():
+    """在后台线程的事件循环中启动服务，返回 (服务, 提供者, 端口)"""
+    configure_logging("text", quiet=True, progress=False)
+    provider = SlowDistanceProvider()
+    service = CountingTripService(provider, cache=None, threads=4)
+    loop = asyncio.new_event_loop()
+    started = threading.Event()
+    state = {}
+
+    async def run():
+        server = await service.start("127.0.0.1", 0)
+        state["server"] = server
+        state["port"] = server.sockets[0].getsockname()[1]
+        started.set()
+        async with server:
+            try:
+                await server.serve_forever()
+            except asyncio.CancelledError:
+                pass
+
+    thread = threading.Thread(target=loop.run_until_complete, args=(run(),), daemon=True)
+    thread.start()
+    assert started.wait(10)
+    yield service, provider, state["port"]
+    loop.call_soon_threadsafe(state["server"].close)
+    thread.join(10)
+    service.close()
+    loop.close()
+
+
+def request(port: int, path: str, payload: dict = None, method: str = None):
+    """发送请求，返回 (状态码, 响应头, 响应体)；错误状态码同样返回"""
+    data = json.dumps(payload).encode("utf-8") if payload is not None else None
+    req = urllib.request.Request(f"http://127.0.0.1:{port}{path}", data=data, method=method,
+                                 headers={"Content-Type": "application/json"})
+    try:
+        with urllib.request.urlopen(req, timeout=30) as response:
+            return response.status, response.headers, response.read()
+    except urllib.error.HTTPError as e:
+        return e.code, e.headers, e.read()
+
+
+def report(address: str = "Duiven", **fields) -> dict:
+    return {"year": 2025, "quarter": 1, "target_km": 3000, "address": address, "seed": 7, **fields}
+
+
+def test_health(service):
+    _, _, port = service
+    status, headers, body = request(port, "/health")
+    assert status == 200
+    assert headers["Content-Type"] == "application/json; charset=utf-8"
+    health = json.loads(body)
+    assert health["status"] == "ok"
+    assert health["distance_provider"] == "stand-in"
+    assert health["origins"] == 0
+
+
+def test_generate_xlsx(service):
+    _, _, port = service
+    status, headers, body = request(port, "/generate", report(format="xlsx"))
+    assert status == 200
+    assert headers["Content-Type"] == CONTENT_TYPES["xlsx"]
+    assert headers["Content-Disposition"] == 'attachment; filename="reisverslag_2025_Q1.xlsx"'
+    trips = int(headers["X-Trips"])
+    assert trips > 0
+    assert int(headers["X-Total-Km"]) >= 3000
+
+    worksheet = load_workbook(io.BytesIO(body), read_only=True).worksheets[0]
+    rows = list(worksheet.iter_rows(values_only=True))
+    # 表头、每次行程一行和汇总行
+    assert len(rows) == trips + 2
+    assert rows[-1][1] == f"{trips} ritten"
+    assert rows[-1][3] == int(headers["X-Total-Km"])
+
+
+def test_generate_json(service):
+    _, _, port = service
+    status, headers, body = request(port, "/generate", report(format="json"))
+    assert status == 200
+    assert headers["Content-Type"] == CONTENT_TYPES["json"]
+    trips = json.loads(body)
+    assert len(trips) == int(headers["X-Trips"])
+    assert sum(trip["total_distance"] for trip in trips) == int(headers["X-Total-Km"])
+
+
+def test_generate_get_matches_post(service):
+    _, _, port = service
+    _, _, posted = request(port, "/generate", report(format="json"))
+    status, _, fetched = request(port, "/generate?year=2025&quarter=1&target_km=3000&address=Duiven&seed=7"
+                                       "&format=json")
+    assert status == 200
+    assert json.loads(fetched) == json.loads(posted)
+
+
+@pytest.mark.parametrize("payload", [
+    {"year": 2025, "quarter": 1, "target_km": 3000},
+    report(quarter=5),
+    report(target_km="veel"),
+    report(format="pdf"),
+])
+def test_invalid_request_returns_400(service, payload):
+    _, _, port = service
+    status, headers, body = request(port, "/generate", payload)
+    assert status == 400
+    assert headers["Content-Type"] == "application/json; charset=utf-8"
+    assert json.loads(body)["error"]
+
+
+def test_invalid_json_returns_400(service):
+    _, _, port = service
+    req = urllib.request.Request(f"http://127.0.0.1:{port}/generate", data=b"{niet json",
+                                 headers={"Content-Type": "application/json"})
+    with pytest.raises(urllib.error.HTTPError) as error:
+        urllib.request.urlopen(req, timeout=30)
+    assert error.value.code == 400
+
+
+def test_unknown_path_returns_404(service):
+    _, _, port = service
+    status, _, body = request(port, "/rapport")
+    assert status == 404
+    assert "/rapport" in json.loads(body)["error"]
+
+
+@pytest.mark.parametrize("path, method", [("/generate", "PUT"), ("/generate", "DELETE"), ("/health", "POST")])
+def test_wrong_method_returns_405(service, path, method):
+    _, _, port = service
+    status, _, body = request(port, path, {} if method != "DELETE" else None, method=method)
+    assert status == 405
+    assert json.loads(body)["error"]
+
+
+def test_concurrent_requests_for_one_origin_warm_once(service):
+    svc, provider, port = service
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        responses = list(pool.map(lambda seed: request(port, "/generate", report(format="json", seed=seed)),
+                                  (1, 2)))
+    assert [status for status, _, _ in responses] == [200, 200]
+    assert svc.prefetches == 1
+    assert provider.requests == 1
+
+    # 之后的请求直接使用热距离表
+    status, _, _ = request(port, "/generate", report(format="json", seed=3))
+    assert status == 200
+    assert svc.prefetches == 1
+    assert provider.requests == 1
+    assert json.loads(request(port, "/health")[2])["origins"] == 1
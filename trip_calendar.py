@@ -0,0 +1,143 @@
+"""
+行程日历
+记录季度内每天剩余的行程容量，支持 O(1) 随机抽取可用日期和 O(1) 占用/释放
+"""
+
+import random
+from datetime import date, datetime, timedelta
+from typing import Iterable, List
+
+# 每天默认最多安排的行程数
+DEFAULT_MAX_TRIPS_PER_DAY = 2
+
+
+def _easter(year: int) -> date:
+    """计算复活节日期（格里历，Anonymous Gregorian 算法）"""
+    a = year % 19
+    b, c = divmod(year, 100)
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month, day = divmod(h + l - 7 * m + 114, 31)
+    return date(year, month, day + 1)
+
+
+def dutch_holidays(year: int) -> List[date]:
+    """荷兰法定节假日"""
+    easter = _easter(year)
+    kings_day = date(year, 4, 27)
+    if kings_day.weekday() == 6:  # 周日则提前到周六
+        kings_day = date(year, 4, 26)
+    return [
+        date(year, 1, 1),                  # Nieuwjaarsdag
+        easter - timedelta(days=2),        # Goede Vrijdag
+        easter,                            # Eerste Paasdag
+        easter + timedelta(days=1),        # Tweede Paasdag
+        kings_day,                         # Koningsdag
+        date(year, 5, 5),                  # Bevrijdingsdag
+        easter + timedelta(days=39),       # Hemelvaartsdag
+        easter + timedelta(days=49),       # Eerste Pinksterdag
+        easter + timedelta(days=50),       # Tweede Pinksterdag
+        date(year, 12, 25),                # Eerste Kerstdag
+        date(year, 12, 26),                # Tweede Kerstdag
+    ]
+
+
+def parse_date_ranges(values: Iterable[str]) -> List[date]:
+    """解析 "DD-MM-YYYY" 或 "DD-MM-YYYY:DD-MM-YYYY" 格式的日期/日期区间"""
+    dates = []
+    for value in values or []:
+        start_text, _, end_text = value.partition(":")
+        start = datetime.strptime(start_text.strip(), "%d-%m-%Y").date()
+        end = datetime.strptime(end_text.strip(), "%d-%m-%Y").date() if end_text else start
+        if end < start:
+            raise ValueError(f"ongeldige periode: {value}")
+        dates.extend(start + timedelta(days=i) for i in range((end - start).days + 1))
+    return dates
+
+
+class TripCalendar:
+    """季度内可安排行程的日期及其剩余容量
+
+    仍有容量的日期保存在一个紧凑列表中，并记录每个日期在列表中的位置：
+    随机抽取就是随机取一个下标，日期占满时与末尾元素交换后弹出。
+    """
+
+    def __init__(self, start_date, end_date, max_trips_per_day: int = DEFAULT_MAX_TRIPS_PER_DAY,
+                 weekdays_only: bool = False, blackout_dates: Iterable[date] = None,
+                 rng: random.Random = None):
+        self.start_ordinal = start_date.toordinal()
+        self.end_ordinal = end_date.toordinal()
+        self.max_trips_per_day = max_trips_per_day
+        self.rng = rng or random
+
+        blackout = {day.toordinal() for day in (blackout_dates or [])}
+        self._counts = {}
+        self._open = []
+        self._positions = {}
+        for ordinal in range(self.start_ordinal, self.end_ordinal + 1):
+            if ordinal in blackout:
+                continue
+            if weekdays_only and date.fromordinal(ordinal).weekday() >= 5:
+                continue
+            self._counts[ordinal] = 0
+            if max_trips_per_day > 0:
+                self._positions[ordinal] = len(self._open)
+                self._open.append(ordinal)
+
+    def __len__(self):
+        """仍有剩余容量的日期数"""
+        return len(self._open)
+
+    @property
+    def total_days(self) -> int:
+        """可安排行程的日期总数（不含周末/屏蔽日期）"""
+        return len(self._counts)
+
+    def remaining_capacity(self) -> int:
+        """剩余可安排的行程总数"""
+        return sum(self.max_trips_per_day - self._counts[ordinal] for ordinal in self._open)
+
+    def count(self, day) -> int:
+        return self._counts.get(day.toordinal(), 0)
+
+    def is_open(self, day) -> bool:
+        return day.toordinal() in self._positions
+
+    def sample(self) -> date:
+        """均匀随机抽取一个仍有容量的日期，全部占满时返回None"""
+        if not self._open:
+            return None
+        return date.fromordinal(self._open[self.rng.randrange(len(self._open))])
+
+    def book(self, day) -> int:
+        """在某天安排一次行程，返回该天的行程数"""
+        ordinal = day.toordinal()
+        if ordinal not in self._positions:
+            raise ValueError(f"{day} 已没有剩余行程容量")
+        self._counts[ordinal] += 1
+        if self._counts[ordinal] >= self.max_trips_per_day:
+            self._close(ordinal)
+        return self._counts[ordinal]
+
+    def release(self, day):
+        """取消某天的一次行程"""
+        ordinal = day.toordinal()
+        if not self._counts.get(ordinal):
+            return
+        self._counts[ordinal] -= 1
+        if ordinal not in self._positions:
+            self._positions[ordinal] = len(self._open)
+            self._open.append(ordinal)
+
+    def _close(self, ordinal: int):
+        # 与末尾元素交换后弹出，O(1)
+        i = self._positions.pop(ordinal)
+        last = self._open.pop()
+        if last != ordinal:
+            self._open[i] = last
+            self._positions[last] = i
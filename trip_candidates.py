@@ -0,0 +1,162 @@
+"""
+多候选方案
+用同一张距离表和 N 个不同的随机种子独立生成行程方案（进程池并行），按与目标总公里数、
+40/40/20 距离配额和日期分布的偏差打分，选出得分最低（最好）的方案；每个方案都可以用它的种子单独重现
+"""
+
+import logging
+import statistics
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, List
+
+from distance_providers import build_provider
+from run_logging import configure_logging, log, log_event, summary_log
+from trip_generator import TripGenerator
+from trip_store import TripStore
+
+# 各距离类型占目标公里数的比例（与 generate_trips 的目标一致）
+DISTANCE_SHARES = {"short": 0.4, "medium": 0.4, "long": 0.2}
+
+# 得分 = 各项偏差的加权和，越小越好：总公里数偏差和配额偏差按目标公里数归一化，
+# 日期分布是每周行程数的变异系数（0 表示每周一样多）
+SCORE_WEIGHTS = {"total": 1.0, "distribution": 1.0, "date_spread": 0.2}
+
+# 日志中列出的候选方案数
+SHOWN_CANDIDATES = 5
+
+# 每个工作进程中复用的选项、距离表、距离提供者和矩阵
+_worker = {}
+
+
+def score_plan(trips: TripStore, target_km: int, start_date: datetime, end_date: datetime) -> Dict:
+    """计算方案的得分和各项偏差（按行程表的整列统计）"""
+    totals = trips.bucket_totals()
+    weeks = trips.weekly_counts(start_date, (end_date - start_date).days // 7 + 1)
+
+    total_km = sum(totals.values())
+    total_error = abs(total_km - target_km) / target_km
+    distribution_error = sum(abs(totals[distance_type] - int(target_km * share))
+                             for distance_type, share in DISTANCE_SHARES.items()) / target_km
+    mean = len(trips) / len(weeks)
+    date_spread = statistics.pstdev(weeks) / mean if mean else 0.0
+
+    score = (SCORE_WEIGHTS["total"] * total_error + SCORE_WEIGHTS["distribution"] * distribution_error
+             + SCORE_WEIGHTS["date_spread"] * date_spread)
+    return {
+        "score": round(score, 6),
+        "total_km": total_km,
+        "total_error": round(total_error, 6),
+        "distribution_error": round(distribution_error, 6),
+        "date_spread": round(date_spread, 6),
+        **{f"{distance_type}_km": km for distance_type, km in totals.items()},
+    }
+
+
+def _init_worker(options: Dict, table: Dict, log_format: str):
+    """工作进程初始化：只接收一次距离表，只创建一次距离提供者，矩阵以内存映射方式打开"""
+    configure_logging(log_format, quiet=True, progress=False)
+    summary_log.setLevel(logging.WARNING)
+    _worker["options"] = options
+    _worker["table"] = table
+    _worker["provider"] = build_provider(options["provider"])
+    _worker["matrix"] = None
+    if options["matrix"]:
+        from distance_matrix import DistanceMatrix
+        _worker["matrix"] = DistanceMatrix(options["matrix"])
+
+
+def run_candidate(seed: int) -> Dict:
+    """用一个种子生成一个方案，返回行程和得分"""
+    options = _worker["options"]
+    generator = TripGenerator(options["year"], options["quarter"], options["target_km"], options["start_location"],
+                              provider=_worker["provider"], max_trips_per_day=options["max_trips_per_day"],
+                              weekdays_only=options["weekdays_only"], blackout_dates=options["blackout_dates"],
+                              planner=options["planner"], registry=options["registry"],
+                              matrix=_worker["matrix"], seed=seed)
+    generator.distance_memo.update(_worker["table"])
+    trips = generator.generate_trips()
+    start_date, end_date = generator.get_quarter_dates()
+    return {"seed": seed, "trips": trips, "api_calls": generator.api_calls,
+            **score_plan(trips, generator.target_km, start_date, end_date)}
+
+
+@contextmanager
+def _quiet_generation():
+    """在当前进程中生成候选方案时只保留警告"""
+    levels = log.level, summary_log.level
+    log.setLevel(max(log.level, logging.WARNING))
+    summary_log.setLevel(logging.WARNING)
+    try:
+        yield
+    finally:
+        log.setLevel(levels[0])
+        summary_log.setLevel(levels[1])
+
+
+def generate_candidates(generator: TripGenerator, seeds: List[int], processes: int = 1,
+                        provider_options: Dict = None, log_format: str = "text") -> List[Dict]:
+    """用 generator 已解析的距离表并行生成每个种子的方案，按得分从好到差返回
+
+    processes 为 1 时在当前进程中依次生成（复用 generator 的距离提供者）；
+    否则每个工作进程接收一次距离表（有距离矩阵时只接收矩阵之外的部分）。
+    """
+    matrix = generator.matrix
+    options = {
+        "year": generator.year,
+        "quarter": generator.quarter,
+        "target_km": generator.target_km,
+        "start_location": generator.start_location,
+        "max_trips_per_day": generator.max_trips_per_day,
+        "weekdays_only": generator.weekdays_only,
+        "blackout_dates": generator.blackout_dates,
+        "planner": generator.planner,
+        "registry": generator.registry,
+        "provider": provider_options,
+        "matrix": matrix.directory if matrix is not None else None,
+    }
+    table = {city: km for city, km in generator.distance_memo.items()
+             if matrix is None or city not in matrix.city_ids}
+
+    if processes <= 1:
+        _worker.update(options=options, table=table, provider=generator.provider, matrix=matrix)
+        with _quiet_generation():
+            results = [run_candidate(seed) for seed in seeds]
+    else:
+        with ProcessPoolExecutor(max_workers=processes, initializer=_init_worker,
+                                 initargs=(options, table, log_format)) as executor:
+            results = list(executor.map(run_candidate, seeds))
+    return sorted(results, key=lambda result: (result["score"], result["seed"]))
+
+
+def log_candidates(results: List[Dict], target_km: int, processes: int, seconds: float):
+    """输出得分最好的几个方案和最终选择"""
+    lines = [f"\n🎲 候选方案: {len(results)}个 ({processes}个进程, {seconds:.1f}s)"]
+    for result in results[:SHOWN_CANDIDATES]:
+        total = result["total_km"] or 1
+        lines.append(f"   seed {result['seed']}: 得分 {result['score']:.4f} | {result['total_km']}km "
+                     f"({(result['total_km'] - target_km) / target_km:+.1%}) | "
+                     f"短/中/长 {result['short_km'] / total:.0%}/{result['medium_km'] / total:.0%}/"
+                     f"{result['long_km'] / total:.0%} | 每周分布 {result['date_spread']:.2f}")
+    if len(results) > SHOWN_CANDIDATES:
+        lines.append(f"   ... 以及另外 {len(results) - SHOWN_CANDIDATES} 个方案")
+    best = results[0]
+    lines.append(f"🏆 最佳方案: seed {best['seed']} (可用 --seed {best['seed']} 单独重现)")
+    log_event(summary_log, logging.INFO, "candidates", "\n".join(lines),
+              candidates=len(results), processes=processes, seconds=round(seconds, 3), best_seed=best["seed"],
+              scores=[{key: value for key, value in result.items() if key != "trips"} for result in results])
+
+
+def best_candidate(generator: TripGenerator, count: int, base_seed: int, processes: int = 1,
+                   provider_options: Dict = None, log_format: str = "text") -> Dict:
+    """预取距离后生成 count 个方案（种子 base_seed, base_seed+1, ...），输出比较结果，
+    返回得分最好的方案 {"seed", "trips", "score", ...}（行程由工作进程返回，无需重新生成）"""
+    generator.prefetch_distances()
+    seeds = [base_seed + i for i in range(count)]
+    processes = max(1, min(processes, count))
+    started = time.perf_counter()
+    results = generate_candidates(generator, seeds, processes, provider_options, log_format)
+    log_candidates(results, generator.target_km, processes, time.perf_counter() - started)
+    return results[0]
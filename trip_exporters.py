@@ -0,0 +1,180 @@
+"""
+行程报告导出
+按格式名称注册的导出器：Excel、CSV、JSON Lines、Parquet 和 JSON
+"""
+
+import csv
+import json
+from typing import Callable, Dict, List
+
+from trip_store import DESCRIPTION, TripStore
+
+# 行程字段及其荷兰语表头
+TRIP_COLUMNS = [
+    ("date", "Datum"),
+    ("destination", "Bestemming"),
+    ("description", "Omschrijving"),
+    ("total_distance", "Totale afstand (km)"),
+]
+
+# Excel 汇总行的第一列
+TOTAL_LABEL = "Totaal"
+
+# 多个报告写入同一文件时，用于区分报告的列
+REPORT_COLUMN = "report"
+
+# Excel 列宽上限
+MAX_COLUMN_WIDTH = 50
+
+# 格式名称 -> (文件扩展名, 导出函数)
+EXPORTERS: Dict[str, tuple] = {}
+
+
+def register_exporter(name: str, extension: str):
+    """注册导出函数 exporter(filename, reports)
+
+    reports 中每项包含 sheet_name、trips（TripStore 或行程字典列表）、year、quarter。
+    """
+    def decorator(exporter: Callable):
+        EXPORTERS[name] = (extension, exporter)
+        return exporter
+    return decorator
+
+
+def export_reports(format_name: str, filename: str, reports: List[Dict]) -> str:
+    """用指定格式导出一个或多个报告"""
+    if format_name not in EXPORTERS:
+        raise ValueError(f"onbekend exportformaat: {format_name}")
+    _, exporter = EXPORTERS[format_name]
+    exporter(filename, reports)
+    return filename
+
+
+def file_extension(format_name: str) -> str:
+    return EXPORTERS[format_name][0]
+
+
+def _trip_records(reports: List[Dict]):
+    """依次生成所有报告的行程记录；多个报告时附带报告名称"""
+    fields = [field for field, _ in TRIP_COLUMNS]
+    labelled = len(reports) > 1
+    for report in reports:
+        for trip in report["trips"]:
+            record = {REPORT_COLUMN: report["sheet_name"]} if labelled else {}
+            for field in fields:
+                record[field] = trip[field]
+            yield record
+
+
+def _record_fields(reports: List[Dict]) -> List[str]:
+    fields = [field for field, _ in TRIP_COLUMNS]
+    return [REPORT_COLUMN] + fields if len(reports) > 1 else fields
+
+
+def _excel_rows(report: Dict):
+    """依次生成一个报告的表头、行程行和汇总行"""
+    trips = report["trips"]
+    fields = [field for field, _ in TRIP_COLUMNS]
+    yield [header for _, header in TRIP_COLUMNS]
+    total_distance = 0
+    for trip in trips:
+        total_distance += trip["total_distance"]
+        yield [trip[field] for field in fields]
+    yield [TOTAL_LABEL, f"{len(trips)} ritten", f"{report['year']} Q{report['quarter']}", total_distance]
+
+
+@register_exporter("xlsx", ".xlsx")
+def write_excel_reports(filename: str, reports: List[Dict]):
+    """把一个或多个行程报告写入同一个Excel文件，每个报告一个工作表
+
+    使用 openpyxl 只写模式逐行写入，不在内存中保留整张工作表。
+    """
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Font
+    from openpyxl.utils import get_column_letter
+
+    workbook = Workbook(write_only=True)
+    for report in reports:
+        worksheet = workbook.create_sheet(title=report["sheet_name"])
+
+        # 只写模式必须在写入第一行前设置列宽：先扫描一遍各列的最大长度
+        widths = [0] * len(TRIP_COLUMNS)
+        for row in _excel_rows(report):
+            for i, value in enumerate(row):
+                length = len(str(value))
+                if length > widths[i]:
+                    widths[i] = length
+        for i, width in enumerate(widths, 1):
+            worksheet.column_dimensions[get_column_letter(i)].width = min(width + 2, MAX_COLUMN_WIDTH)
+
+        rows = _excel_rows(report)
+        header = []
+        for value in next(rows):
+            cell = WriteOnlyCell(worksheet, value=value)
+            cell.font = Font(bold=True)
+            header.append(cell)
+        worksheet.append(header)
+        for row in rows:
+            worksheet.append(row)
+
+    workbook.save(filename)
+    return filename
+
+
+@register_exporter("csv", ".csv")
+def write_csv_reports(filename: str, reports: List[Dict]):
+    """逐行写入CSV文件（UTF-8，带表头，不含汇总行）"""
+    with open(filename, "w", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=_record_fields(reports))
+        writer.writeheader()
+        writer.writerows(_trip_records(reports))
+    return filename
+
+
+@register_exporter("jsonl", ".jsonl")
+def write_jsonl_reports(filename: str, reports: List[Dict]):
+    """每次行程写一行JSON"""
+    with open(filename, "w", encoding="utf-8") as f:
+        for record in _trip_records(reports):
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+    return filename
+
+
+@register_exporter("json", ".json")
+def write_json_reports(filename: str, reports: List[Dict]):
+    """整个行程列表写成一个JSON数组；多个报告时按报告名称分组"""
+    if len(reports) == 1:
+        data = list(reports[0]["trips"])
+    else:
+        data = {report["sheet_name"]: list(report["trips"]) for report in reports}
+    with open(filename, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    return filename
+
+
+@register_exporter("parquet", ".parquet")
+def write_parquet_reports(filename: str, reports: List[Dict]):
+    """写入列式Parquet文件，日期保存为date类型，距离保存为整数（需要pyarrow）
+
+    各列直接由行程表的数组生成，不经过行程字典和日期字符串。
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError("请安装pyarrow包以导出Parquet: pip install pyarrow")
+
+    stores = [TripStore.from_trips(report["trips"]) for report in reports]
+    columns = {}
+    if len(reports) > 1:
+        columns[REPORT_COLUMN] = pa.array([report["sheet_name"] for report, store in zip(reports, stores)
+                                           for _ in range(len(store))], type=pa.string())
+    columns["date"] = pa.concat_arrays([pa.array(store.epoch_days(), type=pa.int32()).cast(pa.date32())
+                                        for store in stores])
+    columns["destination"] = pa.array([name for store in stores for name in store.destination_column()],
+                                      type=pa.string())
+    columns["description"] = pa.array([DESCRIPTION] * sum(len(store) for store in stores), type=pa.string())
+    columns["total_distance"] = pa.concat_arrays([pa.array(store.distance_array(), type=pa.int32()) for store in stores])
+    pq.write_table(pa.table(columns), filename)
+    return filename
@@ -5,17 +5,34 @@
 """
 
 import argparse
-import json
+import logging
 import random
-import pandas as pd
 from datetime import datetime, timedelta
 from typing import List, Dict
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
-# 自动加载.env文件
-def load_env_file():
+from distance_cache import DistanceCache, DEFAULT_CACHE_PATH, DEFAULT_CACHE_TTL_DAYS, DEFAULT_NEGATIVE_TTL_DAYS
+from city_index import DistanceIndex, classify_distance
+from city_registry import CityRegistry, CityUsage, DEFAULT_MAX_PER_DESTINATION
+from run_logging import (LOG_FORMATS, ProgressIndicator, configure_logging, log, log_event,
+                         summary_log)
+from run_checkpoint import (DEFAULT_CHECKPOINT_EVERY, decode_random_state, encode_random_state,
+                            load_checkpoint, mismatched_parameters, save_checkpoint)
+from run_metrics import RunMetrics, profiled, timed
+from trip_calendar import TripCalendar, DEFAULT_MAX_TRIPS_PER_DAY, dutch_holidays, parse_date_ranges
+from trip_exporters import EXPORTERS, export_reports, file_extension
+from trip_store import DATE_FORMAT, TripStore
+from distance_providers import (DistanceProvider, GoogleDistanceProvider, OfflineDistanceProvider,
+                                RecordingDistanceProvider, ReplayDistanceProvider, DEFAULT_DETOUR_FACTOR)
+from geocoding import geocoded
+from request_scheduler import (DEFAULT_MAX_ELEMENTS_PER_SECOND, DEFAULT_MAX_QPS, ApiBudget, QuotaError,
+                               RequestScheduler, scheduled)
+
+# 加载.env文件（由命令行入口显式调用，导入模块时没有副作用）
+def load_env_file(env_path: str = '.env'):
     """加载.env文件中的环境变量"""
-    env_path = '.env'
     if os.path.exists(env_path):
         with open(env_path, 'r') as f:
             for line in f:
@@ -23,163 +40,325 @@ def load_env_file():
                 if line and not line.startswith('#') and '=' in line:
                     key, value = line.split('=', 1)
                     os.environ[key.strip()] = value.strip()
-        print("✅ .env文件已加载")
+        log.info("✅ .env文件已加载")
     else:
-        print("⚠️  .env文件不存在")
-
-# 在导入后立即加载环境变量
-load_env_file()
+        log.info("⚠️  .env文件不存在")
 
-# 扩展的荷兰城市、村庄和比利时弗拉芒区域列表
-DUTCH_CITIES = [
+# 按地区分组的荷兰城市、村庄和比利时弗拉芒区域（地区 -> 城市）
+CITY_REGIONS = {
     # 荷兰主要城市
-    "Amsterdam", "Rotterdam", "Den Haag", "Utrecht", "Eindhoven", "Tilburg",
-    "Groningen", "Almere", "Breda", "Nijmegen", "Enschede", "Haarlem",
-    "Arnhem", "Zaanstad", "Amersfoort", "Apeldoorn", "Den Bosch", "Hoofddorp",
-    "Maastricht", "Leiden", "Dordrecht", "Zoetermeer", "Zwolle", "Deventer",
-    "Delft", "Alkmaar", "Leeuwarden", "Venlo", "Hilversum", "Heerlen",
-    "Purmerend", "Roosendaal", "Schiedam", "Spijkenisse", "Alphen aan den Rijn",
-    "Gouda", "Vlaardingen", "Zeist", "Katwijk", "Nieuwegein", "Lelystad",
-    "Oosterhout", "Emmen", "Veenendaal", "Helmond", "De Bilt", "Capelle aan den IJssel",
-    "Bergen op Zoom", "Roermond", "Oss", "Leidschendam", "Voorschoten", "Hoorn",
-    "Vlissingen", "Ridderkerk", "Barendrecht", "Hendrik-Ido-Ambacht", "Papendrecht",
-    "Sliedrecht", "Gorinchem", "Vianen", "Nieuwkoop", "Bodegraven", "Woerden",
-    "Montfoort", "IJsselstein", "Kamerik", "Harmelen", "Ter Aar", "Alphen",
-    "Boskoop", "Waddinxveen", "Zoeterwoude", "Leiderdorp",
-    "Oegstgeest", "Voorhout", "Sassenheim", "Hillegom", "Lisse", "Teylingen",
-    "Noordwijk", "Noordwijkerhout", "De Zilk", "Bennebroek", "Heemstede",
-    "Zandvoort", "Bloemendaal", "Beverwijk", "Heemskerk", "Castricum", "Uitgeest",
-    "Akersloot", "Limmen", "Heiloo", "Bergen", "Schagen", "Heerhugowaard",
-    "Langedijk", "Graft-De Rijp", "Schermer", "Koggenland", "Drechterland",
-    "Stede Broec", "Enkhuizen", "Medemblik", "Opmeer", "Hollands Kroon",
+    "Nederland": [
+        "Amsterdam", "Rotterdam", "Den Haag", "Utrecht", "Eindhoven", "Tilburg",
+        "Groningen", "Almere", "Breda", "Nijmegen", "Enschede", "Haarlem",
+        "Arnhem", "Zaanstad", "Amersfoort", "Apeldoorn", "Den Bosch", "Hoofddorp",
+        "Maastricht", "Leiden", "Dordrecht", "Zoetermeer", "Zwolle", "Deventer",
+        "Delft", "Alkmaar", "Leeuwarden", "Venlo", "Hilversum", "Heerlen",
+        "Purmerend", "Roosendaal", "Schiedam", "Spijkenisse", "Alphen aan den Rijn",
+        "Gouda", "Vlaardingen", "Zeist", "Katwijk", "Nieuwegein", "Lelystad",
+        "Oosterhout", "Emmen", "Veenendaal", "Helmond", "De Bilt", "Capelle aan den IJssel",
+        "Bergen op Zoom", "Roermond", "Oss", "Leidschendam", "Voorschoten", "Hoorn",
+        "Vlissingen", "Ridderkerk", "Barendrecht", "Hendrik-Ido-Ambacht", "Papendrecht",
+        "Sliedrecht", "Gorinchem", "Vianen", "Nieuwkoop", "Bodegraven", "Woerden",
+        "Montfoort", "IJsselstein", "Kamerik", "Harmelen", "Ter Aar", "Alphen",
+        "Boskoop", "Waddinxveen", "Zoeterwoude", "Leiderdorp",
+        "Oegstgeest", "Voorhout", "Sassenheim", "Hillegom", "Lisse", "Teylingen",
+        "Noordwijk", "Noordwijkerhout", "De Zilk", "Bennebroek", "Heemstede",
+        "Zandvoort", "Bloemendaal", "Beverwijk", "Heemskerk", "Castricum", "Uitgeest",
+        "Akersloot", "Limmen", "Heiloo", "Bergen", "Schagen", "Heerhugowaard",
+        "Langedijk", "Graft-De Rijp", "Schermer", "Koggenland", "Drechterland",
+        "Stede Broec", "Enkhuizen", "Medemblik", "Opmeer", "Hollands Kroon",
+        "Rijswijk", "Wassenaar", "Sittard", "Geleen", "Kerkrade", "Brunssum"
+    ],
     
     # Duiven及其周边地区 (Gelderland东部)
-    "Duiven", "Westervoort", "Zevenaar", "Didam", "Wehl", "Doesburg", "Doetinchem",
-    "Angerlo", "Babberich", "Giesbeek", "Lathum", "Loo", "Groessen", "Pannerden",
-    "Angeren", "Huissen", "Bemmel", "Elst", "Oosterhout", "Slijk-Ewijk", "Driel",
-    "Heteren", "Valburg", "Zetten", "Hemmen", "Dodewaard", "Opheusden", "Kesteren",
-    "Rhenen", "Wageningen", "Bennekom", "Ede", "Veenendaal", "Renswoude",
-    "Woudenberg", "Scherpenzeel", "Barneveld", "Voorthuizen", "Kootwijkerbroek",
-    "Garderen", "Kootwijk", "Radio Kootwijk", "Uddel", "Elspeet", "Nunspeet",
-    "Harderwijk", "Hierden", "Putten", "Ermelo", "Horst", "Voorthuizen",
+    "Liemers": [
+        "Duiven", "Westervoort", "Zevenaar", "Didam", "Wehl", "Doesburg", "Doetinchem",
+        "Angerlo", "Babberich", "Giesbeek", "Lathum", "Loo", "Groessen", "Pannerden",
+        "Angeren", "Huissen", "Bemmel", "Elst", "Oosterhout", "Slijk-Ewijk", "Driel",
+        "Heteren", "Valburg", "Zetten", "Hemmen", "Dodewaard", "Opheusden", "Kesteren",
+        "Rhenen", "Wageningen", "Bennekom", "Ede", "Veenendaal", "Renswoude",
+        "Woudenberg", "Scherpenzeel", "Barneveld", "Voorthuizen", "Kootwijkerbroek",
+        "Garderen", "Kootwijk", "Radio Kootwijk", "Uddel", "Elspeet", "Nunspeet",
+        "Harderwijk", "Hierden", "Putten", "Ermelo", "Horst", "Voorthuizen", "Zutphen"
+    ],
     
     # Achterhoek地区 (Duiven东南部)
-    "Montferland", "Bergh", "Didam", "Wehl", "Doesburg", "Doetinchem", "Gaanderen",
-    "Terborg", "Silvolde", "Ulft", "Gendringen", "Dinxperlo", "Aalten", "Bredevoort",
-    "Winterswijk", "Woold", "Meddo", "Ratum", "Groenlo", "Lichtenvoorde", "Harreveld",
-    "Eibergen", "Neede", "Borculo", "Ruurlo", "Vorden", "Warnsveld", "Lochem",
-    "Gorssel", "Epse", "Deventer", "Bathmen", "Holten", "Rijssen", "Wierden",
-    "Enter", "Delden", "Hengelo", "Enschede", "Oldenzaal", "Losser", "Denekamp",
+    "Achterhoek": [
+        "Montferland", "Bergh", "Didam", "Wehl", "Doesburg", "Doetinchem", "Gaanderen",
+        "Terborg", "Silvolde", "Ulft", "Gendringen", "Dinxperlo", "Aalten", "Bredevoort",
+        "Winterswijk", "Woold", "Meddo", "Ratum", "Groenlo", "Lichtenvoorde", "Harreveld",
+        "Eibergen", "Neede", "Borculo", "Ruurlo", "Vorden", "Warnsveld", "Lochem",
+        "Gorssel", "Epse", "Deventer", "Bathmen", "Holten", "Rijssen", "Wierden",
+        "Enter", "Delden", "Hengelo", "Enschede", "Oldenzaal", "Losser", "Denekamp"
+    ],
     
     # Betuwe地区 (Duiven西南部)
-    "Lingewaard", "Huissen", "Bemmel", "Gendt", "Angeren", "Doornenburg", "Haalderen",
-    "Leuth", "Loo", "Pannerden", "Ressen", "Elst", "Oosterhout", "Slijk-Ewijk",
-    "Driel", "Heteren", "Randwijk", "Herveld", "Valburg", "Zetten", "Hemmen",
-    "Dodewaard", "Opheusden", "Kesteren", "IJzendoorn", "Ochten", "Echteld",
-    "Lienden", "Maurik", "Buren", "Kerk-Avezaath", "Zoelen", "Ravenswaaij",
-    "Tiel", "Kapel-Avezaath", "Wadenoijen", "Rumpt", "Geldermalsen", "Beesd",
-    "Rhenoy", "Deil", "Enspijk", "Haaften", "Tuil", "Brakel", "Poederoijen",
-    "Zaltbommel", "Kerkwijk", "Alphen", "Maasdriel", "Hedel", "Ammerzoden",
-    "Rossum", "Hurwenen", "Alem", "Maren-Kessel", "Lith", "Oijen", "Teeffelen",
+    "Betuwe": [
+        "Lingewaard", "Huissen", "Bemmel", "Gendt", "Angeren", "Doornenburg", "Haalderen",
+        "Leuth", "Loo", "Pannerden", "Ressen", "Elst", "Oosterhout", "Slijk-Ewijk",
+        "Driel", "Heteren", "Randwijk", "Herveld", "Valburg", "Zetten", "Hemmen",
+        "Dodewaard", "Opheusden", "Kesteren", "IJzendoorn", "Ochten", "Echteld",
+        "Lienden", "Maurik", "Buren", "Kerk-Avezaath", "Zoelen", "Ravenswaaij",
+        "Tiel", "Kapel-Avezaath", "Wadenoijen", "Rumpt", "Geldermalsen", "Beesd",
+        "Rhenoy", "Deil", "Enspijk", "Haaften", "Tuil", "Brakel", "Poederoijen",
+        "Zaltbommel", "Kerkwijk", "Alphen", "Maasdriel", "Hedel", "Ammerzoden",
+        "Rossum", "Hurwenen", "Alem", "Maren-Kessel", "Lith", "Oijen", "Teeffelen"
+    ],
     
     # Veluwe地区 (Duiven北部)
-    "Rheden", "Rozendaal", "Velp", "Dieren", "Laag-Soeren", "De Steeg", "Ellecom",
-    "Spankeren", "Lieren", "Brummen", "Hall", "Eerbeek", "Loenen", "Beekbergen",
-    "Vorchten", "Twello", "Wilp", "Teuge", "Ugchelen", "Hoenderloo", "Otterlo",
-    "Ede", "Bennekom", "Wageningen", "Renkum", "Heelsum", "Doorwerth", "Oosterbeek",
-    "Wolfheze", "Renkum", "Heveadorp", "Driel", "Randwijk", "Herveld-Onder",
-    "Andelst", "Oosterhout", "Kesteren", "Opheusden", "Dodewaard", "Hemmen",
+    "Veluwe": [
+        "Rheden", "Rozendaal", "Velp", "Dieren", "Laag-Soeren", "De Steeg", "Ellecom",
+        "Spankeren", "Lieren", "Brummen", "Hall", "Eerbeek", "Loenen", "Beekbergen",
+        "Vorchten", "Twello", "Wilp", "Teuge", "Ugchelen", "Hoenderloo", "Otterlo",
+        "Ede", "Bennekom", "Wageningen", "Renkum", "Heelsum", "Doorwerth", "Oosterbeek",
+        "Wolfheze", "Renkum", "Heveadorp", "Driel", "Randwijk", "Herveld-Onder",
+        "Andelst", "Oosterhout", "Kesteren", "Opheusden", "Dodewaard", "Hemmen"
+    ],
     
     # 荷兰村庄 (dorpen)
-    "Volendam", "Marken", "Edam", "Monnickendam", "Broek in Waterland", "Oostzaan",
-    "Wormer", "Jisp", "Neck", "Westzaan", "Krommenie", "Wormerveer", "Zaandijk",
-    "Koog aan de Zaan", "Assendelft", "Oostknollendam", "Watergang", "Zuiderwoude",
-    "Ransdorp", "Holysloot", "Zunderdorp", "Schellingwoude", "Durgerdam",
-    "Muiden", "Muiderberg", "Weesp", "Diemen", "Ouder-Amstel", "Amstelveen",
-    "Aalsmeer", "Kudelstaart", "Uithoorn", "De Kwakel", "Mijdrecht", "Wilnis",
-    "Vinkeveen", "Waverveen", "Abcoude", "Baambrugge", "Loenen aan de Vecht",
-    "Breukelen", "Kockengen", "Tienhoven", "Oud-Zuilen", "Zuilen", "Maarssen",
-    "Maarssenbroek", "Nieuwersluis", "Loenersloot", "Portengen", "Westbroek",
-    "Hollandsche Rading", "Lage Vuursche", "Den Dolder", "Huis ter Heide",
-    "Driebergen-Rijsenburg", "Doorn", "Leersum", "Maarn", "Maarsbergen",
-    "Woudenberg", "Scherpenzeel", "Renswoude", "Wijk bij Duurstede",
-    "Langbroek", "Cothen", "Werkhoven", "Odijk", "Bunnik", "Houten",
-    "Vianen", "Lexmond", "Hagestein", "Everdingen", "Zijderveld", "Schoonhoven",
-    "Haastrecht", "Vlist", "Stolwijk", "Bergambacht", "Ammerstol", "Streefkerk",
-    "Liesveld", "Nieuwpoort", "Langerak", "Ameide", "Tienhoven", "Lexmond",
-    "Acquoy", "Asperen", "Heukelum", "Spijk", "Neerijnen", "Ophemert",
-    "Varik", "Heesselt", "Rumpt", "Geldermalsen", "Beesd", "Rhenoy",
-    "Deil", "Enspijk", "Haaften", "Tuil", "Brakel", "Poederoijen", "Zaltbommel",
-    "Kerkwijk", "Alphen", "Maasdriel", "Hedel", "Ammerzoden", "Rossum",
-    "Hurwenen", "Alem", "Maren-Kessel", "Lith", "Oijen", "Teeffelen",
-    "Heesch", "Nistelrode", "Dinther", "Loosbroek", "Vorstenbosch",
+    "Dorpen": [
+        "Volendam", "Marken", "Edam", "Monnickendam", "Broek in Waterland", "Oostzaan",
+        "Wormer", "Jisp", "Neck", "Westzaan", "Krommenie", "Wormerveer", "Zaandijk",
+        "Koog aan de Zaan", "Assendelft", "Oostknollendam", "Watergang", "Zuiderwoude",
+        "Ransdorp", "Holysloot", "Zunderdorp", "Schellingwoude", "Durgerdam",
+        "Muiden", "Muiderberg", "Weesp", "Diemen", "Ouder-Amstel", "Amstelveen",
+        "Aalsmeer", "Kudelstaart", "Uithoorn", "De Kwakel", "Mijdrecht", "Wilnis",
+        "Vinkeveen", "Waverveen", "Abcoude", "Baambrugge", "Loenen aan de Vecht",
+        "Breukelen", "Kockengen", "Tienhoven", "Oud-Zuilen", "Zuilen", "Maarssen",
+        "Maarssenbroek", "Nieuwersluis", "Loenersloot", "Portengen", "Westbroek",
+        "Hollandsche Rading", "Lage Vuursche", "Den Dolder", "Huis ter Heide",
+        "Driebergen-Rijsenburg", "Doorn", "Leersum", "Maarn", "Maarsbergen",
+        "Woudenberg", "Scherpenzeel", "Renswoude", "Wijk bij Duurstede",
+        "Langbroek", "Cothen", "Werkhoven", "Odijk", "Bunnik", "Houten",
+        "Vianen", "Lexmond", "Hagestein", "Everdingen", "Zijderveld", "Schoonhoven",
+        "Haastrecht", "Vlist", "Stolwijk", "Bergambacht", "Ammerstol", "Streefkerk",
+        "Liesveld", "Nieuwpoort", "Langerak", "Ameide", "Tienhoven", "Lexmond",
+        "Acquoy", "Asperen", "Heukelum", "Spijk", "Neerijnen", "Ophemert",
+        "Varik", "Heesselt", "Rumpt", "Geldermalsen", "Beesd", "Rhenoy",
+        "Deil", "Enspijk", "Haaften", "Tuil", "Brakel", "Poederoijen", "Zaltbommel",
+        "Kerkwijk", "Alphen", "Maasdriel", "Hedel", "Ammerzoden", "Rossum",
+        "Hurwenen", "Alem", "Maren-Kessel", "Lith", "Oijen", "Teeffelen",
+        "Heesch", "Nistelrode", "Dinther", "Loosbroek", "Vorstenbosch"
+    ],
     
     # 比利时弗拉芒区域 (Vlaanderen) - 添加 BE 标识
-    "Antwerpen BE", "Gent BE", "Brugge BE", "Leuven BE", "Mechelen BE", "Aalst BE", "Kortrijk BE",
-    "Hasselt BE", "Sint-Niklaas BE", "Oostende BE", "Genk BE", "Roeselare BE", "Mouscron BE",
-    "Verviers BE", "Turnhout BE", "Lokeren BE", "Beringen BE", "Sint-Truiden BE", "Brasschaat BE",
-    "Schoten BE", "Deurne BE", "Wilrijk BE", "Edegem BE", "Kontich BE", "Aartselaar BE", "Hove BE",
-    "Boechout BE", "Lint BE", "Niel BE", "Rumst BE", "Boom BE", "Schelle BE", "Hemiksem BE",
-    "Hoboken BE", "Zwijndrecht BE", "Burcht BE", "Kruibeke BE", "Temse BE", "Bornem BE",
-    "Puurs BE", "Sint-Amands BE", "Berlare BE", "Buggenhout BE", "Lebbeke BE", "Dendermonde BE",
-    "Hamme BE", "Waasmunster BE", "Sint-Gillis-Waas BE", "Stekene BE", "Beveren BE",
-    "Zele BE", "Lokeren BE", "Moerbeke BE", "Wachtebeke BE", "Zelzate BE", "Assenede BE",
-    "Eeklo BE", "Kaprijke BE", "Sint-Laureins BE", "Waarschoot BE", "Knesselare BE",
-    "Maldegem BE", "Aalter BE", "Beernem BE", "Oostkamp BE", "Bruges BE", "Damme BE",
-    "Knokke-Heist BE", "Blankenberge BE", "De Haan BE", "Zuienkerke BE", "Jabbeke BE",
-    "Oudenburg BE", "Gistel BE", "Ichtegem BE", "Torhout BE", "Koekelare BE", "Kortemark BE",
-    "Hooglede BE", "Staden BE", "Moorslede BE", "Ledegem BE", "Menen BE", "Wervik BE",
-    "Poperinge BE", "Vleteren BE", "Lo-Reninge BE", "Ieper BE", "Langemark-Poelkapelle BE",
-    "Zonnebeke BE", "Geluveld BE", "Passendale BE", "Westrozebeke BE", "Staden BE",
-    "Diksmuide BE", "Koekelare BE", "Kortemark BE", "Houthulst BE", "Merckem BE",
-    "Klerken BE", "Woumen BE", "Vladslo BE", "Beerst BE", "Keiem BE", "Lampernisse BE",
-    "Oostvleteren BE", "Westvleteren BE", "Elverdinge BE", "Brielen BE", "Dikkebus BE",
-    "Voormezele BE", "Zillebeke BE", "Hollebeke BE", "Kemmel BE", "Wytschaete BE",
-    "Messines BE", "Ploegsteert BE", "Comines BE", "Heuvelland BE", "Dranouter BE"
-]
+    "Vlaanderen": [
+        "Antwerpen BE", "Gent BE", "Brugge BE", "Leuven BE", "Mechelen BE", "Aalst BE", "Kortrijk BE",
+        "Hasselt BE", "Sint-Niklaas BE", "Oostende BE", "Genk BE", "Roeselare BE", "Mouscron BE",
+        "Verviers BE", "Turnhout BE", "Lokeren BE", "Beringen BE", "Sint-Truiden BE", "Brasschaat BE",
+        "Schoten BE", "Deurne BE", "Wilrijk BE", "Edegem BE", "Kontich BE", "Aartselaar BE", "Hove BE",
+        "Boechout BE", "Lint BE", "Niel BE", "Rumst BE", "Boom BE", "Schelle BE", "Hemiksem BE",
+        "Hoboken BE", "Zwijndrecht BE", "Burcht BE", "Kruibeke BE", "Temse BE", "Bornem BE",
+        "Puurs BE", "Sint-Amands BE", "Berlare BE", "Buggenhout BE", "Lebbeke BE", "Dendermonde BE",
+        "Hamme BE", "Waasmunster BE", "Sint-Gillis-Waas BE", "Stekene BE", "Beveren BE",
+        "Zele BE", "Lokeren BE", "Moerbeke BE", "Wachtebeke BE", "Zelzate BE", "Assenede BE",
+        "Eeklo BE", "Kaprijke BE", "Sint-Laureins BE", "Waarschoot BE", "Knesselare BE",
+        "Maldegem BE", "Aalter BE", "Beernem BE", "Oostkamp BE", "Bruges BE", "Damme BE",
+        "Knokke-Heist BE", "Blankenberge BE", "De Haan BE", "Zuienkerke BE", "Jabbeke BE",
+        "Oudenburg BE", "Gistel BE", "Ichtegem BE", "Torhout BE", "Koekelare BE", "Kortemark BE",
+        "Hooglede BE", "Staden BE", "Moorslede BE", "Ledegem BE", "Menen BE", "Wervik BE",
+        "Poperinge BE", "Vleteren BE", "Lo-Reninge BE", "Ieper BE", "Langemark-Poelkapelle BE",
+        "Zonnebeke BE", "Geluveld BE", "Passendale BE", "Westrozebeke BE", "Staden BE",
+        "Diksmuide BE", "Koekelare BE", "Kortemark BE", "Houthulst BE", "Merckem BE",
+        "Klerken BE", "Woumen BE", "Vladslo BE", "Beerst BE", "Keiem BE", "Lampernisse BE",
+        "Oostvleteren BE", "Westvleteren BE", "Elverdinge BE", "Brielen BE", "Dikkebus BE",
+        "Voormezele BE", "Zillebeke BE", "Hollebeke BE", "Kemmel BE", "Wytschaete BE",
+        "Messines BE", "Ploegsteert BE", "Comines BE", "Heuvelland BE", "Dranouter BE"
+    ],
+}
+
+# 扩展的荷兰城市、村庄和比利时弗拉芒区域列表（去重保序，同一城市可能出现在多个地区中）
+DUTCH_CITIES = list(dict.fromkeys(city for cities in CITY_REGIONS.values() for city in cities))
+
+# 城市注册表：城市名 <-> 整数ID，以及国家和地区
+CITY_REGISTRY = CityRegistry(CITY_REGIONS)
+
+# Distance Matrix API 单次请求限制
+MAX_DESTINATIONS_PER_REQUEST = DistanceProvider.max_destinations_per_request
+
+# 并发查询距离的默认线程数
+DEFAULT_MAX_WORKERS = 8
+
+# 表示地址本身无法匹配的元素状态：所有地址格式都返回这些状态的城市写入负缓存
+# （ZERO_RESULTS 取决于起点，网络异常和配额错误是暂时的，都不写入）
+NEGATIVE_CACHE_STATUSES = ("NOT_FOUND",)
 
 class TripGenerator:
-    def __init__(self, year: int, quarter: int, target_km: int, start_location: str, google_api_key: str = None):
+    def __init__(self, year: int, quarter: int, target_km: int, start_location: str, google_api_key: str = None,
+                 cache: DistanceCache = None, prefetch: bool = True, max_workers: int = DEFAULT_MAX_WORKERS,
+                 distance_provider: str = "google", detour_factor: float = None,
+                 provider: DistanceProvider = None, record_path: str = None,
+                 max_trips_per_day: int = DEFAULT_MAX_TRIPS_PER_DAY, weekdays_only: bool = False,
+                 blackout_dates: List = None, planner: str = "greedy", metrics: RunMetrics = None,
+                 registry: CityRegistry = None, checkpoint_path: str = None,
+                 checkpoint_every: int = DEFAULT_CHECKPOINT_EVERY, matrix=None, seed: int = None,
+                 scheduler: RequestScheduler = None, geocode: bool = True):
         self.year = year
         self.quarter = quarter
         self.target_km = target_km
         self.start_location = start_location
         
+        # 本生成器独立的随机数流：日期、目的地抽样和规划都使用它，同一种子得到相同的结果
+        self.seed = seed
+        self.rng = random.Random(seed)
+        
+        # Distance Matrix 查询参数（同时作为缓存键的一部分）
+        self.mode = os.getenv('GOOGLE_MAPS_MODE', 'driving')
+        self.units = os.getenv('GOOGLE_MAPS_UNITS', 'metric')
+        self.avoid = os.getenv('GOOGLE_MAPS_AVOID', 'tolls')
+        
+        # 运行指标：计数器和各阶段耗时
+        self.metrics = metrics or RunMetrics()
+        
+        # 候选城市注册表（默认为内置城市列表）
+        self.registry = registry or CITY_REGISTRY
+        
+        # 持久化距离缓存（可选）
+        self.cache = cache
+        self.api_calls = 0
+        self._api_lock = threading.Lock()
+        
+        # 并发查询的最大线程数
+        self.max_workers = max(1, max_workers)
+        
+        # 本次运行已解析的来回距离（目的地 -> 公里数，None表示无法解析）
+        self.prefetch = prefetch
+        self.distance_memo = {}
+        
+        # 按实际来回距离排序的城市索引（预取后建立）
+        self.distance_index = None
+        
+        # 已接受的行程（平行数组：日期序数、目的地ID、公里数）
+        self.trips = TripStore()
+        
+        # 日历限制：每天最多行程数、仅工作日、屏蔽日期
+        self.max_trips_per_day = max_trips_per_day
+        self.weekdays_only = weekdays_only
+        self.blackout_dates = list(blackout_dates or [])
+        
+        # 生成方式：greedy 逐次随机选择，optimal 在距离已知后整体求解
+        self.planner = planner
+        
+        # 检查点：每接受 checkpoint_every 次行程保存一次运行状态，resume() 读取后从中断处继续
+        self.checkpoint_path = checkpoint_path
+        self.checkpoint_every = max(1, checkpoint_every)
+        self._resume_state = None
+        
+        # 距离来源：可直接传入提供者，否则使用 Google Maps API 或内置坐标表离线估算
+        self.google_api_key = google_api_key
+        if provider is None:
+            if distance_provider == "offline":
+                provider = self._init_offline_provider(detour_factor)
+            else:
+                provider = self._init_google_client(google_api_key)
+        
+        # 接受坐标的提供者先做地理编码：起点和目的地只解析一次，矩阵请求按坐标发送
+        # （离线估算不写距离缓存，但仍使用缓存中已有的坐标）
+        if geocode:
+            provider = geocoded(provider, cache, scheduler)
+        self.geocoder = getattr(provider, "geocoder", None)
+        
+        # 可选：录制所有响应，供之后离线回放
+        if provider is not None and record_path:
+            provider = RecordingDistanceProvider(provider, record_path)
+            log.info(f"⏺️  录制距离响应到: {record_path}")
+        
+        # 计费的提供者经过请求调度：限速、配额错误退避和元素预算
+        self.provider = scheduled(provider, scheduler)
+        self.scheduler = getattr(self.provider, "scheduler", None)
+        self.distance_provider = provider.name if provider is not None else distance_provider
+        
+        # API 配额不可用（预算用完或持续超出配额）的原因：之后不再发出请求，只使用缓存和已解析的距离
+        self.api_unavailable = None
+        
+        # 估算或回放的距离不写入持久化缓存，避免与真实距离混淆
+        if provider is not None and not provider.cacheable:
+            self.cache = None
+        
+        # 已学习的地址格式 {城市: 地址} 和负缓存 {城市: 状态}，有缓存时跨运行保留
+        self.learned_variants = self.cache.variants() if self.cache is not None else {}
+        self.known_failures = self.cache.failures() if self.cache is not None else {}
+        
+        # 预先计算的多起点距离矩阵 (distance_matrix.DistanceMatrix)：覆盖当前起点时直接作为距离表
+        self.matrix = None
+        if matrix is not None:
+            self.use_matrix(matrix)
+        
+    def reseed(self, seed: int):
+        """生成前换用新的随机种子，结果与用该种子新建的生成器相同"""
+        self.seed = seed
+        self.rng = random.Random(seed)
+        if self.distance_index is not None:
+            self.distance_index = self.distance_index.copy(rng=self.rng)
+    
+    def use_matrix(self, matrix) -> bool:
+        """矩阵包含当前起点且查询参数相同时，用矩阵行（内存映射，不复制）作为距离表
+        
+        矩阵中没有的城市仍按原来的方式查询，结果只保存在本次运行中。
+        """
+        if self.start_location not in matrix:
+            log_event(log, logging.INFO, "matrix_skipped",
+                      f"🧮 距离矩阵中没有起点 {self.start_location}，按需查询距离",
+                      matrix=matrix.directory, origin=self.start_location)
+            return False
+        if not matrix.matches(self.mode, self.units, self.avoid):
+            log_event(log, logging.WARNING, "matrix_skipped",
+                      f"⚠️  距离矩阵的查询参数 ({matrix.mode}/{matrix.units}/{matrix.avoid}) 与当前运行 "
+                      f"({self.mode}/{self.units}/{self.avoid}) 不同，不使用矩阵",
+                      matrix=matrix.directory, origin=self.start_location)
+            return False
+        
+        self.matrix = matrix
+        self.distance_memo = matrix.row(self.start_location)
+        log_event(log, logging.INFO, "matrix_loaded",
+                  f"🧮 使用距离矩阵: {matrix.directory} ({len(matrix.cities)}个城市, 来源: {matrix.distance_provider})",
+                  matrix=matrix.directory, origin=self.start_location, cities=len(matrix.cities),
+                  distance_provider=matrix.distance_provider)
+        return True
+        
+    def _init_offline_provider(self, detour_factor: float = None) -> DistanceProvider:
+        """使用内置坐标表离线估算距离"""
+        provider = OfflineDistanceProvider(detour_factor or DEFAULT_DETOUR_FACTOR)
+        
+        log.info(f"🧭 离线距离估算已启用 (绕行系数 {provider.detour_factor})")
+        if provider.locate(self.start_location) is None:
+            log.warning(f"⚠️  无法在坐标表中识别起始地址: {self.start_location}\n"
+                        "   请在地址中包含城市名，或使用 '纬度,经度' 格式")
+        return provider
+    
+    def _init_google_client(self, google_api_key: str = None) -> DistanceProvider:
+        """初始化Google Maps客户端"""
         # 优先使用传入的API密钥，其次使用环境变量
         env_api_key = os.getenv('GOOGLE_MAPS_API_KEY')
         self.google_api_key = google_api_key or env_api_key
-        self.trips = []
         
         # 调试信息
-        print(f"🔍 API密钥检测:")
-        print(f"   命令行参数: {'✅ 有' if google_api_key else '❌ 无'}")
-        print(f"   环境变量: {'✅ 有' if env_api_key else '❌ 无'}")
-        print(f"   最终使用: {'✅ 有' if self.google_api_key else '❌ 无'}")
+        log.debug(f"🔍 API密钥检测:\n"
+                  f"   命令行参数: {'✅ 有' if google_api_key else '❌ 无'}\n"
+                  f"   环境变量: {'✅ 有' if env_api_key else '❌ 无'}\n"
+                  f"   最终使用: {'✅ 有' if self.google_api_key else '❌ 无'}")
         
         # 初始化Google Maps客户端（如果提供了API密钥）
-        self.gmaps = None
+        provider = None
         if self.google_api_key:
             try:
-                import googlemaps
-                self.gmaps = googlemaps.Client(key=self.google_api_key)
-                print("✅ Google Maps API已连接")
-                if google_api_key:
-                    print("   (使用命令行参数)")
-                else:
-                    print("   (使用环境变量 GOOGLE_MAPS_API_KEY)")
+                provider = GoogleDistanceProvider(self.google_api_key)
+                source = "使用命令行参数" if google_api_key else "使用环境变量 GOOGLE_MAPS_API_KEY"
+                log.info(f"✅ Google Maps API已连接 ({source})")
             except ImportError:
-                print("⚠️  警告: 请安装googlemaps包: pip install googlemaps")
-                print("⚠️  将无法使用真实距离计算")
+                log.warning("⚠️  警告: 请安装googlemaps包: pip install googlemaps\n"
+                            "⚠️  将无法使用真实距离计算")
             except Exception as e:
-                print(f"⚠️  Google Maps API连接失败: {e}")
-                print("⚠️  将无法使用真实距离计算")
+                log.warning(f"⚠️  Google Maps API连接失败: {e}\n"
+                            "⚠️  将无法使用真实距离计算")
         else:
-            print("❌ 未找到Google Maps API密钥!")
-            print("   请使用以下方式之一:")
-            print("   1. 设置环境变量: export GOOGLE_MAPS_API_KEY='your_api_key'")
-            print("   2. 使用命令行参数: --google-api-key YOUR_API_KEY")
-            print("   3. 确保.env文件存在且已加载")
-            print("⚠️  将无法使用真实距离计算")
+            log.warning("❌ 未找到Google Maps API密钥!\n"
+                        "   请使用以下方式之一:\n"
+                        "   1. 设置环境变量: export GOOGLE_MAPS_API_KEY='your_api_key'\n"
+                        "   2. 使用命令行参数: --google-api-key YOUR_API_KEY\n"
+                        "   3. 确保.env文件存在且已加载\n"
+                        "⚠️  将无法使用真实距离计算")
+        return provider
         
     def get_quarter_dates(self) -> List[datetime]:
         """获取指定季度的日期范围"""
@@ -206,95 +385,440 @@ class TripGenerator:
         """在指定日期范围内生成随机日期"""
         time_between = end_date - start_date
         days_between = time_between.days
-        random_days = random.randrange(days_between)
+        random_days = self.rng.randrange(days_between)
         return start_date + timedelta(days=random_days)
     
-    def calculate_distance(self, destination: str) -> int:
-        """计算距离（仅使用Google Maps API真实距离）"""
-        if not self.gmaps:
-            print(f"❌ 无Google Maps API密钥，无法计算到 {destination} 的距离")
-            return None
-        
+    def _address_variants(self, destination: str) -> List[str]:
+        """生成目的地的候选地址格式，之前匹配成功的地址格式排在最前"""
+        variants = self._default_address_variants(destination)
+        learned = self.learned_variants.get(destination)
+        if learned is not None:
+            variants = [learned] + [address for address in variants if address != learned]
+        return variants
+    
+    def _default_address_variants(self, destination: str) -> List[str]:
+        """按固定顺序生成目的地的候选地址格式"""
         # 检查是否是比利时城市（带 BE 标识）
         is_belgian = destination.endswith(" BE")
         clean_destination = destination.replace(" BE", "") if is_belgian else destination
         
         # 根据城市类型设置地址格式
         if is_belgian:
-            address_variants = [
+            return [
                 f"{clean_destination}, Belgium",
                 f"{clean_destination}, België",
                 f"{clean_destination}, BE",
                 f"{clean_destination}"
             ]
+        # 荷兰城市的地址格式
+        return [
+            f"{clean_destination}, Netherlands",
+            f"{clean_destination}, Nederland", 
+            f"{clean_destination}",
+            f"{clean_destination}, Holland"
+        ]
+    
+    def _lookup_cache(self, address_variants: List[str]):
+        """在持久化缓存中查找任一地址格式，命中时返回 (地址, 单程距离米, 单程行驶时间秒)"""
+        if self.cache is None:
+            return None
+        
+        return self.cache.get_any(self.start_location, address_variants, self.mode, self.units, self.avoid)
+    
+    def _learn_variant(self, destination: str, address: str):
+        """记住目的地匹配成功的地址格式，之后的查询直接使用它"""
+        if self.learned_variants.get(destination) == address:
+            return
+        self.learned_variants[destination] = address
+        self.known_failures.pop(destination, None)
+        if self.cache is not None:
+            self.cache.put_variant(destination, address)
+    
+    def _record_failure(self, destination: str, statuses: List[str]):
+        """所有地址格式都明确返回无法匹配时，把目的地写入负缓存"""
+        if (len(statuses) < len(self._address_variants(destination)) or
+                not all(status in NEGATIVE_CACHE_STATUSES for status in statuses)):
+            return
+        self.known_failures[destination] = statuses[0]
+        if self.cache is not None:
+            self.cache.put_failure(destination, statuses[0])
+    
+    @staticmethod
+    def _element_ok(element: dict) -> bool:
+        return element is not None and element.get('status') == 'OK'
+    
+    def calculate_distance(self, destination: str) -> int:
+        """计算距离（仅使用Google Maps API真实距离，优先读取缓存）"""
+        self.metrics.increment("distance_lookups")
+        if destination in self.distance_memo:
+            self.metrics.increment("distance_memo_hits")
         else:
-            # 荷兰城市的地址格式
-            address_variants = [
-                f"{clean_destination}, Netherlands",
-                f"{clean_destination}, Nederland", 
-                f"{clean_destination}",
-                f"{clean_destination}, Holland"
-            ]
+            with self.metrics.phase("distance_lookup"):
+                self.resolve_distances([destination])
+        return self.distance_memo[destination]
+    
+    def _fetch_element(self, address: str) -> dict:
+        """查询单个地址格式，返回矩阵元素（状态可能不是OK），请求本身失败时返回None"""
+        if self.api_unavailable:
+            return None
+        try:
+            log_event(log, logging.DEBUG, "address_attempt", f"🔍 尝试地址: {address}", address=address)
+            result = self.provider.distance_matrix(
+                origins=[self.start_location],
+                destinations=[address],
+                mode=self.mode,
+                units=self.units,
+                avoid=self.avoid
+            )
+            self._count_api_call()
+        except QuotaError as e:
+            self._degrade_to_cache(e)
+            return None
+        except Exception as e:
+            self._count_api_call()
+            self.metrics.increment("api_errors")
+            log_event(log, logging.WARNING, "api_error", f"⚠️  API调用异常: {address} - {e}",
+                      address=address, error=str(e))
+            return None
         
-        for address in address_variants:
-            try:
-                print(f"🔍 尝试地址: {address}")
-                result = self.gmaps.distance_matrix(
-                    origins=[self.start_location],
-                    destinations=[address],
-                    mode="driving",
-                    units="metric",
-                    avoid="tolls"
-                )
-                
-                # 检查API响应
-                if (result['status'] == 'OK' and 
-                    len(result['rows']) > 0 and
-                    len(result['rows'][0]['elements']) > 0 and
-                    result['rows'][0]['elements'][0]['status'] == 'OK'):
-                    
-                    # 提取距离信息
-                    element = result['rows'][0]['elements'][0]
-                    distance_m = element['distance']['value']
-                    distance_text = element['distance']['text']
-                    duration_text = element['duration']['text']
-                    
-                    one_way_km = distance_m / 1000
-                    round_trip_km = int(one_way_km * 2)
-                    
-                    print(f"✅ 成功匹配地址: {address}")
-                    print(f"📏 单程距离: {one_way_km:.1f}km ({distance_text})")
-                    print(f"🔄 来回距离: {round_trip_km}km")
-                    print(f"⏱️  行驶时间: {duration_text}")
-                    
-                    return round_trip_km
-                else:
-                    element_status = 'UNKNOWN'
-                    if (len(result['rows']) > 0 and 
-                        len(result['rows'][0]['elements']) > 0):
-                        element_status = result['rows'][0]['elements'][0].get('status', 'UNKNOWN')
-                    
-                    print(f"⚠️  地址匹配失败: {address}")
-                    print(f"    API状态: {result.get('status', 'UNKNOWN')}")
-                    print(f"    元素状态: {element_status}")
-                    continue
-                    
-            except Exception as e:
-                print(f"⚠️  API调用异常: {address} - {e}")
+        # 检查API响应
+        element = None
+        if (result['status'] == 'OK' and 
+            len(result['rows']) > 0 and
+            len(result['rows'][0]['elements']) > 0):
+            element = result['rows'][0]['elements'][0]
+            if element['status'] == 'OK':
+                return element
+        
+        api_status = result.get('status', 'UNKNOWN')
+        element_status = element.get('status', 'UNKNOWN') if element else 'UNKNOWN'
+        log_event(log, logging.DEBUG, "address_failed",
+                  f"⚠️  地址匹配失败: {address} (API状态: {api_status}, 元素状态: {element_status})",
+                  address=address, api_status=api_status, element_status=element_status)
+        return element
+    
+    def resolve_distances(self, destinations: List[str]) -> Dict[str, int]:
+        """并发解析多个目的地的来回距离
+        
+        每个目的地的所有地址格式同时提交到有界线程池，取最先成功的结果并取消其余查询。
+        已学习地址格式的目的地先只查询该格式，失败时才查询其余格式；负缓存中的目的地不再查询。
+        """
+        pending = []
+        for destination in dict.fromkeys(destinations):
+            if destination in self.distance_memo:
                 continue
+            
+            # 先查持久化缓存，命中则无需调用API
+            cached = self._lookup_cache(self._address_variants(destination))
+            if cached is not None:
+                address, distance_m, _ = cached
+                self._learn_variant(destination, address)
+                self.distance_memo[destination] = int(distance_m / 1000 * 2)
+                self.metrics.increment("cache_hits")
+                log_event(log, logging.DEBUG, "cache_hit",
+                          f"💾 缓存命中: {address} ({self.distance_memo[destination]}km 来回)",
+                          destination=destination, address=address,
+                          round_trip_km=self.distance_memo[destination])
+            elif destination in self.known_failures:
+                self.metrics.increment("negative_cache_hits")
+                log_event(log, logging.DEBUG, "negative_cache_hit",
+                          f"🚫 已知无法匹配，跳过查询: {destination} ({self.known_failures[destination]})",
+                          destination=destination, status=self.known_failures[destination])
+                self.distance_memo[destination] = None
+            elif self.provider is None:
+                self.metrics.increment("failed_lookups")
+                log_event(log, logging.WARNING, "lookup_failed",
+                          f"❌ 无Google Maps API密钥，无法计算到 {destination} 的距离", destination=destination)
+                self.distance_memo[destination] = None
+            elif self.api_unavailable:
+                # 配额不可用：不再查询，本次运行跳过该目的地（不写入负缓存）
+                self.metrics.increment("quota_skipped_lookups")
+                log_event(log, logging.DEBUG, "lookup_skipped",
+                          f"⏭️  API配额不可用，跳过查询: {destination}", destination=destination)
+                self.distance_memo[destination] = None
+            else:
+                pending.append(destination)
+        
+        if not pending:
+            return {destination: self.distance_memo[destination] for destination in destinations}
+        
+        variants = {destination: self._address_variants(destination) for destination in pending}
+        statuses = {destination: [] for destination in pending}
+        
+        # 第一轮：已学习的目的地只查询学到的格式，其余目的地同时查询所有格式
+        first_round = {destination: addresses[:1] if destination in self.learned_variants else addresses
+                       for destination, addresses in variants.items()}
+        self._resolve_round(first_round, statuses)
+        
+        # 第二轮：学到的格式失效时再查询其余格式
+        retry = {destination: variants[destination][1:] for destination in pending
+                 if destination in self.learned_variants and self.distance_memo.get(destination) is None}
+        if retry:
+            self._resolve_round(retry, statuses)
         
         # 如果所有地址变体都失败了
-        print(f"❌ 无法获取到 {destination} 的距离信息")
-        print(f"    已尝试的地址格式: {address_variants}")
-        return None
+        for destination in pending:
+            if self.distance_memo.get(destination) is None:
+                self.distance_memo[destination] = None
+                self.metrics.increment("failed_lookups")
+                self._record_failure(destination, statuses[destination])
+                log_event(log, logging.WARNING, "lookup_failed",
+                          f"❌ 无法获取到 {destination} 的距离信息\n    已尝试的地址格式: {variants[destination]}",
+                          destination=destination, variants=variants[destination],
+                          statuses=statuses[destination])
+        
+        return {destination: self.distance_memo[destination] for destination in destinations}
+    
+    def _resolve_round(self, variants: Dict[str, List[str]], statuses: Dict[str, List[str]]):
+        """并发查询一轮地址格式，把成功结果写入 distance_memo，失败的元素状态追加到 statuses"""
+        self._geocode_addresses([address for addresses in variants.values() for address in addresses])
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {}
+            for destination, addresses in variants.items():
+                # 第一个地址格式之外的查询都算作地址格式重试
+                retries = len(addresses) - 1 if not statuses[destination] else len(addresses)
+                self.metrics.increment("address_variant_retries", retries)
+                for address in addresses:
+                    futures[executor.submit(self._fetch_element, address)] = (destination, address)
+            
+            for future in as_completed(futures):
+                # 同一目的地的其他地址格式已胜出时，未开始的查询被取消，result() 会抛出 CancelledError
+                if future.cancelled():
+                    continue
+                destination, address = futures[future]
+                element = future.result()
+                if self.distance_memo.get(destination) is not None:
+                    continue
+                if not self._element_ok(element):
+                    statuses[destination].append(element.get('status', 'UNKNOWN') if element else 'ERROR')
+                    continue
+                
+                # 第一个成功的地址格式胜出，取消该目的地尚未开始的其他查询
+                for other, (other_destination, _) in futures.items():
+                    if other_destination == destination:
+                        other.cancel()
+                
+                if self.learned_variants.get(destination) == address:
+                    self.metrics.increment("learned_variant_hits")
+                self._learn_variant(destination, address)
+                self._store_element(address, element)
+                one_way_km = element['distance']['value'] / 1000
+                round_trip_km = int(one_way_km * 2)
+                self.distance_memo[destination] = round_trip_km
+                
+                log_event(log, logging.DEBUG, "address_resolved",
+                          f"✅ 成功匹配地址: {address} (单程 {one_way_km:.1f}km, 来回 {round_trip_km}km, "
+                          f"行驶时间 {element['duration']['text']})",
+                          destination=destination, address=address, one_way_km=one_way_km,
+                          round_trip_km=round_trip_km, duration_s=element['duration'].get('value'))
+    
+    def _geocode_addresses(self, addresses: List[str]):
+        """矩阵请求前并发地理编码一批地址（每个地址只解析一次），请求路径上不再逐个等待地理编码"""
+        if self.geocoder is None or self.api_unavailable:
+            return
+        try:
+            self.geocoder.locate_all([self.start_location] + addresses, self.max_workers)
+        except QuotaError as e:
+            self._degrade_to_cache(e)
+    
+    def _degrade_to_cache(self, error: QuotaError):
+        """API 配额不可用时只记录一次，之后的查询只使用缓存和本次运行已解析的距离"""
+        with self._api_lock:
+            if self.api_unavailable:
+                return
+            self.api_unavailable = str(error)
+        self.metrics.increment("api_degraded")
+        log_event(log, logging.WARNING, "api_degraded",
+                  f"⚠️  {error}: 之后只使用缓存中的距离，未解析的目的地跳过",
+                  reason=str(error))
     
+    def _count_api_call(self):
+        """线程安全地累加API调用次数"""
+        with self._api_lock:
+            self.api_calls += 1
+        self.metrics.increment("api_calls")
+    
+    def _store_element(self, address: str, element: dict):
+        """将成功的矩阵元素写入持久化缓存"""
+        if self.cache is not None:
+            self.cache.put(self.start_location, address, self.mode, self.units, self.avoid,
+                           element['distance']['value'], element.get('duration', {}).get('value'))
+    
+    def _candidate_cities(self) -> List[str]:
+        """当前起点所有可能被选中的城市（首选列表 + 全部城市，去重保序）"""
+        candidates = []
+        for distance_type in ("short", "medium", "long"):
+            candidates.extend(self._preferred_cities(distance_type))
+        candidates.extend(self.registry.names)
+        return list(dict.fromkeys(candidates))
+    
+    def _fetch_matrix_batch(self, addresses: List[str]) -> List[dict]:
+        """一次矩阵请求查询多个目的地，返回与地址一一对应的元素（请求失败时为None）"""
+        if self.api_unavailable:
+            return [None] * len(addresses)
+        try:
+            result = self.provider.distance_matrix(
+                origins=[self.start_location],
+                destinations=addresses,
+                mode=self.mode,
+                units=self.units,
+                avoid=self.avoid
+            )
+            self._count_api_call()
+        except QuotaError as e:
+            self._degrade_to_cache(e)
+            return [None] * len(addresses)
+        except Exception as e:
+            self._count_api_call()
+            self.metrics.increment("api_errors")
+            log_event(log, logging.WARNING, "api_error", f"⚠️  批量API调用异常 ({len(addresses)}个地址) - {e}",
+                      addresses=len(addresses), error=str(e))
+            return [None] * len(addresses)
+        
+        if result.get('status') != 'OK' or not result.get('rows'):
+            log_event(log, logging.WARNING, "api_error",
+                      f"⚠️  批量请求失败, API状态: {result.get('status', 'UNKNOWN')}",
+                      addresses=len(addresses), api_status=result.get('status', 'UNKNOWN'))
+            return [None] * len(addresses)
+        
+        return result['rows'][0]['elements']
+    
+    def _batch_size(self, pending: int) -> int:
+        """单次矩阵请求可以包含的目的地数量（单一起点）"""
+        limits = [pending]
+        for limit in (self.provider.max_destinations_per_request, self.provider.max_elements_per_request):
+            if limit:
+                limits.append(limit)
+        return max(1, min(limits))
+    
+    @timed("prefetch")
+    def prefetch_distances(self, destinations: List[str] = None):
+        """在生成前批量解析所有候选目的地的距离，结果保存在内存中供主循环使用"""
+        if destinations is None:
+            destinations = self._candidate_cities()
+        pending = [city for city in dict.fromkeys(destinations) if city not in self.distance_memo]
+        if not pending:
+            return self.distance_memo
+        
+        # 先从持久化缓存中读取
+        remaining = []
+        hits = 0
+        for city in pending:
+            cached = self._lookup_cache(self._address_variants(city))
+            if cached is not None:
+                self._learn_variant(city, cached[0])
+                self.distance_memo[city] = int(cached[1] / 1000 * 2)
+                hits += 1
+            elif city in self.known_failures:
+                # 负缓存中的城市不再查询
+                self.distance_memo[city] = None
+            else:
+                remaining.append(city)
+        
+        skipped = len(pending) - hits - len(remaining)
+        self.metrics.increment("cache_hits", hits)
+        self.metrics.increment("negative_cache_hits", skipped)
+        log_event(log, logging.INFO, "prefetch_started",
+                  f"⚡ 预取距离: {len(pending)}个候选目的地, 缓存命中 {hits}个, 已知无法匹配 {skipped}个",
+                  candidates=len(pending), cache_hits=hits, negative_cache_hits=skipped)
+        
+        if remaining and self.provider is None:
+            log.warning(f"❌ 无Google Maps API密钥，{len(remaining)}个目的地无法预取")
+            return self.distance_memo
+        if remaining and self.api_unavailable:
+            log.warning(f"⚠️  API配额不可用，{len(remaining)}个目的地无法预取，只使用缓存中的距离")
+            for city in remaining:
+                self.distance_memo[city] = None
+            self.metrics.increment("quota_skipped_lookups", len(remaining))
+            return self.distance_memo
+        
+        # 按地址格式逐轮批量查询，每轮只查询上一轮未解析的目的地
+        batch_size = self._batch_size(len(remaining))
+        calls_before = self.api_calls
+        # 已学习地址格式的城市排在第一位，第一轮就直接命中
+        variants = {city: self._address_variants(city) for city in remaining}
+        statuses = {city: [] for city in remaining}
+        queried = list(remaining)
+        variant_index = 0
+        while remaining and not self.api_unavailable:
+            remaining = [city for city in remaining if variant_index < len(variants[city])]
+            if not remaining:
+                break
+            if variant_index > 0:
+                self.metrics.increment("address_variant_retries", len(remaining))
+            
+            # 先并发地理编码本轮的地址，再按批次并发发送矩阵请求
+            self._geocode_addresses([variants[city][variant_index] for city in remaining])
+            if self.api_unavailable:
+                break
+            chunks = [remaining[start:start + batch_size] for start in range(0, len(remaining), batch_size)]
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                futures = {
+                    executor.submit(self._fetch_matrix_batch,
+                                    [variants[city][variant_index] for city in chunk]): chunk
+                    for chunk in chunks
+                }
+                unresolved = []
+                for future in as_completed(futures):
+                    chunk = futures[future]
+                    for city, element in zip(chunk, future.result()):
+                        address = variants[city][variant_index]
+                        if not self._element_ok(element):
+                            statuses[city].append(element.get('status', 'UNKNOWN') if element else 'ERROR')
+                            unresolved.append(city)
+                            continue
+                        if self.learned_variants.get(city) == address:
+                            self.metrics.increment("learned_variant_hits")
+                        self._learn_variant(city, address)
+                        self._store_element(address, element)
+                        self.distance_memo[city] = int(element['distance']['value'] / 1000 * 2)
+            
+            remaining = unresolved
+            variant_index += 1
+        
+        failed = [city for city in queried if city not in self.distance_memo]
+        for city in failed:
+            self.distance_memo[city] = None
+            self._record_failure(city, statuses[city])
+        
+        self.metrics.increment("failed_lookups", len(failed))
+        log_event(log, logging.INFO, "prefetch_finished",
+                  f"⚡ 预取完成: {self.api_calls - calls_before}次批量请求, "
+                  f"{len(queried) - len(failed)}个成功, {len(failed)}个无法解析"
+                  + (" (API配额不可用，只使用缓存)" if self.api_unavailable else ""),
+                  requests=self.api_calls - calls_before, resolved=len(queried) - len(failed), failed=len(failed),
+                  degraded=bool(self.api_unavailable))
+        return self.distance_memo
+    
+    @timed("index")
+    def build_distance_index(self) -> DistanceIndex:
+        """根据已解析的距离建立按距离排序的城市索引"""
+        # 来回距离为0的城市即起点本身，不作为目的地
+        known = {city: self.distance_memo.get(city) for city in self._candidate_cities()
+                 if self.distance_memo.get(city)}
+        self.distance_index = DistanceIndex(known, rng=self.rng)
+        sizes = self.distance_index.bucket_sizes()
+        log_event(log, logging.INFO, "distance_index",
+                  f"🗂️  距离索引: {len(self.distance_index)}个城市 "
+                  f"(短途 {sizes['short']}, 中途 {sizes['medium']}, 长途 {sizes['long']})",
+                  cities=len(self.distance_index), **sizes)
+        return self.distance_index
+    
+    @timed("generate")
     def generate_trips(self):
         """生成旅程记录（仅使用真实距离，按距离分布）"""
-        start_date, end_date = self.get_quarter_dates()
+        if self.planner == "optimal":
+            return self._generate_planned_trips()
+        
+        # 预先批量解析候选目的地，主循环直接从内存读取距离（已传入索引时直接使用）
+        if self.prefetch:
+            self.prefetch_distances()
+            if self.distance_index is None:
+                self.build_distance_index()
         current_km = 0
         failed_destinations = []
-        destination_counts = {}  # 跟踪每个目的地的使用次数
-        date_counts = {}  # 跟踪每个日期的行程次数
+        usage = CityUsage(self.registry, rng=self.rng)  # 跟踪每个目的地的使用次数和失败状态
+        calendar = self.build_calendar()
         
         # 距离分布目标
         target_short = int(self.target_km * 0.4)   # 40% < 150km (调整)
@@ -306,113 +830,292 @@ class TripGenerator:
         current_medium = 0  # 150-300km
         current_long = 0    # > 300km
         
-        print(f"🎯 距离分布目标:")
-        print(f"   短途 (<150km): {target_short}km (40%)")
-        print(f"   中途 (150-300km): {target_medium}km (40%)")
-        print(f"   长途 (>300km): {target_long}km (20%)")
-        print("-" * 50)
+        self._log_distance_targets({"short": target_short, "medium": target_medium, "long": target_long})
         
-        max_attempts = 1000  # 防止无限循环
+        # 防止无限循环：每次尝试要么占用一个日历名额，要么淘汰一个目的地
+        max_attempts = max(1000, 2 * calendar.remaining_capacity())
         attempts = 0
         
-        while current_km < self.target_km and attempts < max_attempts:
-            attempts += 1
-            
-            # 确定当前需要的距离类型
-            needed_type = self._determine_needed_distance_type(
-                current_short, current_medium, current_long,
-                target_short, target_medium, target_long
-            )
-            
-            # 根据需要的距离类型选择合适的目的地
-            destination = self._select_destination_by_distance_type(
-                needed_type, failed_destinations, destination_counts
-            )
-            
-            if destination is None:
-                print("❌ 无法找到合适的目的地，停止生成")
-                break
-            
-            # 生成随机日期，确保该日期的行程次数不超过2次
-            trip_date = self._generate_valid_date(start_date, end_date, date_counts)
-            
-            if trip_date is None:
-                print("⚠️  无法找到合适的日期（所有日期都已有2次行程），停止生成")
-                break
-            
-            # 计算距离（仅使用真实距离）
-            distance = self.calculate_distance(destination)
-            
-            if distance is None:
-                failed_destinations.append(destination)
-                print(f"⏭️  跳过目的地: {destination}")
+        # 从检查点继续：重放已接受的行程，恢复累计距离、尝试次数和随机数状态
+        if self._resume_state is not None:
+            attempts, restored = self._restore_progress(usage, calendar)
+            current_short, current_medium, current_long = restored["short"], restored["medium"], restored["long"]
+            current_km = current_short + current_medium + current_long
+        
+        progress = ProgressIndicator("Ritten genereren", self.target_km, unit="km")
+        
+        # 最近一次接受行程时的尝试次数和随机数状态：中途异常退出时从这一点继续，结果与未中断时相同
+        resume_point = (attempts, self.rng.getstate()) if self.checkpoint_path else None
+        
+        # 正常结束、提前停止或异常退出时都保存一次检查点（排序之前，保持接受行程的顺序）
+        try:
+            while current_km < self.target_km and attempts < max_attempts:
+                attempts += 1
+                self.metrics.increment("loop_iterations")
+                
+                # 确定当前需要的距离类型
+                needed_type = self._determine_needed_distance_type(
+                    current_short, current_medium, current_long,
+                    target_short, target_medium, target_long
+                )
                 
-                # 如果失败的目的地太多，停止生成
-                if len(failed_destinations) > 50:
-                    print("❌ 太多目的地无法获取距离，请检查网络连接或API密钥")
+                # 根据需要的距离类型选择合适的目的地
+                with self.metrics.phase("selection"):
+                    destination = self._select_destination_by_distance_type(needed_type, usage)
+                
+                if destination is None:
+                    log.error("❌ 无法找到合适的目的地，停止生成")
+                    break
+                
+                # 生成随机日期，确保该日期的行程次数不超过每日上限
+                trip_date = self._generate_valid_date(calendar)
+                
+                if trip_date is None:
+                    log.warning(f"⚠️  无法找到合适的日期（所有日期都已有{self.max_trips_per_day}次行程），停止生成")
+                    break
+                
+                # 计算距离（仅使用真实距离）
+                distance = self.calculate_distance(destination)
+                
+                if distance is None:
+                    failed_destinations.append(destination)
+                    usage.fail(destination)
+                    self.metrics.increment("skipped_destinations")
+                    if self.distance_index is not None:
+                        self.distance_index.remove(destination)
+                    log_event(log, logging.DEBUG, "destination_skipped", f"⏭️  跳过目的地: {destination}",
+                              destination=destination)
+                    
+                    # 如果失败的目的地太多，停止生成
+                    if len(failed_destinations) > 50:
+                        log.error("❌ 太多目的地无法获取距离，请检查网络连接或API密钥")
+                        break
+                    continue
+                
+                # 更新目的地使用次数和日期使用次数
+                destination_count = usage.record(destination)
+                trips_on_date = calendar.book(trip_date)
+                
+                # 达到使用上限的目的地移出索引
+                if self.distance_index is not None and destination_count >= usage.max_per_destination:
+                    self.distance_index.remove(destination)
+                
+                # 更新相应的距离累计
+                bucket = classify_distance(distance)
+                if bucket == "short":
+                    current_short += distance
+                    distance_type = "短途"
+                elif bucket == "medium":
+                    current_medium += distance
+                    distance_type = "中途"
+                else:
+                    current_long += distance
+                    distance_type = "长途"
+                
+                self.trips.add(trip_date, destination, distance)
+                current_km += distance
+                
+                # 显示目的地使用次数和日期使用次数
+                count_info = f"({destination_count}/{usage.max_per_destination})" if destination_count > 1 else ""
+                date_info = f"[{trips_on_date}/{self.max_trips_per_day}日程]" if trips_on_date > 1 else ""
+                log_event(log, logging.INFO, "trip",
+                          f"✨ 添加行程: {destination} {count_info}({distance}km - {distance_type}) {date_info}".rstrip()
+                          + f" | 累计 {current_km}km / {self.target_km}km",
+                          date=self.trips.format_date(trip_date.toordinal()), destination=destination,
+                          distance_km=distance, distance_type=bucket,
+                          destination_count=destination_count, trips_on_date=trips_on_date,
+                          cumulative_km=current_km, short_km=current_short, medium_km=current_medium,
+                          long_km=current_long)
+                log_event(log, logging.DEBUG, "distance_progress",
+                          f"   短途: {current_short}km / {target_short}km, 中途: {current_medium}km / {target_medium}km, "
+                          f"长途: {current_long}km / {target_long}km")
+                progress.update(current_km, f"{len(self.trips)} ritten")
+                
+                # 定期保存检查点
+                if self.checkpoint_path:
+                    resume_point = (attempts, self.rng.getstate())
+                    if len(self.trips) % self.checkpoint_every == 0:
+                        self.save_checkpoint(attempts, {"short": current_short, "medium": current_medium,
+                                                        "long": current_long}, usage)
+                    
+                # 达到目标距离时停止
+                if current_km >= self.target_km:
                     break
-                continue
-            
-            # 更新目的地使用次数和日期使用次数
-            destination_counts[destination] = destination_counts.get(destination, 0) + 1
-            date_str = trip_date.strftime("%d-%m-%Y")
-            date_counts[date_str] = date_counts.get(date_str, 0) + 1
-            
-            # 更新相应的距离累计
-            if distance < 150:
-                current_short += distance
-                distance_type = "短途"
-            elif distance <= 300:
-                current_medium += distance
-                distance_type = "中途"
-            else:
-                current_long += distance
-                distance_type = "长途"
-            
-            trip = {
-                "date": date_str,
-                "destination": destination,
-                "description": "klant bezoeken",
-                "total_distance": distance
-            }
-            
-            self.trips.append(trip)
-            current_km += distance
-            
-            # 显示目的地使用次数和日期使用次数
-            count_info = f"({destination_counts[destination]}/3)" if destination_counts[destination] > 1 else ""
-            date_info = f"[{date_counts[date_str]}/2日程]" if date_counts[date_str] > 1 else ""
-            print(f"✨ 添加行程: {destination} {count_info}({distance}km - {distance_type}) {date_info}")
-            print(f"📊 累计距离: {current_km}km / 目标: {self.target_km}km")
-            print(f"   短途: {current_short}km / {target_short}km")
-            print(f"   中途: {current_medium}km / {target_medium}km") 
-            print(f"   长途: {current_long}km / {target_long}km")
-            print("-" * 50)
-            
-            # 达到目标距离时停止
-            if current_km >= self.target_km:
-                break
+        
+        finally:
+            if self.checkpoint_path:
+                self.save_checkpoint(resume_point[0], {"short": current_short, "medium": current_medium,
+                                                       "long": current_long}, usage,
+                                     finished=current_km >= self.target_km, random_state=resume_point[1])
+        
+        progress.close()
         
         if attempts >= max_attempts:
-            print("⚠️  达到最大尝试次数，可能由于日期或目的地限制无法继续生成")
+            log.warning("⚠️  达到最大尝试次数，可能由于日期或目的地限制无法继续生成")
         
         if failed_destinations:
-            print(f"\n⚠️  以下目的地无法获取距离: {failed_destinations[:10]}...")
-        
-        # 显示目的地使用统计
-        self._print_destination_usage(destination_counts)
+            log_event(log, logging.WARNING, "failed_destinations",
+                      f"\n⚠️  以下目的地无法获取距离: {failed_destinations[:10]}...",
+                      destinations=failed_destinations)
         
-        # 显示日期使用统计
-        self._print_date_usage(date_counts)
+        # 显示目的地使用、日期使用和最终距离分布统计（由行程表整列计算）
+        self._print_destination_usage()
+        self._print_date_usage()
+        self._print_final_distribution()
         
-        # 显示最终分布
-        self._print_final_distribution(current_short, current_medium, current_long)
+        # 显示API调用和缓存统计
+        self._print_cache_usage()
         
         # 按日期排序
-        self.trips.sort(key=lambda x: datetime.strptime(x["date"], "%d-%m-%Y"))
+        with self.metrics.phase("sorting"):
+            self.trips.sort()
         
         return self.trips
     
+    def adopt_plan(self, seed: int, trips) -> TripStore:
+        """采用已经生成的方案（例如多候选模式中得分最好的方案）作为本次运行的结果，不再重新生成"""
+        self.seed = seed
+        self.trips = TripStore.from_trips(trips)
+        self.trips.sort()
+        log_event(log, logging.INFO, "plan_adopted",
+                  f"🏆 采用 seed {seed} 的方案: {len(self.trips)}次行程, {self.trips.total_distance()}km",
+                  seed=seed, trips=len(self.trips), total_km=self.trips.total_distance())
+        self._print_destination_usage()
+        self._print_date_usage()
+        self._print_final_distribution()
+        self._print_cache_usage()
+        return self.trips
+    
+    def _generate_planned_trips(self):
+        """规划模式：距离全部已知后，一次求解总公里数和距离分布都精确的行程组合"""
+        # 规划器依赖 numpy，只在 optimal 模式下导入
+        from trip_planner import TripPlanner, distance_quotas
+        
+        self.prefetch_distances()
+        if self.distance_index is None:
+            self.build_distance_index()
+        calendar = self.build_calendar()
+        
+        # 规划只依赖距离和随机数状态：检查点保存预取结果，继续时直接从规划开始
+        if self._resume_state is not None:
+            self._restore_progress(CityUsage(self.registry, rng=self.rng), calendar)
+        elif self.checkpoint_path:
+            self.save_checkpoint()
+        
+        quotas = distance_quotas(self.target_km)
+        self._log_distance_targets(quotas)
+        
+        distances = {city: self.distance_index.distance(city) for city in self.distance_index.candidates()}
+        planner = TripPlanner(distances, rng=self.rng)
+        try:
+            with self.metrics.phase("planning"):
+                plan = planner.plan(self.target_km, quotas, calendar.remaining_capacity())
+        except ValueError as e:
+            # 目标无法达成时直接失败，不导出空报告
+            raise ValueError(f"无法规划行程: {e}") from e
+        
+        for destination, distance in plan:
+            trip_date = calendar.sample()
+            calendar.book(trip_date)
+            self.trips.add(trip_date, destination, distance)
+        
+        for trip in self.trips:
+            log_event(log, logging.INFO, "trip",
+                      f"✨ 添加行程: {trip['destination']} ({trip['total_distance']}km) {trip['date']}",
+                      date=trip["date"], destination=trip["destination"], distance_km=trip["total_distance"],
+                      distance_type=classify_distance(trip["total_distance"]))
+        total_km = self.trips.total_distance()
+        log_event(log, logging.INFO, "plan_finished",
+                  f"🧮 规划完成: {len(self.trips)}次行程, {total_km}km / 目标: {self.target_km}km",
+                  trips=len(self.trips), total_km=total_km, target_km=self.target_km)
+        
+        self._print_destination_usage()
+        self._print_date_usage()
+        self._print_final_distribution()
+        self._print_cache_usage()
+        
+        with self.metrics.phase("sorting"):
+            self.trips.sort()
+        return self.trips
+    
+    def _run_parameters(self) -> dict:
+        """决定生成结果的运行参数，继续运行时必须与检查点一致"""
+        return {
+            "year": self.year,
+            "quarter": self.quarter,
+            "target_km": self.target_km,
+            "start_location": self.start_location,
+            "planner": self.planner,
+            "distance_provider": self.distance_provider,
+            "max_trips_per_day": self.max_trips_per_day,
+            "weekdays_only": self.weekdays_only,
+            "blackout_dates": sorted(day.isoformat() for day in self.blackout_dates),
+        }
+    
+    def save_checkpoint(self, attempts: int = 0, totals: Dict[str, int] = None, usage: CityUsage = None,
+                        finished: bool = False, random_state: tuple = None) -> str:
+        """把当前运行状态写入检查点文件（random_state 默认为生成器当前的随机数状态）"""
+        save_checkpoint(self.checkpoint_path, {
+            "run": self._run_parameters(),
+            "finished": finished,
+            "attempts": attempts,
+            "totals": totals or {"short": 0, "medium": 0, "long": 0},
+            "trips": self.trips.rows(),
+            "destination_counts": usage.as_dict() if usage is not None else {},
+            "date_counts": self.trips.date_counts(),
+            "distances": {city: km for city, km in self.distance_memo.items() if km is not None},
+            "random_state": encode_random_state(random_state or self.rng.getstate()),
+        })
+        self.metrics.increment("checkpoints_saved")
+        return self.checkpoint_path
+    
+    def resume(self, path: str = None) -> int:
+        """读取检查点：恢复已解析的距离，生成时从中断处继续，返回已接受的行程数
+        
+        只恢复成功解析的距离；中断前失败的查询（可能是网络问题）会重新尝试，
+        确认无法匹配的城市由负缓存跳过。
+        """
+        path = path or self.checkpoint_path
+        state = load_checkpoint(path)
+        mismatched = mismatched_parameters(state["run"], self._run_parameters())
+        if mismatched:
+            raise ValueError(f"checkpoint {path} hoort bij een andere run (verschil in: {', '.join(mismatched)})")
+        
+        self.distance_memo.update(state["distances"])
+        self._resume_state = state
+        log_event(log, logging.INFO, "resumed",
+                  f"⏯️  从检查点继续: {path} ({len(state['trips'])}次行程, {len(state['distances'])}个已知距离, "
+                  f"保存于 {state['saved_at']})",
+                  checkpoint=path, trips=len(state["trips"]), distances=len(state["distances"]),
+                  saved_at=state["saved_at"], finished=state["finished"])
+        return len(state["trips"])
+    
+    def _restore_progress(self, usage: CityUsage, calendar: TripCalendar):
+        """按原来的接受顺序重放检查点中的行程，恢复日历、使用次数、索引和随机数状态
+        
+        返回 (尝试次数, 各类距离累计)。
+        """
+        state = self._resume_state
+        self._resume_state = None
+        for date_str, destination, distance in state["trips"]:
+            trip_date = datetime.strptime(date_str, DATE_FORMAT).date()
+            calendar.book(trip_date)
+            count = usage.record(destination)
+            if self.distance_index is not None and count >= usage.max_per_destination:
+                self.distance_index.remove(destination)
+            self.trips.add(trip_date, destination, distance)
+        self.rng.setstate(decode_random_state(state["random_state"]))
+        return state["attempts"], state["totals"]
+    
+    def _log_distance_targets(self, targets: Dict[str, int]):
+        """输出各距离类型的目标公里数"""
+        log_event(log, logging.INFO, "distance_targets",
+                  f"🎯 距离分布目标:\n"
+                  f"   短途 (<150km): {targets['short']}km (40%)\n"
+                  f"   中途 (150-300km): {targets['medium']}km (40%)\n"
+                  f"   长途 (>300km): {targets['long']}km (20%)\n" + "-" * 50,
+                  target_km=self.target_km, **{f"{bucket}_km": km for bucket, km in targets.items()})
+    
     def _determine_needed_distance_type(self, current_short, current_medium, current_long,
                                       target_short, target_medium, target_long):
         """确定当前最需要的距离类型"""
@@ -429,11 +1132,49 @@ class TripGenerator:
         else:
             return "long"
     
-    def _select_destination_by_distance_type(self, distance_type, failed_destinations, destination_counts=None):
+    def _select_destination_by_distance_type(self, distance_type, usage: CityUsage = None):
         """根据距离类型选择合适的目的地"""
-        if destination_counts is None:
-            destination_counts = {}
+        if usage is None:
+            usage = CityUsage(self.registry, rng=self.rng)
         
+        # 有距离索引时直接在对应距离区间中选择，不再依赖首选城市列表
+        if self.distance_index is not None:
+            destination = self.distance_index.sample(distance_type)
+            if destination is None:
+                # 该距离类型已无可用城市，从所有可用城市中选择
+                destination = self.distance_index.sample()
+            if destination is None:
+                log.warning(f"⚠️  所有目的地都已达到{DEFAULT_MAX_PER_DESTINATION}次使用限制或无法访问")
+            return destination
+        
+        # 过滤出可用的首选城市（未失败且使用次数未达到上限）
+        available_cities = [city for city in self._preferred_cities(distance_type) if usage.is_available(city)]
+        available_cities = self._resolved_candidates(available_cities)
+        if available_cities:
+            return self.rng.choice(available_cities)
+        
+        # 如果首选城市都失败了或超过使用限制，从注册表的所有可用城市中抽样，
+        # 无法解析距离的城市在 O(log n) 内移出抽样器后重新抽取
+        while True:
+            destination = usage.sample()
+            if destination is None:
+                log.warning(f"⚠️  所有目的地都已达到{usage.max_per_destination}次使用限制或无法访问")
+                return None
+            if self.calculate_distance(destination) is not None:
+                return destination
+            usage.fail(destination)
+    
+    def _resolved_candidates(self, cities: List[str]) -> List[str]:
+        """并发解析尚未知道距离的候选城市，只保留能够解析的目的地"""
+        unknown = [city for city in cities if city not in self.distance_memo]
+        if len(unknown) > MAX_DESTINATIONS_PER_REQUEST:
+            self.prefetch_distances(unknown)
+        elif unknown:
+            self.resolve_distances(unknown)
+        return [city for city in cities if self.distance_memo.get(city) is not None]
+    
+    def _preferred_cities(self, distance_type) -> List[str]:
+        """根据起始地点和距离类型返回首选城市列表（未建立距离索引时使用）"""
         # 根据起始地点调整城市分类
         # 如果起点包含Duiven，使用Duiven周边的分类
         if "Duiven" in self.start_location:
@@ -493,56 +1234,32 @@ class TripGenerator:
                 # 长途：荷兰北部、东部和比利时城市（带 BE 标识）
                 preferred_cities = [
                     "Groningen", "Leeuwarden", "Enschede", "Emmen", "Maastricht",
-                    "Heerlen", "Venlo", "Roermond", "Helmod", "Antwerpen BE", "Gent BE",
+                    "Heerlen", "Venlo", "Roermond", "Helmond", "Antwerpen BE", "Gent BE",
                     "Brugge BE", "Kortrijk BE", "Hasselt BE", "Leuven BE", "Mechelen BE", "Oostende BE",
                     "Mouscron BE", "Sint-Niklaas BE", "Turnhout BE", "Genk BE", "Brasschaat BE",
                     "Ledegem BE", "Ieper BE", "Poperinge BE", "Lo-Reninge BE", "Westrozebeke BE"
                 ]
         
-        # 过滤出可用的城市（未失败且使用次数少于3次）
-        available_cities = [
-            city for city in preferred_cities 
-            if (city not in failed_destinations and 
-                destination_counts.get(city, 0) < 3)
-        ]
-        
-        if not available_cities:
-            # 如果首选城市都失败了或超过使用限制，从所有城市中选择
-            available_cities = [
-                city for city in DUTCH_CITIES 
-                if (city not in failed_destinations and 
-                    destination_counts.get(city, 0) < 3)
-            ]
-        
-        if not available_cities:
-            print("⚠️  所有目的地都已达到3次使用限制或无法访问")
-            return None
-        
-        return random.choice(available_cities)
+        return preferred_cities
     
-    def _generate_valid_date(self, start_date: datetime, end_date: datetime, date_counts: dict, max_attempts: int = 100) -> datetime:
-        """生成一个有效的日期，确保该日期的行程次数不超过2次"""
-        for _ in range(max_attempts):
-            trip_date = self.generate_random_date(start_date, end_date)
-            date_str = trip_date.strftime("%d-%m-%Y")
-            
-            # 检查该日期的行程次数是否少于2次
-            if date_counts.get(date_str, 0) < 2:
-                return trip_date
-        
-        # 如果随机生成失败，尝试找到第一个可用的日期
-        current_date = start_date
-        while current_date <= end_date:
-            date_str = current_date.strftime("%d-%m-%Y")
-            if date_counts.get(date_str, 0) < 2:
-                return current_date
-            current_date += timedelta(days=1)
-        
-        # 如果所有日期都已满，返回None
-        return None
-    
-    def _print_final_distribution(self, current_short, current_medium, current_long):
+    def build_calendar(self) -> TripCalendar:
+        """建立本季度的行程日历（考虑每日上限、仅工作日和屏蔽日期）"""
+        start_date, end_date = self.get_quarter_dates()
+        return TripCalendar(start_date, end_date, max_trips_per_day=self.max_trips_per_day,
+                            weekdays_only=self.weekdays_only, blackout_dates=self.blackout_dates, rng=self.rng)
+    
+    def _generate_valid_date(self, calendar: TripCalendar):
+        """从日历中均匀抽取一个仍有容量的日期，所有日期都已满时返回None"""
+        self.metrics.increment("date_samples")
+        trip_date = calendar.sample()
+        if trip_date is None:
+            self.metrics.increment("date_sampling_failures")
+        return trip_date
+    
+    def _print_final_distribution(self):
         """打印最终的距离分布"""
+        totals = self.trips.bucket_totals()
+        current_short, current_medium, current_long = totals["short"], totals["medium"], totals["long"]
         total = current_short + current_medium + current_long
         if total == 0:
             return
@@ -551,120 +1268,134 @@ class TripGenerator:
         medium_percent = (current_medium / total) * 100
         long_percent = (current_long / total) * 100
         
-        print(f"\n📊 最终距离分布:")
-        print(f"   短途 (<150km): {current_short}km ({short_percent:.1f}%)")
-        print(f"   中途 (150-300km): {current_medium}km ({medium_percent:.1f}%)")
-        print(f"   长途 (>300km): {current_long}km ({long_percent:.1f}%)")
-        print(f"   总计: {total}km")
+        log_event(summary_log, logging.INFO, "distance_distribution",
+                  f"\n📊 最终距离分布:\n"
+                  f"   短途 (<150km): {current_short}km ({short_percent:.1f}%)\n"
+                  f"   中途 (150-300km): {current_medium}km ({medium_percent:.1f}%)\n"
+                  f"   长途 (>300km): {current_long}km ({long_percent:.1f}%)\n"
+                  f"   总计: {total}km",
+                  short_km=current_short, medium_km=current_medium, long_km=current_long, total_km=total)
     
-    def export_to_excel(self, filename: str = None):
-        """导出到Excel文件"""
+    @timed("export")
+    def export(self, format_name: str = "xlsx", filename: str = None):
+        """用注册的导出器导出行程记录（xlsx、csv、jsonl、parquet、json）"""
         if not filename:
-            filename = f"reisverslag_{self.year}_Q{self.quarter}.xlsx"
+            filename = f"reisverslag_{self.year}_Q{self.quarter}{file_extension(format_name)}"
         
-        # 创建DataFrame
-        df = pd.DataFrame(self.trips)
+        export_reports(format_name, filename, [{
+            "sheet_name": "Reisverslag",
+            "trips": self.trips,
+            "year": self.year,
+            "quarter": self.quarter,
+        }])
         
-        # 重命名列为荷兰语
-        df = df.rename(columns={
-            "date": "Datum",
-            "destination": "Bestemming",
-            "description": "Omschrijving",
-            "total_distance": "Totale afstand (km)"
-        })
-        
-        # 添加汇总信息
-        total_distance = sum(trip["total_distance"] for trip in self.trips)
-        summary_data = {
-            "Datum": "Totaal",
-            "Bestemming": f"{len(self.trips)} ritten",
-            "Omschrijving": f"{self.year} Q{self.quarter}",
-            "Totale afstand (km)": total_distance
-        }
-        
-        # 添加汇总行
-        df_summary = pd.DataFrame([summary_data])
-        df = pd.concat([df, df_summary], ignore_index=True)
-        
-        # 导出到Excel
-        with pd.ExcelWriter(filename, engine='openpyxl') as writer:
-            df.to_excel(writer, sheet_name='Reisverslag', index=False)
-            
-            # 格式化工作表
-            worksheet = writer.sheets['Reisverslag']
-            
-            # 设置列宽
-            for column in worksheet.columns:
-                max_length = 0
-                column_letter = column[0].column_letter
-                for cell in column:
-                    try:
-                        if len(str(cell.value)) > max_length:
-                            max_length = len(str(cell.value))
-                    except:
-                        pass
-                adjusted_width = min(max_length + 2, 50)
-                worksheet.column_dimensions[column_letter].width = adjusted_width
-        
-        print(f"✅ Reisverslag geëxporteerd naar: {filename}")
-        print(f"📊 Totaal: {len(self.trips)} ritten, {total_distance} km")
+        total_distance = self.trips.total_distance()
+        log_event(summary_log, logging.INFO, "exported",
+                  f"✅ Reisverslag geëxporteerd naar: {filename}\n"
+                  f"📊 Totaal: {len(self.trips)} ritten, {total_distance} km",
+                  filename=filename, format=format_name, trips=len(self.trips), total_km=total_distance)
         
         return filename
     
+    def export_to_excel(self, filename: str = None):
+        """导出到Excel文件"""
+        return self.export("xlsx", filename)
+    
     def save_json(self, filename: str = None):
         """保存为JSON文件（可选）"""
         if not filename:
             filename = f"reisverslag_{self.year}_Q{self.quarter}.json"
         
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(self.trips, f, ensure_ascii=False, indent=2)
+        export_reports("json", filename, [{
+            "sheet_name": "Reisverslag",
+            "trips": self.trips,
+            "year": self.year,
+            "quarter": self.quarter,
+        }])
         
-        print(f"📄 JSON bestand opgeslagen als: {filename}")
+        log_event(summary_log, logging.INFO, "exported", f"📄 JSON bestand opgeslagen als: {filename}",
+                  filename=filename, format="json", trips=len(self.trips))
         return filename
 
-    def _print_destination_usage(self, destination_counts):
+    def _print_destination_usage(self):
         """打印目的地使用统计"""
+        destination_counts = self.trips.destination_counts()
         if not destination_counts:
             return
         
-        print(f"\n📍 目的地使用统计:")
+        lines = [f"\n📍 目的地使用统计:"]
         # 按使用次数排序
         sorted_destinations = sorted(destination_counts.items(), key=lambda x: x[1], reverse=True)
         
         for destination, count in sorted_destinations:
             if count > 1:
-                print(f"   {destination}: {count}次")
+                lines.append(f"   {destination}: {count}次")
         
         max_usage = max(destination_counts.values()) if destination_counts else 0
         total_destinations = len(destination_counts)
-        print(f"   总共使用 {total_destinations} 个不同目的地")
-        print(f"   最多重复次数: {max_usage}次")
+        lines.append(f"   总共使用 {total_destinations} 个不同目的地")
+        lines.append(f"   最多重复次数: {max_usage}次")
+        log_event(summary_log, logging.INFO, "destination_usage", "\n".join(lines),
+                  destinations=total_destinations, max_usage=max_usage,
+                  repeated={destination: count for destination, count in sorted_destinations if count > 1})
 
-    def _print_date_usage(self, date_counts):
+    def _print_cache_usage(self):
+        """打印API调用次数、请求调度和缓存命中统计"""
+        lines = [f"\n💾 距离缓存统计:", f"   API调用次数: {self.api_calls}次"]
+        fields = {"api_calls": self.api_calls}
+        if self.scheduler is not None:
+            fields["api_scheduler"] = stats = self.scheduler.stats()
+            budget = f" / 预算 {stats['budget']}" if stats["budget"] is not None else ""
+            lines.append(f"   API元素: {stats['budget_spent']}{budget}, 限速等待 {stats['throttled_seconds']:.1f}s, "
+                         f"配额重试 {stats['quota_retries']}次")
+            if self.api_unavailable:
+                lines.append(f"   ⚠️  {self.api_unavailable}，部分目的地只使用了缓存中的距离")
+        if self.geocoder is not None:
+            fields["geocoding"] = stats = self.geocoder.stats()
+            lines.append(f"   地理编码: 请求 {stats['requests']}次, 缓存命中 {stats['cache_hits']}次, "
+                         f"负缓存命中 {stats['negative_hits']}次, "
+                         f"无结果 {stats['failed']}个, 结果不可信 {stats['rejected']}个")
+        if self.cache is None:
+            lines.append(f"   缓存已禁用")
+            log_event(summary_log, logging.INFO, "cache_usage", "\n".join(lines), **fields)
+            return
+        stats = self.cache.stats()
+        lines.append(f"   命中: {stats['hits']}次, 未命中: {stats['misses']}次 (命中率 {stats['hit_rate'] * 100:.1f}%)")
+        lines.append(f"   新写入: {stats['writes']}条, 缓存文件: {self.cache.path}")
+        lines.append(f"   已学习地址格式: {len(self.learned_variants)}个, "
+                     f"负缓存: {len(self.known_failures)}个 (跳过 {self.metrics.count('negative_cache_hits')}次查询)")
+        log_event(summary_log, logging.INFO, "cache_usage", "\n".join(lines),
+                  cache_path=self.cache.path, learned_variants=len(self.learned_variants),
+                  negative_cache=len(self.known_failures), **fields, **stats)
+
+    def _print_date_usage(self):
         """打印日期使用统计"""
+        date_counts = self.trips.date_counts()
         if not date_counts:
             return
         
-        print(f"\n📅 日期使用统计:")
-        # 只显示有2次行程的日期
-        dates_with_2_trips = {date: count for date, count in date_counts.items() if count == 2}
+        lines = [f"\n📅 日期使用统计:"]
+        # 只显示有2次及以上行程的日期
+        dates_with_2_trips = {date: count for date, count in date_counts.items() if count >= 2}
         
         if dates_with_2_trips:
-            print(f"   有2次行程的日期: {len(dates_with_2_trips)}天")
-            # 按日期排序显示前几个
-            sorted_dates = sorted(dates_with_2_trips.items())
+            lines.append(f"   有2次及以上行程的日期: {len(dates_with_2_trips)}天")
+            # 按日期先后显示前几个
+            sorted_dates = list(dates_with_2_trips.items())
             for date, count in sorted_dates[:5]:  # 只显示前5个
-                print(f"      {date}: {count}次")
+                lines.append(f"      {date}: {count}次")
             if len(sorted_dates) > 5:
-                print(f"      ... 还有{len(sorted_dates) - 5}天")
+                lines.append(f"      ... 还有{len(sorted_dates) - 5}天")
         else:
-            print(f"   所有日期都只有1次行程")
+            lines.append(f"   所有日期都只有1次行程")
         
         total_days = len(date_counts)
         total_trips = sum(date_counts.values())
         avg_trips_per_day = total_trips / total_days if total_days > 0 else 0
-        print(f"   总共使用 {total_days} 天")
-        print(f"   平均每天行程数: {avg_trips_per_day:.1f}次")
+        lines.append(f"   总共使用 {total_days} 天")
+        lines.append(f"   平均每天行程数: {avg_trips_per_day:.1f}次")
+        log_event(summary_log, logging.INFO, "date_usage", "\n".join(lines),
+                  days=total_days, busy_days=len(dates_with_2_trips), trips_per_day=round(avg_trips_per_day, 2))
 
 def main():
     parser = argparse.ArgumentParser(
@@ -683,50 +1414,256 @@ Gebruiksvoorbeelden:
                        help='Kwartaal (1, 2, 3, of 4)')
     parser.add_argument('--target-km', type=int, required=True, help='Doel kilometers')
     parser.add_argument('--address', type=str, required=True, help='Startlocatie')
-    parser.add_argument('--output', '-o', type=str, help='Output Excel bestandsnaam')
+    parser.add_argument('--output', '-o', type=str, help='Output bestandsnaam')
+    parser.add_argument('--format', choices=sorted(EXPORTERS), default='xlsx',
+                       help='Exportformaat: xlsx, csv, jsonl, parquet of json (standaard: xlsx)')
     parser.add_argument('--json', action='store_true', help='Ook JSON bestand opslaan')
     parser.add_argument('--seed', type=int, help='Random seed (voor reproduceerbare resultaten)')
+    parser.add_argument('--candidates', type=int, default=1, metavar='N',
+                       help='N plannen met opeenvolgende seeds genereren en het beste exporteren (standaard: 1)')
+    parser.add_argument('--processes', type=int, default=os.cpu_count(),
+                       help='Aantal processen voor --candidates (standaard: aantal CPU-kernen)')
     parser.add_argument('--google-api-key', type=str, help='Google Maps API sleutel voor echte afstanden')
+    parser.add_argument('--cache-path', type=str, default=DEFAULT_CACHE_PATH,
+                       help=f'Pad naar de afstandscache (standaard: {DEFAULT_CACHE_PATH})')
+    parser.add_argument('--cache-ttl-days', type=float, default=DEFAULT_CACHE_TTL_DAYS,
+                       help=f'Geldigheid van cache-items in dagen (standaard: {DEFAULT_CACHE_TTL_DAYS})')
+    parser.add_argument('--negative-ttl-days', type=float, default=DEFAULT_NEGATIVE_TTL_DAYS,
+                       help='Dagen dat onvindbare plaatsnamen niet opnieuw worden opgevraagd, 0 = uit '
+                            f'(standaard: {DEFAULT_NEGATIVE_TTL_DAYS})')
+    parser.add_argument('--no-cache', action='store_true', help='Afstandscache uitschakelen')
+    parser.add_argument('--no-prefetch', action='store_true',
+                       help='Afstanden niet vooraf in batches ophalen, maar per rit opvragen')
+    parser.add_argument('--distance-provider', choices=['google', 'offline', 'replay'], default='google',
+                       help='Bron van afstanden: Google Maps API, offline schatting of opgenomen antwoorden '
+                            '(standaard: google)')
+    parser.add_argument('--detour-factor', type=float,
+                       help='Omrijfactor voor offline schattingen (standaard: 1.3)')
+    parser.add_argument('--record', type=str, metavar='FIXTURE',
+                       help='Alle afstandsantwoorden opnemen in een JSON Lines bestand')
+    parser.add_argument('--matrix', type=str, metavar='MAP',
+                       help='Vooraf berekende afstandsmatrix gebruiken (gemaakt met precompute_matrix.py)')
+    parser.add_argument('--replay-fixture', type=str, metavar='FIXTURE',
+                       help='Opgenomen antwoorden afspelen (met --distance-provider replay)')
+    parser.add_argument('--replay-latency', type=float, default=0.0,
+                       help='Gesimuleerde vertraging per verzoek in seconden bij afspelen (standaard: 0)')
+    parser.add_argument('--max-trips-per-day', type=int, default=DEFAULT_MAX_TRIPS_PER_DAY,
+                       help=f'Maximaal aantal ritten per dag (standaard: {DEFAULT_MAX_TRIPS_PER_DAY})')
+    parser.add_argument('--weekdays-only', action='store_true', help='Alleen ritten op werkdagen (ma-vr)')
+    parser.add_argument('--skip-holidays', action='store_true', help='Geen ritten op Nederlandse feestdagen')
+    parser.add_argument('--blackout', action='append', metavar='DD-MM-YYYY[:DD-MM-YYYY]',
+                       help='Datum of periode zonder ritten (meerdere keren te gebruiken)')
+    parser.add_argument('--planner', choices=['greedy', 'optimal'], default='greedy',
+                       help='greedy: ritten één voor één kiezen; optimal: doel en verdeling exact oplossen '
+                            '(standaard: greedy)')
+    parser.add_argument('--workers', type=int, default=DEFAULT_MAX_WORKERS,
+                       help=f'Maximaal aantal gelijktijdige API-verzoeken (standaard: {DEFAULT_MAX_WORKERS})')
+    parser.add_argument('--api-budget', type=int, metavar='ELEMENTEN',
+                       help='Maximaal aantal API-elementen (herkomsten × bestemmingen) voor deze run; '
+                            'daarna alleen gecachte afstanden gebruiken (standaard: onbeperkt)')
+    parser.add_argument('--max-qps', type=float, default=DEFAULT_MAX_QPS,
+                       help=f'Maximaal aantal API-verzoeken per seconde (standaard: {DEFAULT_MAX_QPS})')
+    parser.add_argument('--max-elements-per-second', type=float, default=DEFAULT_MAX_ELEMENTS_PER_SECOND,
+                       help=f'Maximaal aantal API-elementen per seconde '
+                            f'(standaard: {DEFAULT_MAX_ELEMENTS_PER_SECOND})')
+    parser.add_argument('--no-geocode', action='store_true',
+                        help='Adressen niet geocoderen (afstanden opvragen met de adrestekst)')
+    parser.add_argument('--metrics', type=str, metavar='BESTAND',
+                       help='Tellers en tijdsduur per fase opslaan als JSON')
+    parser.add_argument('--profile', type=str, metavar='BESTAND',
+                       help='De run profileren met cProfile en de statistieken opslaan')
+    parser.add_argument('--checkpoint', type=str, metavar='BESTAND',
+                       help='Voortgang periodiek opslaan in dit bestand (gzip JSON)')
+    parser.add_argument('--checkpoint-every', type=int, default=DEFAULT_CHECKPOINT_EVERY, metavar='N',
+                       help=f'Checkpoint na elke N geaccepteerde ritten (standaard: {DEFAULT_CHECKPOINT_EVERY})')
+    parser.add_argument('--resume', action='store_true',
+                       help='Verdergaan vanaf het checkpoint-bestand, zonder API-verzoeken te herhalen')
+    parser.add_argument('--log-format', choices=LOG_FORMATS, default='text',
+                       help='Uitvoerformaat: text (leesbaar) of json (één JSON-regel per gebeurtenis)')
+    parser.add_argument('--quiet', '-q', action='store_true',
+                       help='Alleen waarschuwingen en de samenvattingen tonen, geen regel per rit')
+    parser.add_argument('--verbose', '-v', action='store_true',
+                       help='Ook details per opgevraagd adres tonen')
     
     args = parser.parse_args()
     
-    # 设置随机种子（如果提供）
-    if args.seed:
-        random.seed(args.seed)
+    if args.quiet and args.verbose:
+        parser.error('--quiet en --verbose kunnen niet samen worden gebruikt')
+    configure_logging(args.log_format, quiet=args.quiet, verbose=args.verbose)
+    
+    # 加载环境变量（API密钥等）
+    load_env_file()
+    
+    if args.distance_provider == 'replay' and not args.replay_fixture:
+        parser.error('--distance-provider replay vereist --replay-fixture')
+    if args.max_trips_per_day < 1:
+        parser.error('--max-trips-per-day moet minimaal 1 zijn')
+    if args.resume and not args.checkpoint:
+        parser.error('--resume vereist --checkpoint')
+    if args.resume and not os.path.exists(args.checkpoint):
+        parser.error(f'--resume: checkpoint {args.checkpoint} bestaat niet')
+    if args.checkpoint_every < 1:
+        parser.error('--checkpoint-every moet minimaal 1 zijn')
+    if args.candidates < 1:
+        parser.error('--candidates moet minimaal 1 zijn')
+    if args.candidates > 1 and args.checkpoint:
+        parser.error('--candidates kan niet samen met --checkpoint worden gebruikt')
+    if args.processes is not None and args.processes < 1:
+        parser.error('--processes moet minimaal 1 zijn')
+    if args.api_budget is not None and args.api_budget < 0:
+        parser.error('--api-budget mag niet negatief zijn')
+    if args.max_qps <= 0 or args.max_elements_per_second <= 0:
+        parser.error('--max-qps en --max-elements-per-second moeten groter dan 0 zijn')
     
-    print(f"🚗 Genereren van reisverslag voor {args.year} Q{args.quarter}...")
-    print(f"📍 Startlocatie: {args.address}")
-    print(f"🎯 Doel kilometers: {args.target_km}")
-    if args.google_api_key:
-        print(f"🗺️  Google Maps API: Ingeschakeld")
+    # 屏蔽日期：命令行指定的日期/区间，以及可选的荷兰法定节假日
+    try:
+        blackout_dates = parse_date_ranges(args.blackout)
+    except ValueError as e:
+        parser.error(f'--blackout: {e}')
+    if args.skip_holidays:
+        blackout_dates.extend(dutch_holidays(args.year))
+    
+    # 随机种子：未指定时多候选模式随机选择一个起始种子，使每个方案都能重现
+    seed = args.seed
+    if seed is None and args.candidates > 1:
+        seed = random.SystemRandom().randrange(2 ** 31)
+    
+    if args.distance_provider == 'offline':
+        source = f"🧭 Afstandberekening: Offline schatting"
+    elif args.distance_provider == 'replay':
+        source = f"⏯️  Afstandberekening: Afspelen van {args.replay_fixture}"
+    elif args.google_api_key:
+        source = f"🗺️  Google Maps API: Ingeschakeld"
     else:
-        print(f"🎲 Afstandberekening: Willekeurig")
-    print("-" * 50)
+        source = f"🎲 Afstandberekening: Willekeurig"
+    log_event(log, logging.INFO, "run_started",
+              f"🚗 Genereren van reisverslag voor {args.year} Q{args.quarter}...\n"
+              f"📍 Startlocatie: {args.address}\n"
+              f"🎯 Doel kilometers: {args.target_km}\n"
+              f"{source}\n" + "-" * 50,
+              year=args.year, quarter=args.quarter, address=args.address, target_km=args.target_km,
+              distance_provider=args.distance_provider, planner=args.planner)
+    
+    # 打开持久化距离缓存
+    cache = None
+    if not args.no_cache:
+        cache = DistanceCache(args.cache_path, ttl_days=args.cache_ttl_days,
+                              negative_ttl_days=args.negative_ttl_days)
+        log.info(f"💾 Afstandscache: {args.cache_path} ({len(cache)} items)")
+    
+    # 预先计算的距离矩阵（按需导入 numpy）
+    matrix = None
+    if args.matrix:
+        from distance_matrix import DistanceMatrix
+        try:
+            matrix = DistanceMatrix(args.matrix)
+        except (OSError, ValueError) as e:
+            parser.error(f'--matrix: {e}')
+    
+    # 回放模式：从录制文件读取距离响应
+    provider = None
+    if args.distance_provider == 'replay':
+        provider = ReplayDistanceProvider(args.replay_fixture, latency=args.replay_latency)
+        log.info(f"⏯️  {len(provider)} opgenomen afstanden geladen")
+    
+    # 运行指标
+    metrics = RunMetrics()
+    
+    # API 请求调度：限速、配额错误退避和本次运行的元素预算（只作用于 Google Maps API）
+    scheduler = RequestScheduler(args.max_qps, args.max_elements_per_second, ApiBudget(args.api_budget))
     
     # 创建旅程生成器
-    generator = TripGenerator(args.year, args.quarter, args.target_km, args.address, args.google_api_key)
+    generator = TripGenerator(args.year, args.quarter, args.target_km, args.address, args.google_api_key,
+                              cache=cache, prefetch=not args.no_prefetch,
+                              max_workers=args.workers, distance_provider=args.distance_provider,
+                              detour_factor=args.detour_factor, provider=provider, record_path=args.record,
+                              max_trips_per_day=args.max_trips_per_day, weekdays_only=args.weekdays_only,
+                              blackout_dates=blackout_dates, planner=args.planner, metrics=metrics,
+                              checkpoint_path=args.checkpoint, checkpoint_every=args.checkpoint_every,
+                              matrix=matrix, seed=seed, scheduler=scheduler, geocode=not args.no_geocode)
     
-    # 生成旅程
-    trips = generator.generate_trips()
+    # 从检查点继续（在生成器创建之后，距离来源和运行参数才能与检查点比对）
+    if args.resume:
+        try:
+            generator.resume()
+        except (OSError, ValueError) as e:
+            parser.error(f'--resume: {e}')
     
-    print(f"✨ Succesvol {len(trips)} ritten gegenereerd")
+    # 生成并导出旅程（可选：用 cProfile 记录整个过程）
+    with profiled(args.profile):
+        # 多候选模式：并行生成 N 个方案并打分，直接采用得分最好的方案；目标无法达成时不导出
+        try:
+            if args.candidates > 1:
+                from trip_candidates import best_candidate
+                best = best_candidate(generator, args.candidates, seed, args.processes or 1, {
+                    "distance_provider": args.distance_provider,
+                    "google_api_key": args.google_api_key,
+                    "detour_factor": args.detour_factor,
+                    "replay_fixture": args.replay_fixture,
+                    "replay_latency": args.replay_latency,
+                }, args.log_format)
+                trips = generator.adopt_plan(best["seed"], best["trips"])
+            else:
+                trips = generator.generate_trips()
+        except ValueError as e:
+            trips = None
+            log.error(f"❌ {e}")
+        
+        if trips is not None:
+            log_event(summary_log, logging.INFO, "generated", f"✨ Succesvol {len(trips)} ritten gegenereerd",
+                      trips=len(trips))
+            
+            # 导出报告（默认Excel）
+            try:
+                generator.export(args.format, args.output)
+            except ImportError as e:
+                log.error(f"❌ {e}")
     
-    # 导出到Excel
-    excel_file = generator.export_to_excel(args.output)
+    if trips is None:
+        if generator.provider is not None:
+            generator.provider.close()
+        if cache is not None:
+            cache.close()
+        raise SystemExit(1)
     
     # 可选：保存JSON文件
     if args.json:
         generator.save_json()
     
-    print("\n📋 Reissamenvatting:")
+    lines = ["\n📋 Reissamenvatting:"]
     for i, trip in enumerate(trips[:5], 1):  # 显示前5次旅程
-        print(f"  {i}. {trip['date']} - {trip['destination']} ({trip['total_distance']}km)")
+        lines.append(f"  {i}. {trip['date']} - {trip['destination']} ({trip['total_distance']}km)")
     
     if len(trips) > 5:
-        print(f"  ... en nog {len(trips) - 5} ritten")
+        lines.append(f"  ... en nog {len(trips) - 5} ritten")
+    
+    total_km = trips.total_distance()
+    lines.append(f"\n🏁 Totale kilometers: {total_km}km (doel: {args.target_km}km)")
+    log_event(summary_log, logging.INFO, "run_finished", "\n".join(lines),
+              trips=len(trips), total_km=total_km, target_km=args.target_km, api_calls=generator.api_calls)
+    
+    # 可选：运行指标和性能分析结果
+    if args.metrics:
+        metrics.write_json(args.metrics, extra={
+            "year": args.year,
+            "quarter": args.quarter,
+            "target_km": args.target_km,
+            "address": args.address,
+            "distance_provider": generator.distance_provider,
+            "planner": args.planner,
+            "trips": len(trips),
+            "total_km": total_km,
+            "api_scheduler": generator.scheduler.stats() if generator.scheduler is not None else None,
+            "geocoding": generator.geocoder.stats() if generator.geocoder is not None else None,
+        })
+        summary_log.info(f"📈 Metingen opgeslagen: {args.metrics}")
+    if args.profile:
+        summary_log.info(f"🔬 Profiel opgeslagen: {args.profile} (bekijk met: python -m pstats {args.profile})")
     
-    total_km = sum(trip['total_distance'] for trip in trips)
-    print(f"\n🏁 Totale kilometers: {total_km}km (doel: {args.target_km}km)")
+    if generator.provider is not None:
+        generator.provider.close()
+    if cache is not None:
+        cache.close()
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
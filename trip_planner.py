@@ -0,0 +1,267 @@
+"""
+行程规划器
+在所有距离已知后，把行程选择作为有界多约束子集和问题求解：
+总公里数精确等于目标，三类距离尽量贴近配额，每个目的地最多使用3次，行程数不超过日历容量
+"""
+
+import random
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from city_index import classify_distance
+from city_registry import DEFAULT_MAX_PER_DESTINATION
+
+DISTANCE_TYPES = ("short", "medium", "long")
+
+# 动态规划中"不可达"的行程数
+_UNREACHABLE = np.iinfo(np.int32).max // 2
+
+
+def distance_quotas(target_km: int, shares: Tuple[float, float, float] = (0.4, 0.4, 0.2)) -> Dict[str, int]:
+    """按比例拆分目标公里数，三类配额之和精确等于目标"""
+    short = int(target_km * shares[0])
+    medium = int(target_km * shares[1])
+    return {"short": short, "medium": medium, "long": target_km - short - medium}
+
+
+class TripPlanner:
+    """有界多约束子集和规划器
+
+    每类距离先随机贪心选取城市直到距离配额只剩一小段余量，余量再用 NumPy 向量化的
+    最少行程数动态规划精确求解；最后在三类余量的可达组合中选择总和等于目标、
+    且与各类配额偏差最小的一组。
+    """
+
+    def __init__(self, distances: Dict[str, int], max_per_destination: int = DEFAULT_MAX_PER_DESTINATION,
+                 rng: random.Random = None):
+        self.max_per_destination = max_per_destination
+        self.rng = rng or random
+        self.buckets = {distance_type: [] for distance_type in DISTANCE_TYPES}
+        for city, km in distances.items():
+            if km:
+                self.buckets[classify_distance(km)].append((city, int(km)))
+        for items in self.buckets.values():
+            items.sort(key=lambda item: item[1])
+
+    def bucket_capacity(self, distance_type: str) -> int:
+        """某类距离最多能达到的公里数"""
+        return sum(km for _, km in self.buckets[distance_type]) * self.max_per_destination
+
+    def check_feasibility(self, target_km: int, capacity: int):
+        """在求解前检查目标是否可能达到，不可能时抛出 ValueError"""
+        copies = sorted((km for items in self.buckets.values() for _, km in items), reverse=True)
+        if not copies:
+            raise ValueError("没有任何可用目的地")
+        if target_km <= 0:
+            raise ValueError("目标公里数必须大于0")
+
+        max_total = sum(copies) * self.max_per_destination
+        if target_km > max_total:
+            raise ValueError(f"所有目的地各使用{self.max_per_destination}次最多只有 {max_total}km，"
+                             f"无法达到 {target_km}km")
+
+        # 日历容量限制：只用最远的行程也需要的最少行程数
+        longest = np.repeat(np.array(copies, dtype=np.int64), self.max_per_destination)[:capacity]
+        if capacity <= 0 or target_km > int(longest.sum()):
+            raise ValueError(f"本季度最多安排 {max(capacity, 0)} 次行程，"
+                             f"最多 {int(longest.sum())}km，无法达到 {target_km}km")
+
+    def plan(self, target_km: int, quotas: Dict[str, int], capacity: int,
+             max_rounds: int = 4) -> List[Tuple[str, int]]:
+        """求解行程列表 [(城市, 来回公里数), ...]，总和精确等于目标（无法精确时尽量接近）"""
+        self.check_feasibility(target_km, capacity)
+        quotas = self._rebalance_quotas(target_km, quotas)
+        quotas = self._fit_capacity(quotas, capacity)
+        tight = sum(self._expected_trips(t, quotas[t]) for t in DISTANCE_TYPES) > capacity
+
+        longest = max(km for items in self.buckets.values() for _, km in items)
+        best = None
+        for round_index in range(max_rounds):
+            # 每轮扩大留给动态规划的余量，提高精确命中的概率
+            reserve = longest * (2 ** (round_index + 1))
+            candidate = self._plan_round(target_km, quotas, capacity, reserve, tight)
+            if candidate is None:
+                continue
+            if best is None or candidate[0] < best[0]:
+                best = candidate
+            if best[0][0] == 0:
+                break
+
+        if best is None:
+            raise ValueError(f"无法在 {capacity} 次行程内安排 {target_km}km")
+        trips = best[1]
+        self.rng.shuffle(trips)
+        return trips
+
+    def _rebalance_quotas(self, target_km: int, quotas: Dict[str, int]) -> Dict[str, int]:
+        """把无法满足的配额转移到仍有余量的距离类型"""
+        quotas = dict(quotas)
+        capacities = {distance_type: self.bucket_capacity(distance_type) for distance_type in DISTANCE_TYPES}
+        for _ in range(len(DISTANCE_TYPES)):
+            excess = 0
+            for distance_type in DISTANCE_TYPES:
+                if quotas[distance_type] > capacities[distance_type]:
+                    excess += quotas[distance_type] - capacities[distance_type]
+                    quotas[distance_type] = capacities[distance_type]
+            if not excess:
+                break
+            open_types = [t for t in DISTANCE_TYPES if quotas[t] < capacities[t]]
+            if not open_types:
+                break
+            share, remainder = divmod(excess, len(open_types))
+            for i, distance_type in enumerate(open_types):
+                quotas[distance_type] += share + (1 if i < remainder else 0)
+        return quotas
+
+    def _sorted_copies(self, distance_type: str):
+        """某类距离所有可用次数的公里数，按从远到近排列"""
+        kms = np.array([km for _, km in self.buckets[distance_type]], dtype=np.int64)
+        return np.sort(np.repeat(kms, self.max_per_destination))[::-1]
+
+    def _min_trips(self, distance_type: str, km: int) -> int:
+        """只用最远的城市凑够 km 公里所需的最少行程数"""
+        if km <= 0:
+            return 0
+        cumulative = np.cumsum(self._sorted_copies(distance_type))
+        return int(np.searchsorted(cumulative, km)) + 1
+
+    def _expected_trips(self, distance_type: str, km: int) -> float:
+        """随机选择城市时凑够 km 公里的预期行程数"""
+        items = self.buckets[distance_type]
+        if km <= 0 or not items:
+            return 0
+        return km / (sum(item_km for _, item_km in items) / len(items))
+
+    def _fit_capacity(self, quotas: Dict[str, int], capacity: int, steps: int = 50) -> Dict[str, int]:
+        """行程数超过日历容量时，逐步把配额从近距离类型转移到远距离类型"""
+        quotas = dict(quotas)
+        capacities = {distance_type: self.bucket_capacity(distance_type) for distance_type in DISTANCE_TYPES}
+        step = max(1, sum(quotas.values()) // steps)
+        while sum(self._min_trips(t, quotas[t]) for t in DISTANCE_TYPES) > capacity:
+            moved = False
+            for source, destination in (("short", "medium"), ("medium", "long"), ("short", "long")):
+                amount = min(step, quotas[source], capacities[destination] - quotas[destination])
+                if amount > 0:
+                    quotas[source] -= amount
+                    quotas[destination] += amount
+                    moved = True
+                    break
+            if not moved:
+                break
+        return quotas
+
+    def _plan_round(self, target_km: int, quotas: Dict[str, int], capacity: int, reserve: int,
+                    tight: bool = False):
+        """一轮规划：随机贪心 + 余量动态规划，返回 ((总偏差, 配额偏差), 行程列表)"""
+        prefixes = {}
+        residual_tables = {}
+        for distance_type in DISTANCE_TYPES:
+            copies = [item for item in self.buckets[distance_type] for _ in range(self.max_per_destination)]
+            self.rng.shuffle(copies)
+            if tight:
+                # 日历容量紧张时优先选择较远的城市，减少行程数
+                copies.sort(key=lambda item: item[1], reverse=True)
+
+            # 随机贪心：在不超过 "配额 - 余量" 的前提下依次加入城市
+            prefix, total, rest = [], 0, []
+            limit = quotas[distance_type] - reserve
+            for item in copies:
+                if total + item[1] <= limit:
+                    prefix.append(item)
+                    total += item[1]
+                else:
+                    rest.append(item)
+            prefixes[distance_type] = (prefix, total)
+
+            residual = quotas[distance_type] - total
+            residual_tables[distance_type] = self._residual_table(rest, residual + reserve)
+
+        # 在三类余量的可达组合中选择总和等于目标、与配额偏差最小的一组
+        choice = self._choose_residuals(target_km, quotas, prefixes, residual_tables)
+        if choice is None:
+            return None
+        score, residuals = choice
+
+        trips = []
+        for distance_type in DISTANCE_TYPES:
+            prefix, _ = prefixes[distance_type]
+            trips.extend(prefix)
+            trips.extend(self._reconstruct(residual_tables[distance_type], residuals[distance_type]))
+        if len(trips) > capacity:
+            return None
+        return score, trips
+
+    def _residual_table(self, items: List[Tuple[str, int]], limit: int):
+        """最少行程数 0/1 背包：best[s] 为恰好凑出 s 公里所需的最少行程数"""
+        limit = max(limit, 0)
+        best = np.full(limit + 1, _UNREACHABLE, dtype=np.int32)
+        best[0] = 0
+        taken = []
+        for city, km in items:
+            if km > limit:
+                taken.append(None)
+                continue
+            candidate = best[:-km] + 1
+            improved = candidate < best[km:]
+            best[km:] = np.where(improved, candidate, best[km:])
+            taken.append(improved)
+        return best, items, taken
+
+    def _choose_residuals(self, target_km, quotas, prefixes, residual_tables):
+        short_best = residual_tables["short"][0]
+        medium_best = residual_tables["medium"][0]
+        long_best = residual_tables["long"][0]
+        base = sum(total for _, total in prefixes.values())
+        needed = target_km - base
+
+        medium_values = np.flatnonzero(medium_best < _UNREACHABLE)
+        long_values = np.flatnonzero(long_best < _UNREACHABLE)
+        short_reachable = short_best < _UNREACHABLE
+        short_target = quotas["short"] - prefixes["short"][1]
+        medium_target = quotas["medium"] - prefixes["medium"][1]
+        long_target = quotas["long"] - prefixes["long"][1]
+
+        best = None
+        for long_value in long_values.tolist():
+            # 对所有中途余量一次性计算所需的短途余量
+            short_values = needed - long_value - medium_values
+            valid = (short_values >= 0) & (short_values < len(short_best))
+            if not valid.any():
+                continue
+            valid[valid] = short_reachable[short_values[valid]]
+            if not valid.any():
+                continue
+            errors = (np.abs(short_values[valid] - short_target)
+                      + np.abs(medium_values[valid] - medium_target)
+                      + abs(long_value - long_target))
+            i = int(np.argmin(errors))
+            score = (0, int(errors[i]))
+            if best is None or score < best[0]:
+                best = (score, {"short": int(short_values[valid][i]), "medium": int(medium_values[valid][i]),
+                                "long": long_value})
+
+        if best is not None:
+            return best
+
+        # 无法精确命中目标：每类取最接近配额的可达余量
+        residuals = {}
+        for distance_type, target in (("short", short_target), ("medium", medium_target), ("long", long_target)):
+            reachable = np.flatnonzero(residual_tables[distance_type][0] < _UNREACHABLE)
+            residuals[distance_type] = int(reachable[np.argmin(np.abs(reachable - target))])
+        total_error = abs(base + sum(residuals.values()) - target_km)
+        quota_error = (abs(residuals["short"] - short_target) + abs(residuals["medium"] - medium_target)
+                       + abs(residuals["long"] - long_target))
+        return (total_error, quota_error), residuals
+
+    def _reconstruct(self, table, value: int) -> List[Tuple[str, int]]:
+        """根据动态规划记录回溯出凑成 value 公里的城市"""
+        _, items, taken = table
+        chosen = []
+        for (city, km), improved in zip(reversed(items), reversed(taken)):
+            if value <= 0:
+                break
+            if improved is not None and value >= km and improved[value - km]:
+                chosen.append((city, km))
+                value -= km
+        return chosen
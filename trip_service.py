@@ -0,0 +1,488 @@
+#!/usr/bin/env python3
+"""
+旅程记录生成服务
+常驻的 asyncio HTTP 服务：距离缓存、距离提供者以及每个起点的距离表和城市索引在请求之间保持热状态，
+生成在线程池中执行，多个请求互不阻塞，结果文件分块流式返回
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import shutil
+import tempfile
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from city_index import DistanceIndex
+from distance_cache import DistanceCache, DEFAULT_CACHE_PATH, DEFAULT_CACHE_TTL_DAYS, DEFAULT_NEGATIVE_TTL_DAYS
+from distance_providers import DistanceProvider, build_provider
+from geocoding import geocoded
+from request_scheduler import DEFAULT_MAX_ELEMENTS_PER_SECOND, DEFAULT_MAX_QPS, ApiBudget, RequestScheduler
+from run_logging import LOG_FORMATS, LOGGER_NAME, configure_logging, log_event, summary_log
+from trip_calendar import DEFAULT_MAX_TRIPS_PER_DAY, dutch_holidays, parse_date_ranges
+from trip_exporters import EXPORTERS, file_extension
+from trip_generator import DEFAULT_MAX_WORKERS, TripGenerator, load_env_file
+
+service_log = logging.getLogger(f"{LOGGER_NAME}.service")
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8080
+
+# 同时执行的生成请求数（线程池大小）
+DEFAULT_THREADS = 4
+
+# 最多保留多少个起点的热距离表，超过时淘汰最久未使用的起点
+DEFAULT_MAX_ORIGINS = 256
+
+# 请求体上限和流式返回的分块大小
+MAX_REQUEST_BYTES = 1 << 20
+STREAM_CHUNK_SIZE = 64 * 1024
+
+# 导出格式对应的 Content-Type
+CONTENT_TYPES = {
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    "csv": "text/csv; charset=utf-8",
+    "jsonl": "application/x-ndjson; charset=utf-8",
+    "json": "application/json; charset=utf-8",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+HTTP_REASONS = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    413: "Payload Too Large",
+    500: "Internal Server Error",
+}
+
+# 请求中表示"是"的取值（查询参数都是字符串）
+_TRUE_VALUES = {"1", "true", "yes", "ja", "on"}
+
+
+class RequestError(Exception):
+    """无效的请求，以对应的 HTTP 状态码返回给客户端"""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+def _flag(value) -> bool:
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() in _TRUE_VALUES if value is not None else False
+
+
+def parse_generate_request(params: Dict) -> Dict:
+    """校验 /generate 的参数（JSON 请求体或查询参数），返回生成选项"""
+    missing = [field for field in ("year", "quarter", "target_km", "address") if params.get(field) in (None, "")]
+    if missing:
+        raise RequestError(400, f"ontbrekende velden: {', '.join(missing)}")
+
+    try:
+        request = {
+            "year": int(params["year"]),
+            "quarter": int(params["quarter"]),
+            "target_km": int(params["target_km"]),
+            "address": str(params["address"]).strip(),
+            "format": str(params.get("format") or "xlsx"),
+            "planner": str(params.get("planner") or "greedy"),
+            "max_trips_per_day": int(params.get("max_trips_per_day") or DEFAULT_MAX_TRIPS_PER_DAY),
+            "weekdays_only": _flag(params.get("weekdays_only")),
+            "seed": int(params["seed"]) if params.get("seed") not in (None, "") else None,
+        }
+    except (TypeError, ValueError) as e:
+        raise RequestError(400, f"ongeldige waarde: {e}")
+
+    if request["quarter"] not in (1, 2, 3, 4):
+        raise RequestError(400, "quarter moet 1, 2, 3 of 4 zijn")
+    if request["target_km"] <= 0:
+        raise RequestError(400, "target_km moet groter dan 0 zijn")
+    if request["max_trips_per_day"] < 1:
+        raise RequestError(400, "max_trips_per_day moet minimaal 1 zijn")
+    if request["format"] not in EXPORTERS:
+        raise RequestError(400, f"onbekend formaat: {request['format']} (kies uit: {', '.join(sorted(EXPORTERS))})")
+    if request["planner"] not in ("greedy", "optimal"):
+        raise RequestError(400, "planner moet greedy of optimal zijn")
+
+    blackout = params.get("blackout") or []
+    if isinstance(blackout, str):
+        blackout = [blackout]
+    try:
+        request["blackout_dates"] = parse_date_ranges(blackout)
+    except ValueError as e:
+        raise RequestError(400, f"blackout: {e}")
+    if _flag(params.get("skip_holidays")):
+        request["blackout_dates"].extend(dutch_holidays(request["year"]))
+    return request
+
+
+async def read_request(reader: asyncio.StreamReader) -> Tuple[str, str, Dict[str, str], bytes]:
+    """读取一个 HTTP/1.1 请求，返回 (方法, 目标, 请求头, 请求体)"""
+    try:
+        head = await reader.readuntil(b"\r\n\r\n")
+    except asyncio.LimitOverrunError:
+        raise RequestError(413, "verzoekkop te groot")
+    except asyncio.IncompleteReadError:
+        raise RequestError(400, "onvolledig verzoek")
+
+    lines = head.decode("latin-1").split("\r\n")
+    try:
+        method, target, _ = lines[0].split(" ", 2)
+    except ValueError:
+        raise RequestError(400, "ongeldige verzoekregel")
+
+    headers = {}
+    for line in lines[1:]:
+        if ":" in line:
+            name, value = line.split(":", 1)
+            headers[name.strip().lower()] = value.strip()
+
+    try:
+        length = int(headers.get("content-length") or 0)
+    except ValueError:
+        raise RequestError(400, "ongeldige Content-Length")
+    if length > MAX_REQUEST_BYTES:
+        raise RequestError(413, f"verzoek groter dan {MAX_REQUEST_BYTES} bytes")
+    try:
+        body = await reader.readexactly(length) if length else b""
+    except asyncio.IncompleteReadError:
+        raise RequestError(400, "onvolledig verzoek")
+    return method.upper(), target, headers, body
+
+
+def _head(status: int, headers: Dict[str, str]) -> bytes:
+    lines = [f"HTTP/1.1 {status} {HTTP_REASONS.get(status, '')}"]
+    lines.extend(f"{name}: {value}" for name, value in headers.items())
+    return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1")
+
+
+async def send_json(writer: asyncio.StreamWriter, status: int, payload: Dict):
+    body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+    writer.write(_head(status, {
+        "Content-Type": "application/json; charset=utf-8",
+        "Content-Length": str(len(body)),
+        "Connection": "close",
+    }) + body)
+    await writer.drain()
+
+
+async def stream_file(writer: asyncio.StreamWriter, filename: str, content_type: str, headers: Dict[str, str]):
+    """以分块传输编码流式发送文件，每块写出后等待缓冲区排空"""
+    writer.write(_head(200, {
+        "Content-Type": content_type,
+        "Transfer-Encoding": "chunked",
+        "Content-Disposition": f'attachment; filename="{os.path.basename(filename)}"',
+        "Connection": "close",
+        **headers,
+    }))
+    with open(filename, "rb") as f:
+        while True:
+            chunk = f.read(STREAM_CHUNK_SIZE)
+            if not chunk:
+                break
+            writer.write(f"{len(chunk):X}\r\n".encode("ascii") + chunk + b"\r\n")
+            await writer.drain()
+    writer.write(b"0\r\n\r\n")
+    await writer.drain()
+
+
+class TripService:
+    """在请求之间共享缓存、距离提供者和每个起点的距离表/城市索引的生成服务
+
+    同一起点第一次请求时在线程池中预取所有候选距离并建立索引（并发的冷请求只预取一次），
+    之后的请求复制索引的可用状态后直接生成，不再查询距离。
+    """
+
+    def __init__(self, provider: DistanceProvider, cache: DistanceCache = None, threads: int = DEFAULT_THREADS,
+                 max_workers: int = DEFAULT_MAX_WORKERS, max_origins: int = DEFAULT_MAX_ORIGINS, matrix=None,
+                 scheduler: RequestScheduler = None, geocode: bool = True):
+        # 地理编码在所有请求之间共享：每个起点和目的地在服务运行期间只解析一次
+        self.provider = geocoded(provider, cache, scheduler) if geocode else provider
+        self.geocode = geocode
+        self.cache = cache
+        self.matrix = matrix
+        self.scheduler = scheduler
+        self.max_workers = max_workers
+        self.max_origins = max_origins
+        self.executor = ThreadPoolExecutor(max_workers=max(1, threads), thread_name_prefix="generate")
+        self.requests = 0
+        self.started = time.time()
+        self._origins: "OrderedDict[str, Tuple[Dict[str, int], DistanceIndex]]" = OrderedDict()
+        self._warming: Dict[str, asyncio.Lock] = {}
+
+    def _create_generator(self, request: Dict) -> TripGenerator:
+        return TripGenerator(request["year"], request["quarter"], request["target_km"], request["address"],
+                             cache=self.cache, max_workers=self.max_workers, provider=self.provider,
+                             max_trips_per_day=request["max_trips_per_day"],
+                             weekdays_only=request["weekdays_only"], blackout_dates=request["blackout_dates"],
+                             planner=request["planner"], matrix=self.matrix, seed=request.get("seed"),
+                             scheduler=self.scheduler, geocode=self.geocode)
+
+    def _prefetch(self, request: Dict) -> Tuple[Tuple[Dict[str, int], DistanceIndex], bool]:
+        """预取起点的距离表并建立索引；第二个返回值表示 API 配额不可用、距离表只来自缓存"""
+        generator = self._create_generator(request)
+        generator.prefetch_distances()
+        return (generator.distance_memo, generator.build_distance_index()), bool(generator.api_unavailable)
+
+    async def warm(self, request: Dict) -> Tuple[Dict[str, int], DistanceIndex]:
+        """返回起点的热距离表和索引，没有时预取"""
+        address = request["address"]
+        if address not in self._origins:
+            lock = self._warming.setdefault(address, asyncio.Lock())
+            async with lock:
+                if address not in self._origins:
+                    loop = asyncio.get_running_loop()
+                    state, degraded = await loop.run_in_executor(self.executor, self._prefetch, request)
+                    if degraded:
+                        # 不完整的距离表不保留为热状态，之后的请求重新从缓存读取
+                        self._warming.pop(address, None)
+                        return state
+                    self._origins[address] = state
+                    while len(self._origins) > self.max_origins:
+                        self._origins.popitem(last=False)
+            self._warming.pop(address, None)
+        self._origins.move_to_end(address)
+        return self._origins[address]
+
+    def _generate(self, request: Dict, memo: Dict[str, int], index: DistanceIndex, directory: str):
+        generator = self._create_generator(request)
+        generator.distance_memo = memo.copy()
+        generator.distance_index = index.copy(rng=generator.rng)
+        trips = generator.generate_trips()
+        filename = os.path.join(directory, f"reisverslag_{request['year']}_Q{request['quarter']}"
+                                           f"{file_extension(request['format'])}")
+        generator.export(request["format"], filename)
+        return filename, trips, generator.api_calls
+
+    async def generate(self, writer: asyncio.StreamWriter, params: Dict):
+        request = parse_generate_request(params)
+        memo, index = await self.warm(request)
+
+        directory = tempfile.mkdtemp(prefix="trip_service_")
+        try:
+            loop = asyncio.get_running_loop()
+            try:
+                filename, trips, api_calls = await loop.run_in_executor(
+                    self.executor, self._generate, request, memo, index, directory)
+            except ValueError as e:
+                # 目标无法达成（例如规划模式下距离不够）属于无效请求
+                raise RequestError(400, str(e))
+            await stream_file(writer, filename, CONTENT_TYPES[request["format"]], {
+                "X-Trips": str(len(trips)),
+                "X-Total-Km": str(trips.total_distance()),
+                "X-Api-Calls": str(api_calls),
+            })
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+
+    def health(self) -> Dict:
+        return {
+            "status": "ok",
+            "distance_provider": self.provider.name,
+            "origins": len(self._origins),
+            "requests": self.requests,
+            "cache_entries": len(self.cache) if self.cache is not None else None,
+            "matrix_origins": len(self.matrix) if self.matrix is not None else None,
+            "api": self.scheduler.stats() if self.scheduler is not None and self.provider.metered else None,
+            "geocoding": self.provider.geocoder.stats() if hasattr(self.provider, "geocoder") else None,
+            "uptime_seconds": round(time.time() - self.started, 1),
+        }
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """处理一个连接上的一个请求（响应后关闭连接）"""
+        started = time.perf_counter()
+        method, path, status = "-", "-", 500
+        try:
+            method, target, headers, body = await read_request(reader)
+            url = urlsplit(target)
+            path = url.path
+            self.requests += 1
+
+            if path == "/health":
+                if method != "GET":
+                    raise RequestError(405, "alleen GET")
+                status = 200
+                await send_json(writer, status, self.health())
+            elif path == "/generate":
+                if method == "GET":
+                    params = {name: values if name == "blackout" else values[-1]
+                              for name, values in parse_qs(url.query).items()}
+                elif method == "POST":
+                    try:
+                        params = json.loads(body or b"{}")
+                    except ValueError as e:
+                        raise RequestError(400, f"ongeldige JSON: {e}")
+                    if not isinstance(params, dict):
+                        raise RequestError(400, "verwacht een JSON-object")
+                else:
+                    raise RequestError(405, "alleen GET of POST")
+                status = 200
+                await self.generate(writer, params)
+            else:
+                raise RequestError(404, f"onbekend pad: {path}")
+        except RequestError as e:
+            status = e.status
+            await send_json(writer, status, {"error": str(e)})
+        except (ConnectionError, asyncio.IncompleteReadError):
+            status = 499
+        except Exception as e:
+            status = 500
+            service_log.exception(f"❌ Fout bij {method} {path}: {e}")
+            if not writer.is_closing():
+                try:
+                    await send_json(writer, status, {"error": f"{type(e).__name__}: {e}"})
+                except ConnectionError:
+                    pass
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+            duration_ms = (time.perf_counter() - started) * 1000
+            log_event(service_log, logging.INFO, "request", f"{method} {path} {status} {duration_ms:.1f}ms",
+                      method=method, path=path, status=status, duration_ms=round(duration_ms, 3))
+
+    async def start(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT) -> asyncio.AbstractServer:
+        """开始监听（port=0 时由系统分配端口）"""
+        return await asyncio.start_server(self.handle, host, port)
+
+    async def serve(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT):
+        server = await self.start(host, port)
+        bound_port = server.sockets[0].getsockname()[1]
+        log_event(service_log, logging.INFO, "service_started",
+                  f"🌐 Reisverslag-service luistert op http://{host}:{bound_port} "
+                  f"(afstandsbron: {self.provider.name})",
+                  host=host, port=bound_port, distance_provider=self.provider.name)
+        async with server:
+            await server.serve_forever()
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+        self.provider.close()
+        if self.cache is not None:
+            self.cache.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Reisverslag Service - HTTP-service die reisverslagen genereert met warme caches",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Endpoints:
+  GET  /health                   status, aantal warme startlocaties en verzoeken
+  POST /generate                 JSON: year, quarter, target_km, address[, format, planner, seed,
+                                 max_trips_per_day, weekdays_only, skip_holidays, blackout]
+  GET  /generate?year=...&...    dezelfde velden als queryparameters
+
+Gebruiksvoorbeelden:
+  python trip_service.py --port 8080
+  curl -o rapport.xlsx -d '{"year": 2025, "quarter": 1, "target_km": 5000, "address": "Duiven"}' \\
+       http://127.0.0.1:8080/generate
+        """
+    )
+
+    parser.add_argument('--host', type=str, default=DEFAULT_HOST, help=f'Luisteradres (standaard: {DEFAULT_HOST})')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help=f'Poort (standaard: {DEFAULT_PORT})')
+    parser.add_argument('--threads', type=int, default=DEFAULT_THREADS,
+                        help=f'Aantal gelijktijdige generaties (standaard: {DEFAULT_THREADS})')
+    parser.add_argument('--workers', type=int, default=DEFAULT_MAX_WORKERS,
+                        help=f'Maximaal aantal gelijktijdige API-verzoeken per generatie '
+                             f'(standaard: {DEFAULT_MAX_WORKERS})')
+    parser.add_argument('--max-origins', type=int, default=DEFAULT_MAX_ORIGINS,
+                        help=f'Aantal startlocaties dat warm blijft (standaard: {DEFAULT_MAX_ORIGINS})')
+    parser.add_argument('--google-api-key', type=str, help='Google Maps API sleutel voor echte afstanden')
+    parser.add_argument('--cache-path', type=str, default=DEFAULT_CACHE_PATH,
+                        help=f'Pad naar de afstandscache (standaard: {DEFAULT_CACHE_PATH})')
+    parser.add_argument('--cache-ttl-days', type=float, default=DEFAULT_CACHE_TTL_DAYS,
+                        help=f'Geldigheid van cache-items in dagen (standaard: {DEFAULT_CACHE_TTL_DAYS})')
+    parser.add_argument('--negative-ttl-days', type=float, default=DEFAULT_NEGATIVE_TTL_DAYS,
+                        help='Dagen dat onvindbare plaatsnamen niet opnieuw worden opgevraagd, 0 = uit '
+                             f'(standaard: {DEFAULT_NEGATIVE_TTL_DAYS})')
+    parser.add_argument('--no-cache', action='store_true', help='Afstandscache uitschakelen')
+    parser.add_argument('--matrix', type=str, metavar='MAP',
+                        help='Vooraf berekende afstandsmatrix gebruiken (gemaakt met precompute_matrix.py)')
+    parser.add_argument('--distance-provider', choices=['google', 'offline', 'replay'], default='google',
+                        help='Bron van afstanden (standaard: google)')
+    parser.add_argument('--detour-factor', type=float,
+                        help='Omrijfactor voor offline schattingen (standaard: 1.3)')
+    parser.add_argument('--replay-fixture', type=str, metavar='FIXTURE',
+                        help='Opgenomen antwoorden afspelen (met --distance-provider replay)')
+    parser.add_argument('--replay-latency', type=float, default=0.0,
+                        help='Gesimuleerde vertraging per verzoek in seconden bij afspelen (standaard: 0)')
+    parser.add_argument('--api-budget', type=int, metavar='ELEMENTEN',
+                        help='Maximaal aantal API-elementen zolang de service draait; daarna alleen gecachte '
+                             'afstanden gebruiken (standaard: onbeperkt)')
+    parser.add_argument('--max-qps', type=float, default=DEFAULT_MAX_QPS,
+                        help=f'Maximaal aantal API-verzoeken per seconde (standaard: {DEFAULT_MAX_QPS})')
+    parser.add_argument('--max-elements-per-second', type=float, default=DEFAULT_MAX_ELEMENTS_PER_SECOND,
+                        help=f'Maximaal aantal API-elementen per seconde '
+                             f'(standaard: {DEFAULT_MAX_ELEMENTS_PER_SECOND})')
+    parser.add_argument('--no-geocode', action='store_true',
+                        help='Adressen niet geocoderen (afstanden opvragen met de adrestekst)')
+    parser.add_argument('--log-format', choices=LOG_FORMATS, default='text',
+                        help='Uitvoerformaat: text (leesbaar) of json (één JSON-regel per gebeurtenis)')
+    parser.add_argument('--verbose', '-v', action='store_true',
+                        help='Ook de uitvoer en samenvattingen van elke generatie tonen')
+
+    args = parser.parse_args()
+
+    # 服务只输出访问日志和警告；--verbose 时输出每次生成的完整信息
+    configure_logging(args.log_format, quiet=not args.verbose, progress=False)
+    summary_log.setLevel(logging.INFO if args.verbose else logging.WARNING)
+    service_log.setLevel(logging.INFO)
+    load_env_file()
+
+    if args.distance_provider == 'replay' and not args.replay_fixture:
+        parser.error('--distance-provider replay vereist --replay-fixture')
+    if args.threads < 1:
+        parser.error('--threads moet minimaal 1 zijn')
+    if args.api_budget is not None and args.api_budget < 0:
+        parser.error('--api-budget mag niet negatief zijn')
+    if args.max_qps <= 0 or args.max_elements_per_second <= 0:
+        parser.error('--max-qps en --max-elements-per-second moeten groter dan 0 zijn')
+
+    provider = build_provider({
+        "distance_provider": args.distance_provider,
+        "detour_factor": args.detour_factor,
+        "replay_fixture": args.replay_fixture,
+        "replay_latency": args.replay_latency,
+        "google_api_key": args.google_api_key,
+    })
+    if provider is None:
+        parser.error('geen Google Maps API sleutel gevonden (gebruik --google-api-key of GOOGLE_MAPS_API_KEY)')
+
+    cache = None
+    if not args.no_cache:
+        cache = DistanceCache(args.cache_path, ttl_days=args.cache_ttl_days,
+                              negative_ttl_days=args.negative_ttl_days)
+
+    matrix = None
+    if args.matrix:
+        from distance_matrix import DistanceMatrix
+        try:
+            matrix = DistanceMatrix(args.matrix)
+        except (OSError, ValueError) as e:
+            parser.error(f'--matrix: {e}')
+
+    scheduler = RequestScheduler(args.max_qps, args.max_elements_per_second, ApiBudget(args.api_budget))
+    service = TripService(provider, cache, threads=args.threads, max_workers=args.workers,
+                          max_origins=args.max_origins, matrix=matrix, scheduler=scheduler,
+                          geocode=not args.no_geocode)
+    try:
+        asyncio.run(service.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.close()
+
+
+if __name__ == "__main__":
+    main()
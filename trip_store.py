@@ -0,0 +1,153 @@
+"""
+行程存储
+行程以平行数组保存：日期序数、目的地ID（按首次出现的顺序编号）和来回公里数；
+日期字符串和行程字典只在导出和显示时生成，排序和统计用 numpy 对整列向量化计算
+"""
+
+from array import array
+from datetime import date, datetime
+from typing import Dict, Iterable, List
+
+from city_index import LONG_TRIP_MIN_KM, SHORT_TRIP_MAX_KM
+
+# 报告中的日期格式和行程说明（所有行程相同）
+DATE_FORMAT = "%d-%m-%Y"
+DESCRIPTION = "klant bezoeken"
+
+# Parquet 等列式格式的日期以 1970-01-01 起的天数保存
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+
+class TripStore:
+    """紧凑的行程表：每次行程只占三个整数
+
+    可以像行程字典列表一样使用（len、迭代、下标和切片），访问时才生成
+    {"date", "destination", "description", "total_distance"}；统计方法对整列计算，耗时和内存与行程数成正比。
+    """
+
+    def __init__(self):
+        self.ordinals = array("i")
+        self.city_ids = array("i")
+        self.distances = array("i")
+        self.names: List[str] = []
+        self._ids: Dict[str, int] = {}
+        self._date_strings: Dict[int, str] = {}
+
+    @classmethod
+    def from_trips(cls, trips: Iterable[Dict]) -> "TripStore":
+        """从行程字典（日期为 DD-MM-YYYY 字符串）建立行程表；已经是行程表时原样返回"""
+        if isinstance(trips, cls):
+            return trips
+        store = cls()
+        for trip in trips:
+            store.add(datetime.strptime(trip["date"], DATE_FORMAT), trip["destination"], trip["total_distance"])
+        return store
+
+    def add(self, day: date, destination: str, distance: int):
+        """追加一次行程"""
+        city_id = self._ids.get(destination)
+        if city_id is None:
+            city_id = self._ids[destination] = len(self.names)
+            self.names.append(destination)
+        self.ordinals.append(day.toordinal())
+        self.city_ids.append(city_id)
+        self.distances.append(distance)
+
+    def __len__(self):
+        return len(self.ordinals)
+
+    def __iter__(self):
+        names = self.names
+        for ordinal, city_id, distance in zip(self.ordinals, self.city_ids, self.distances):
+            yield {
+                "date": self.format_date(ordinal),
+                "destination": names[city_id],
+                "description": DESCRIPTION,
+                "total_distance": distance,
+            }
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        return {
+            "date": self.format_date(self.ordinals[index]),
+            "destination": self.names[self.city_ids[index]],
+            "description": DESCRIPTION,
+            "total_distance": self.distances[index],
+        }
+
+    def format_date(self, ordinal: int) -> str:
+        """日期序数 -> DD-MM-YYYY；每个日期只格式化一次"""
+        text = self._date_strings.get(ordinal)
+        if text is None:
+            text = self._date_strings[ordinal] = date.fromordinal(ordinal).strftime(DATE_FORMAT)
+        return text
+
+    def rows(self) -> List[list]:
+        """[日期, 目的地, 公里数] 列表（检查点格式）"""
+        return [[trip["date"], trip["destination"], trip["total_distance"]] for trip in self]
+
+    def _column(self, values) -> "np.ndarray":
+        import numpy as np
+        return np.frombuffer(values, dtype=np.intc) if len(values) else np.zeros(0, dtype=np.intc)
+
+    def sort(self):
+        """按日期稳定排序（同一天的行程保持接受的顺序）"""
+        import numpy as np
+        ordinals = self._column(self.ordinals)
+        if len(ordinals) < 2 or not np.any(ordinals[1:] < ordinals[:-1]):
+            return
+        order = np.argsort(ordinals, kind="stable")
+        for name in ("ordinals", "city_ids", "distances"):
+            column = array("i")
+            column.frombytes(self._column(getattr(self, name))[order].tobytes())
+            setattr(self, name, column)
+
+    def total_distance(self) -> int:
+        return sum(self.distances)
+
+    def bucket_totals(self) -> Dict[str, int]:
+        """各距离类型的总公里数（边界与 classify_distance 相同）"""
+        import numpy as np
+        distances = self._column(self.distances).astype(np.int64)
+        buckets = (distances >= SHORT_TRIP_MAX_KM).astype(np.intp) + (distances > LONG_TRIP_MIN_KM)
+        short, medium, long = np.bincount(buckets, weights=distances, minlength=3).astype(np.int64).tolist()
+        return {"short": short, "medium": medium, "long": long}
+
+    def date_counts(self) -> Dict[str, int]:
+        """每个日期的行程数 {DD-MM-YYYY: 次数}，按日期先后排列"""
+        import numpy as np
+        ordinals, counts = np.unique(self._column(self.ordinals), return_counts=True)
+        return {self.format_date(ordinal): count for ordinal, count in zip(ordinals.tolist(), counts.tolist())}
+
+    def destination_counts(self) -> Dict[str, int]:
+        """每个目的地的行程数 {目的地: 次数}，按首次出现的顺序排列"""
+        import numpy as np
+        counts = np.bincount(self._column(self.city_ids), minlength=len(self.names)).tolist()
+        return {name: count for name, count in zip(self.names, counts) if count}
+
+    def weekly_counts(self, start: date, weeks: int) -> List[int]:
+        """从 start 开始每 7 天的行程数"""
+        import numpy as np
+        offsets = (self._column(self.ordinals).astype(np.int64) - start.toordinal()) // 7
+        return np.bincount(offsets, minlength=weeks).tolist()
+
+    def destination_values(self, values: Dict[str, int], missing: int = -1) -> "np.ndarray":
+        """每次行程的目的地在 values 中对应的整数（没有或为None时为 missing），每个目的地只查一次字典"""
+        import numpy as np
+        table = [values.get(name) for name in self.names]
+        table = np.array([missing if value is None else value for value in table], dtype=np.int64)
+        return table[self._column(self.city_ids)]
+
+    def epoch_days(self) -> "np.ndarray":
+        """日期列：1970-01-01 起的天数"""
+        return self._column(self.ordinals) - EPOCH_ORDINAL
+
+    def distance_array(self) -> "np.ndarray":
+        """公里数列（不复制数组，持有期间不能再追加行程）"""
+        return self._column(self.distances)
+
+    def destination_column(self) -> List[str]:
+        """目的地列（每次行程一项）"""
+        names = self.names
+        return [names[city_id] for city_id in self.city_ids]
@@ -0,0 +1,492 @@
+#!/usr/bin/env python3
+"""
+报告核查
+以 openpyxl 只读模式流式读取已归档的行程报告（可并行读取数百个文件），按起始地址收集所有不同的目的地，
+通过距离缓存、距离矩阵和批量请求一次性解析，再向量化地与报告中的公里数比较；
+同时检查每个目的地最多 3 次、每天最多 2 次以及汇总行，输出差异报告
+"""
+
+import argparse
+import csv
+import json
+import logging
+import os
+import re
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime
+from typing import Dict, List, Tuple
+
+from array import array
+
+from batch_generate import load_manifest, sheet_names
+from city_registry import DEFAULT_MAX_PER_DESTINATION
+from distance_cache import DistanceCache, DEFAULT_CACHE_PATH, DEFAULT_CACHE_TTL_DAYS, DEFAULT_NEGATIVE_TTL_DAYS
+from distance_providers import build_provider
+from geocoding import geocoded
+from request_scheduler import DEFAULT_MAX_ELEMENTS_PER_SECOND, DEFAULT_MAX_QPS, ApiBudget, RequestScheduler
+from run_logging import LOG_FORMATS, configure_logging, log, log_event, summary_log
+from trip_calendar import DEFAULT_MAX_TRIPS_PER_DAY
+from trip_exporters import TOTAL_LABEL, TRIP_COLUMNS
+from trip_generator import DEFAULT_MAX_WORKERS, TripGenerator, load_env_file
+from trip_store import DATE_FORMAT, TripStore
+
+# 差异字段及其荷兰语表头（CSV 和 Excel 差异报告）
+DISCREPANCY_COLUMNS = [
+    ("file", "Bestand"),
+    ("sheet", "Werkblad"),
+    ("row", "Rij"),
+    ("kind", "Soort"),
+    ("destination", "Bestemming"),
+    ("date", "Datum"),
+    ("reported", "Gerapporteerd"),
+    ("expected", "Verwacht"),
+    ("message", "Toelichting"),
+]
+
+# 汇总行第二列的格式，例如 "27 ritten"
+_TRIP_COUNT_PATTERN = re.compile(r"^\s*(\d+)\s+ritten\s*$")
+
+# 文本输出中列出的差异条数
+SHOWN_DISCREPANCIES = 20
+
+
+def _discrepancy(report: Dict, kind: str, message: str, row: int = None, destination: str = None,
+                 day: str = None, reported=None, expected=None) -> Dict:
+    return {"file": report["file"], "sheet": report.get("sheet"), "row": row, "kind": kind,
+            "destination": destination, "date": day, "reported": reported, "expected": expected,
+            "message": message}
+
+
+def _parse_date(value) -> date:
+    """日期单元格：导出的 DD-MM-YYYY 文本，或被 Excel 转换后的日期值；无法识别时返回None"""
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    if isinstance(value, str):
+        try:
+            return datetime.strptime(value.strip(), DATE_FORMAT).date()
+        except ValueError:
+            return None
+    return None
+
+
+def _parse_km(value) -> int:
+    """公里数单元格：整数（或整数值的小数、数字文本）；否则返回None"""
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, str):
+        value = value.strip()
+        return int(value) if value.isdigit() else None
+    if isinstance(value, int):
+        return value
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return None
+
+
+def _read_sheet(report: Dict, rows) -> List[Dict]:
+    """解析一个工作表的行程行和汇总行，结果写入 report，返回格式问题"""
+    problems = []
+    headers = [header for _, header in TRIP_COLUMNS]
+    header = next(rows, None)
+    if header is None or [str(value).strip() if value is not None else None
+                          for value in header[:len(headers)]] != headers:
+        problems.append(_discrepancy(report, "werkblad", "geen reisverslag (onbekende kopregel)", row=1))
+        report["trips"] = None
+        return problems
+
+    trips = TripStore()
+    numbers = array("i")
+    totals = None
+    for number, row in enumerate(rows, 2):
+        values = (tuple(row) + (None,) * len(headers))[:len(headers)]
+        if all(value is None or value == "" for value in values):
+            continue
+        if totals is not None:
+            problems.append(_discrepancy(report, "ongeldige_rij", "rij na de totaalregel", row=number))
+            continue
+        if values[0] == TOTAL_LABEL:
+            totals = {"row": number, "trips": values[1], "label": values[2], "km": values[3]}
+            continue
+        day, km = _parse_date(values[0]), _parse_km(values[3])
+        destination = str(values[1]).strip() if values[1] is not None else ""
+        if day is None or km is None or not destination:
+            problems.append(_discrepancy(report, "ongeldige_rij",
+                                         "ongeldige datum, bestemming of afstand", row=number,
+                                         destination=destination or None, reported=values[3],
+                                         day=str(values[0]) if values[0] is not None else None))
+            continue
+        trips.add(day, destination, km)
+        numbers.append(number)
+
+    report.update(trips=trips, rows=numbers, totals=totals)
+    return problems
+
+
+def read_report(path: str) -> Tuple[List[Dict], List[Dict]]:
+    """以只读模式流式读取一个报告文件，返回 (工作表列表, 格式问题)
+
+    每个工作表为 {"file", "sheet", "trips" (TripStore), "rows" (行号), "totals"}；不是报告的工作表不返回。
+    """
+    from openpyxl import load_workbook
+
+    try:
+        workbook = load_workbook(path, read_only=True, data_only=True)
+    except Exception as e:
+        return [], [_discrepancy({"file": path}, "bestand", f"kan niet worden gelezen: {e}")]
+
+    reports, problems = [], []
+    try:
+        for worksheet in workbook.worksheets:
+            report = {"file": path, "sheet": worksheet.title}
+            problems.extend(_read_sheet(report, worksheet.iter_rows(values_only=True)))
+            if report["trips"] is not None:
+                reports.append(report)
+    finally:
+        workbook.close()
+    return reports, problems
+
+
+def check_rules(report: Dict, max_per_destination: int = DEFAULT_MAX_PER_DESTINATION,
+                max_trips_per_day: int = DEFAULT_MAX_TRIPS_PER_DAY) -> List[Dict]:
+    """检查每个目的地和每天的行程数上限以及汇总行（计数由行程表整列统计）"""
+    trips, rows = report["trips"], report["rows"]
+    problems = []
+
+    for destination, count in trips.destination_counts().items():
+        if count > max_per_destination:
+            problems.append(_discrepancy(report, "bestemming_limiet",
+                                         f"{count} ritten naar dezelfde bestemming (maximaal {max_per_destination})",
+                                         destination=destination, reported=count, expected=max_per_destination))
+    for day, count in trips.date_counts().items():
+        if count > max_trips_per_day:
+            problems.append(_discrepancy(report, "dag_limiet",
+                                         f"{count} ritten op één dag (maximaal {max_trips_per_day})",
+                                         day=day, reported=count, expected=max_trips_per_day))
+
+    totals = report["totals"]
+    total_km = trips.total_distance()
+    if totals is None:
+        last = rows[-1] + 1 if rows else 2
+        problems.append(_discrepancy(report, "totaalregel", "totaalregel ontbreekt", row=last, expected=total_km))
+        return problems
+    match = _TRIP_COUNT_PATTERN.match(str(totals["trips"] or ""))
+    if match is None or int(match.group(1)) != len(trips):
+        problems.append(_discrepancy(report, "totaalregel", "aantal ritten in de totaalregel klopt niet",
+                                     row=totals["row"], reported=totals["trips"], expected=f"{len(trips)} ritten"))
+    if _parse_km(totals["km"]) != total_km:
+        problems.append(_discrepancy(report, "totaalregel", "totaal aantal kilometers klopt niet",
+                                     row=totals["row"], reported=totals["km"], expected=total_km))
+    return problems
+
+
+def compare_distances(report: Dict, distances: Dict[str, int], tolerance: int = 0) -> List[Dict]:
+    """报告中的公里数与解析的来回距离整列比较，返回超出容差和无法核实的行程"""
+    import numpy as np
+
+    trips, rows = report["trips"], report["rows"]
+    expected = trips.destination_values(distances)
+    reported = trips.distance_array().astype(np.int64)
+    unknown = expected < 0
+    wrong = ~unknown & (np.abs(reported - expected) > tolerance)
+    report["expected_km"] = int(expected[~unknown].sum())
+
+    problems = []
+    for i in np.flatnonzero(unknown | wrong).tolist():
+        trip = trips[i]
+        if unknown[i]:
+            problems.append(_discrepancy(report, "onbekende_afstand", "afstand kan niet worden bepaald",
+                                         row=rows[i], destination=trip["destination"], day=trip["date"],
+                                         reported=trip["total_distance"]))
+        else:
+            difference = int(reported[i] - expected[i])
+            problems.append(_discrepancy(report, "afstand", f"wijkt {difference:+d} km af van de heen- en terugreis",
+                                         row=rows[i], destination=trip["destination"], day=trip["date"],
+                                         reported=trip["total_distance"], expected=int(expected[i])))
+    return problems
+
+
+def resolve_origins(destinations: Dict[str, List[str]], cache: DistanceCache = None, provider=None,
+                    scheduler: RequestScheduler = None, matrix=None,
+                    max_workers: int = DEFAULT_MAX_WORKERS) -> Dict[str, Dict[str, int]]:
+    """按起始地址批量解析所有目的地的来回距离，返回 {起始地址: {目的地: 公里数或None}}
+
+    每个起始地址只解析一次：先查距离矩阵和持久化缓存，其余目的地按批次请求。
+    """
+    resolved = {}
+    for origin, cities in destinations.items():
+        generator = TripGenerator(0, 1, 0, origin, cache=cache, provider=provider, max_workers=max_workers,
+                                  scheduler=scheduler)
+        if matrix is not None:
+            generator.use_matrix(matrix)
+        generator.prefetch_distances(cities)
+        resolved[origin] = {city: generator.distance_memo.get(city) for city in cities}
+        known = sum(1 for km in resolved[origin].values() if km is not None)
+        log_event(log, logging.INFO, "origin_resolved",
+                  f"🔎 {origin}: {known}/{len(cities)} bestemmingen bepaald ({generator.api_calls} API-verzoeken)",
+                  origin=origin, destinations=len(cities), resolved=known, api_calls=generator.api_calls)
+    return resolved
+
+
+def _report_files(paths: List[str]) -> List[str]:
+    """命令行参数中的文件和目录（目录中的所有 .xlsx 文件）"""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(sorted(os.path.join(path, name) for name in os.listdir(path)
+                                if name.lower().endswith(".xlsx") and not name.startswith("~$")))
+        else:
+            files.append(path)
+    return list(dict.fromkeys(files))
+
+
+def _manifest_addresses(jobs: List[Dict]) -> Tuple[Dict[str, str], Dict[str, str]]:
+    """任务清单中输出文件名和合并工作表名称对应的起始地址"""
+    by_file = {os.path.basename(job["output"]): job["address"] for job in jobs}
+    by_sheet = dict(zip(sheet_names(jobs), (job["address"] for job in jobs)))
+    return by_file, by_sheet
+
+
+def verify_reports(files: List[str], addresses, cache: DistanceCache = None, provider=None,
+                   scheduler: RequestScheduler = None, matrix=None, processes: int = 1, tolerance: int = 0,
+                   max_per_destination: int = DEFAULT_MAX_PER_DESTINATION,
+                   max_trips_per_day: int = DEFAULT_MAX_TRIPS_PER_DAY,
+                   max_workers: int = DEFAULT_MAX_WORKERS) -> Tuple[List[Dict], List[Dict]]:
+    """核查多个报告文件，返回 (工作表列表, 差异列表)
+
+    addresses(报告) 返回该工作表的起始地址，未知时返回None。
+    读取和规则检查在进程池中并行执行，距离按起始地址汇总后一次解析。
+    """
+    if processes > 1 and len(files) > 1:
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            results = list(executor.map(read_report, files, chunksize=max(1, len(files) // (4 * processes))))
+    else:
+        results = [read_report(path) for path in files]
+
+    reports, problems = [], []
+    for sheets, read_problems in results:
+        reports.extend(sheets)
+        problems.extend(read_problems)
+
+    destinations = defaultdict(dict)
+    for report in reports:
+        problems.extend(check_rules(report, max_per_destination, max_trips_per_day))
+        report["address"] = addresses(report)
+        if report["address"] is None:
+            problems.append(_discrepancy(report, "werkblad", "startadres onbekend, afstanden niet gecontroleerd"))
+            continue
+        destinations[report["address"]].update(dict.fromkeys(report["trips"].names))
+
+    distances = resolve_origins({origin: list(cities) for origin, cities in destinations.items()}, cache,
+                                provider, scheduler, matrix, max_workers)
+    for report in reports:
+        if report["address"] is not None:
+            problems.extend(compare_distances(report, distances[report["address"]], tolerance))
+    order = {(report["file"], report["sheet"]): i for i, report in enumerate(reports)}
+    problems.sort(key=lambda problem: (order.get((problem["file"], problem["sheet"]), -1), problem["row"] or 0))
+    return reports, problems
+
+
+def write_discrepancies(filename: str, problems: List[Dict]) -> str:
+    """写出差异报告：.xlsx 为 Excel 工作表，.jsonl 为每条差异一行 JSON，其余为 CSV"""
+    fields = [field for field, _ in DISCREPANCY_COLUMNS]
+    headers = [header for _, header in DISCREPANCY_COLUMNS]
+    extension = os.path.splitext(filename)[1].lower()
+    if extension == ".xlsx":
+        from openpyxl import Workbook
+        workbook = Workbook(write_only=True)
+        worksheet = workbook.create_sheet(title="Afwijkingen")
+        worksheet.append(headers)
+        for problem in problems:
+            worksheet.append([problem[field] for field in fields])
+        workbook.save(filename)
+    elif extension == ".jsonl":
+        with open(filename, "w", encoding="utf-8") as f:
+            for problem in problems:
+                f.write(json.dumps(problem, ensure_ascii=False) + "\n")
+    else:
+        with open(filename, "w", encoding="utf-8", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(headers)
+            writer.writerows([problem[field] for field in fields] for problem in problems)
+    return filename
+
+
+def log_results(reports: List[Dict], problems: List[Dict], files: int, seconds: float):
+    """输出每个工作表的核查结果和总结"""
+    per_sheet = Counter((problem["file"], problem["sheet"]) for problem in problems)
+    for report in reports:
+        count = per_sheet[(report["file"], report["sheet"])]
+        trips = report["trips"]
+        label = f"{os.path.basename(report['file'])} [{report['sheet']}]"
+        expected = report.get("expected_km")
+        log_event(summary_log, logging.INFO if not count else logging.WARNING, "report_verified",
+                  f"{'✅' if not count else '⚠️ '} {label}: {len(trips)} ritten, {trips.total_distance()}km"
+                  + (f" (bepaald: {expected}km)" if expected is not None else "")
+                  + (f", {count} afwijkingen" if count else ", geen afwijkingen"),
+                  file=report["file"], sheet=report["sheet"], address=report["address"], trips=len(trips),
+                  total_km=trips.total_distance(), expected_km=expected, discrepancies=count)
+
+    lines = []
+    for problem in problems[:SHOWN_DISCREPANCIES]:
+        where = os.path.basename(problem["file"]) + (f" [{problem['sheet']}]" if problem["sheet"] else "")
+        row = f" rij {problem['row']}" if problem["row"] else ""
+        subject = " ".join(str(value) for value in (problem["date"], problem["destination"]) if value)
+        lines.append(f"   {where}{row}: {problem['kind']} - {subject + ': ' if subject else ''}{problem['message']}")
+    if len(problems) > SHOWN_DISCREPANCIES:
+        lines.append(f"   ... en nog {len(problems) - SHOWN_DISCREPANCIES} afwijkingen")
+
+    kinds = Counter(problem["kind"] for problem in problems)
+    trips = sum(len(report["trips"]) for report in reports)
+    log_event(summary_log, logging.INFO, "verify_finished",
+              "\n".join(lines) + ("\n" if lines else "") + "-" * 50
+              + f"\n🏁 {files} bestanden, {len(reports)} reisverslagen, {trips} ritten gecontroleerd in {seconds:.1f}s: "
+              + (", ".join(f"{count}x {kind}" for kind, count in kinds.most_common()) or "geen afwijkingen"),
+              files=files, reports=len(reports), trips=trips, discrepancies=len(problems), kinds=dict(kinds),
+              seconds=round(seconds, 3))
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Reisverslag Controle - Afstanden en regels in bestaande reisverslagen controleren",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Gebruiksvoorbeelden:
+  python verify_reports.py reisverslag_2025_Q1.xlsx --address Duiven
+  python verify_reports.py archief/ --manifest taken.csv --output afwijkingen.csv
+  python verify_reports.py archief/*.xlsx --address Duiven --api-budget 0
+        """
+    )
+
+    parser.add_argument('reports', nargs='+', help='Reisverslagen (.xlsx) of mappen met reisverslagen')
+    parser.add_argument('--address', type=str, help='Startlocatie van alle reisverslagen')
+    parser.add_argument('--manifest', type=str,
+                        help='Takenlijst (CSV of JSON) van batch_generate.py: startlocatie per bestand of werkblad')
+    parser.add_argument('--output', '-o', type=str, metavar='BESTAND',
+                        help='Afwijkingen opslaan (.csv, .jsonl of .xlsx)')
+    parser.add_argument('--tolerance', type=int, default=0, metavar='KM',
+                        help='Toegestane afwijking per rit in km (standaard: 0)')
+    parser.add_argument('--max-trips-per-day', type=int, default=DEFAULT_MAX_TRIPS_PER_DAY,
+                        help=f'Maximaal aantal ritten per dag (standaard: {DEFAULT_MAX_TRIPS_PER_DAY})')
+    parser.add_argument('--processes', type=int, default=os.cpu_count(),
+                        help='Aantal processen om bestanden te lezen (standaard: aantal CPU-kernen)')
+    parser.add_argument('--google-api-key', type=str, help='Google Maps API sleutel voor echte afstanden')
+    parser.add_argument('--cache-path', type=str, default=DEFAULT_CACHE_PATH,
+                        help=f'Pad naar de afstandscache (standaard: {DEFAULT_CACHE_PATH})')
+    parser.add_argument('--cache-ttl-days', type=float, default=DEFAULT_CACHE_TTL_DAYS,
+                        help=f'Geldigheid van cache-items in dagen (standaard: {DEFAULT_CACHE_TTL_DAYS})')
+    parser.add_argument('--negative-ttl-days', type=float, default=DEFAULT_NEGATIVE_TTL_DAYS,
+                        help='Dagen dat onvindbare plaatsnamen niet opnieuw worden opgevraagd, 0 = uit '
+                             f'(standaard: {DEFAULT_NEGATIVE_TTL_DAYS})')
+    parser.add_argument('--no-cache', action='store_true', help='Afstandscache uitschakelen')
+    parser.add_argument('--matrix', type=str, metavar='MAP',
+                        help='Vooraf berekende afstandsmatrix gebruiken (gemaakt met precompute_matrix.py)')
+    parser.add_argument('--distance-provider', choices=['google', 'offline', 'replay'], default='google',
+                        help='Bron van afstanden (standaard: google)')
+    parser.add_argument('--detour-factor', type=float,
+                        help='Omrijfactor voor offline schattingen (standaard: 1.3)')
+    parser.add_argument('--replay-fixture', type=str, metavar='FIXTURE',
+                        help='Opgenomen antwoorden afspelen (met --distance-provider replay)')
+    parser.add_argument('--replay-latency', type=float, default=0.0,
+                        help='Gesimuleerde vertraging per verzoek in seconden bij afspelen (standaard: 0)')
+    parser.add_argument('--workers', type=int, default=DEFAULT_MAX_WORKERS,
+                        help=f'Maximaal aantal gelijktijdige API-verzoeken (standaard: {DEFAULT_MAX_WORKERS})')
+    parser.add_argument('--api-budget', type=int, metavar='ELEMENTEN',
+                        help='Maximaal aantal API-elementen voor deze controle; daarna alleen gecachte '
+                             'afstanden gebruiken (standaard: onbeperkt, 0 = alleen de cache)')
+    parser.add_argument('--max-qps', type=float, default=DEFAULT_MAX_QPS,
+                        help=f'Maximaal aantal API-verzoeken per seconde (standaard: {DEFAULT_MAX_QPS})')
+    parser.add_argument('--max-elements-per-second', type=float, default=DEFAULT_MAX_ELEMENTS_PER_SECOND,
+                        help=f'Maximaal aantal API-elementen per seconde '
+                             f'(standaard: {DEFAULT_MAX_ELEMENTS_PER_SECOND})')
+    parser.add_argument('--no-geocode', action='store_true',
+                        help='Adressen niet geocoderen (afstanden opvragen met de adrestekst)')
+    parser.add_argument('--log-format', choices=LOG_FORMATS, default='text',
+                        help='Uitvoerformaat: text (leesbaar) of json (één JSON-regel per gebeurtenis)')
+    parser.add_argument('--quiet', '-q', action='store_true', help='Alleen waarschuwingen en de samenvatting tonen')
+
+    args = parser.parse_args()
+
+    configure_logging(args.log_format, quiet=args.quiet)
+    load_env_file()
+
+    if args.distance_provider == 'replay' and not args.replay_fixture:
+        parser.error('--distance-provider replay vereist --replay-fixture')
+    if args.tolerance < 0:
+        parser.error('--tolerance mag niet negatief zijn')
+    if args.max_trips_per_day < 1:
+        parser.error('--max-trips-per-day moet minimaal 1 zijn')
+    if args.processes is not None and args.processes < 1:
+        parser.error('--processes moet minimaal 1 zijn')
+    if args.api_budget is not None and args.api_budget < 0:
+        parser.error('--api-budget mag niet negatief zijn')
+    if args.max_qps <= 0 or args.max_elements_per_second <= 0:
+        parser.error('--max-qps en --max-elements-per-second moeten groter dan 0 zijn')
+    if not args.address and not args.manifest:
+        parser.error('geef de startlocatie op met --address of --manifest')
+
+    by_file, by_sheet = {}, {}
+    if args.manifest:
+        try:
+            by_file, by_sheet = _manifest_addresses(load_manifest(args.manifest))
+        except (OSError, ValueError) as e:
+            parser.error(f'takenlijst: {e}')
+
+    def addresses(report: Dict) -> str:
+        return (by_sheet.get(report["sheet"]) or by_file.get(os.path.basename(report["file"]))
+                or args.address)
+
+    files = _report_files(args.reports)
+    if not files:
+        parser.error('geen reisverslagen gevonden')
+
+    matrix = None
+    if args.matrix:
+        from distance_matrix import DistanceMatrix
+        try:
+            matrix = DistanceMatrix(args.matrix)
+        except (OSError, ValueError) as e:
+            parser.error(f'--matrix: {e}')
+
+    cache = None
+    if not args.no_cache:
+        cache = DistanceCache(args.cache_path, ttl_days=args.cache_ttl_days,
+                              negative_ttl_days=args.negative_ttl_days)
+    scheduler = RequestScheduler(args.max_qps, args.max_elements_per_second, ApiBudget(args.api_budget))
+    provider = build_provider({
+        "distance_provider": args.distance_provider,
+        "detour_factor": args.detour_factor,
+        "replay_fixture": args.replay_fixture,
+        "replay_latency": args.replay_latency,
+        "google_api_key": args.google_api_key,
+    })
+    # 没有 API 密钥时只使用缓存和距离矩阵中的距离
+    if provider is not None and not args.no_geocode:
+        # 地理编码在所有起始地址之间共享
+        provider = geocoded(provider, cache, scheduler)
+
+    started = time.perf_counter()
+    try:
+        reports, problems = verify_reports(files, addresses, cache, provider, scheduler, matrix,
+                                           processes=min(args.processes or 1, len(files)),
+                                           tolerance=args.tolerance, max_trips_per_day=args.max_trips_per_day,
+                                           max_workers=args.workers)
+    finally:
+        if provider is not None:
+            provider.close()
+        if cache is not None:
+            cache.close()
+
+    log_results(reports, problems, len(files), time.perf_counter() - started)
+    if args.output:
+        write_discrepancies(args.output, problems)
+        summary_log.info(f"📝 Afwijkingen opgeslagen: {args.output}")
+    if problems:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()